@@ -0,0 +1,126 @@
+"""
+The part of the Ghidra API that fake_ghidra.py serves, and a generator for a GhidraAPI_javadoc.zip describing it.
+The ZIP has the same layout as the real one: one `api/<package path>/<Class>.json` per class.
+"""
+import json
+import zipfile
+
+ADDRESS = "ghidra.program.model.address.Address"
+FUNCTION = "ghidra.program.model.listing.Function"
+
+# class -> (extends, {method: ([(parameter, type)], return type)})
+API = {
+    "ghidra.program.model.listing.Program": ("java.lang.Object", {
+        "getFunctionManager": ([], "ghidra.program.model.listing.FunctionManager"),
+        "getName": ([], "java.lang.String"),
+        "getModificationNumber": ([], "long"),
+        "getImageBase": ([], ADDRESS),
+        "getUniqueProgramID": ([], "long"),
+        "getMemory": ([], "ghidra.program.model.mem.Memory"),
+        "getAddressFactory": ([], "ghidra.program.model.address.AddressFactory"),
+        "getSymbolTable": ([], "ghidra.program.model.symbol.SymbolTable"),
+        "getReferenceManager": ([], "ghidra.program.model.symbol.ReferenceManager"),
+        "getDataTypeManager": ([], "ghidra.program.model.data.DataTypeManager"),
+        "getMinAddress": ([], ADDRESS),
+        "addListener": ([("dol", "ghidra.framework.model.DomainObjectListener")], "void"),
+        "removeListener": ([("dol", "ghidra.framework.model.DomainObjectListener")], "void"),
+    }),
+    "ghidra.program.model.mem.Memory": ("java.lang.Object", {
+        "getBlock": ([("name", "java.lang.String")], "ghidra.program.model.mem.MemoryBlock"),
+        "getBlocks": ([], "ghidra.program.model.mem.MemoryBlock[]"),
+        "getBytes": ([("address", ADDRESS), ("buffer", "byte[]")], "int"),
+    }),
+    "ghidra.program.model.mem.MemoryBlock": ("java.lang.Object", {
+        "getName": ([], "java.lang.String"),
+        "getStart": ([], ADDRESS),
+        "getSize": ([], "long"),
+        "isInitialized": ([], "boolean"),
+    }),
+    "ghidra.program.model.address.AddressFactory": ("java.lang.Object", {
+        "getDefaultAddressSpace": ([], "ghidra.program.model.address.AddressSpace"),
+        "getAddressSpace": ([("name", "java.lang.String")], "ghidra.program.model.address.AddressSpace"),
+    }),
+    "ghidra.program.model.address.AddressSpace": ("java.lang.Object", {
+        "getName": ([], "java.lang.String"),
+        "getAddress": ([("offset", "long")], ADDRESS),
+    }),
+    "ghidra.program.model.listing.FunctionManager": ("java.lang.Object", {
+        "getFunctions": ([("forward", "boolean")], "ghidra.program.model.listing.FunctionIterator"),
+        "getFunctionCount": ([], "int"),
+        "getFunctionAt": ([("entryPoint", ADDRESS)], FUNCTION),
+    }),
+    "ghidra.program.model.listing.FunctionIterator": ("java.lang.Object", {
+        "hasNext": ([], "boolean"),
+        "next": ([], FUNCTION),
+    }),
+    FUNCTION: ("java.lang.Object", {
+        "getName": ([], "java.lang.String"),
+        "getEntryPoint": ([], ADDRESS),
+        "isThunk": ([], "boolean"),
+        "getParameterCount": ([], "int"),
+        "getParentNamespace": ([], "ghidra.program.model.symbol.Namespace"),
+        "getBody": ([], "ghidra.program.model.address.AddressSetView"),
+        "getPrototypeString": ([("formalSignature", "boolean"), ("includeCallingConvention", "boolean")],
+                               "java.lang.String"),
+        "setName": ([("name", "java.lang.String"), ("source", "ghidra.program.model.symbol.SourceType")], "void"),
+    }),
+    ADDRESS: ("java.lang.Object", {
+        "getOffset": ([], "long"),
+        "getAddressSpace": ([], "ghidra.program.model.address.AddressSpace"),
+        "add": ([("displacement", "long")], ADDRESS),
+        "compareTo": ([("a", ADDRESS)], "int"),
+    }),
+    "ghidra.app.script.GhidraScript": ("java.lang.Object", {
+        "getFunctionAt": ([("entryPoint", ADDRESS)], FUNCTION),
+        "toAddr": ([("offset", "long")], ADDRESS),
+    }),
+    "ghidra.app.script.GhidraState": ("java.lang.Object", {
+        "getTool": ([], "ghidra.framework.plugintool.PluginTool"),
+        "getCurrentProgram": ([], "ghidra.program.model.listing.Program"),
+    }),
+    "java.lang.Object": (None, {
+        "toString": ([], "java.lang.String"),
+        "hashCode": ([], "int"),
+    }),
+}
+
+
+def _type(type_long):
+    return {'type_long': type_long, 'type_short': type_long.split(".")[-1]}
+
+
+def class_json(class_name, extends, methods) -> dict:
+    return {
+        'name': class_name.split(".")[-1],
+        'javadoc': f"Synthetic stand-in for {class_name}.",
+        'extends': extends,
+        'implements': [],
+        'fields': [],
+        'methods': [{
+            'name': name,
+            'javadoc': f"Synthetic doc of {name}.",
+            'static': False,
+            'params': [dict(_type(type_long), name=param, comment=f"the {param}") for param, type_long in params],
+            'return': dict(_type(return_type), comment=""),
+            'throws': [],
+        } for name, (params, return_type) in methods.items()],
+    }
+
+
+def filler_classes(count, methods=20):
+    """Classes nobody uses, so the ZIP and the index have a realistic size"""
+    for i in range(count):
+        name = f"ghidra.bench.filler.p{i % 50}.Filler{i}"
+        yield name, ("java.lang.Object", {
+            f"method{m}": ([("value", "int"), ("name", "java.lang.String")], "java.lang.String")
+            for m in range(methods)
+        })
+
+
+def write_javadoc_zip(path, filler=2000):
+    """Write a GhidraAPI_javadoc.zip for API plus `filler` unrelated classes to path"""
+    classes = list(API.items()) + list(filler_classes(filler))
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as fzip:
+        for class_name, (extends, methods) in classes:
+            fzip.writestr(f"api/{class_name.replace('.', '/')}.json", json.dumps(class_json(class_name, extends, methods)))
+    return path
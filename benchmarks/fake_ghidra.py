@@ -0,0 +1,571 @@
+"""
+Stand-in for a Ghidra bridge server, so the benchmarks run without Ghidra:
+
+    python benchmarks/fake_ghidra.py --port 4799 --functions 10000 --install-dir /tmp/fake_ghidra
+
+Serves a `currentProgram` with N synthetic functions, a small flat API and a fake `ghidra` package whose
+`GhidraApplicationLayout` points at `--install-dir`, where the runner put a generated `docs/GhidraAPI_javadoc.zip`.
+The objects report the same type names as their Java counterparts do through Jython,
+so DocHelper and the completer find them in the generated doc.
+"""
+import argparse
+import logging
+import sys
+import types
+import zlib
+
+try:
+    from jfx_bridge import bridge
+except ImportError:
+    # ghidra_bridge before the bridge was split out into jfx_bridge
+    from ghidra_bridge import bridge
+
+
+class instancemethod(object):
+    """What a bound Java method looks like through Jython, DocHelper recognizes methods by this type name"""
+
+    def __init__(self, function, target, class_name):
+        self._function = function
+        self._target = target
+        self._class_name = class_name
+
+    def __call__(self, *args):
+        return self._function(self._target, *args)
+
+    def __repr__(self):
+        return f"<bound method {self._class_name}.{self._function.__name__} of {self._target!r}>"
+
+
+class JavaMethod(object):
+    def __init__(self, function, class_name):
+        self._function = function
+        self._class_name = class_name
+
+    def __get__(self, obj, owner):
+        if obj is None:
+            return self
+        return instancemethod(self._function, obj, self._class_name)
+
+
+class JavaClass(type):
+    """Metaclass that makes classes look like Java classes seen through Jython: `<type 'java.lang.Class'>`"""
+    __module__ = "java.lang"
+    __qualname__ = "Class"
+
+    def __new__(mcs, name, bases, namespace, java_name):
+        package, _, short_name = java_name.rpartition(".")
+        namespace.update({'__module__': package, '__qualname__': short_name})
+        for attribute, value in list(namespace.items()):
+            if attribute.startswith("_") or not callable(value):
+                continue
+            namespace[attribute] = JavaMethod(value, java_name)
+            # Jython turns bean getters into properties
+            for prefix in ("get", "is"):
+                if attribute.startswith(prefix) and len(attribute) > len(prefix) and value.__code__.co_argcount == 1:
+                    prop = attribute[len(prefix)].lower() + attribute[len(prefix) + 1:]
+                    namespace.setdefault(prop, property(value))
+        return super().__new__(mcs, short_name, bases, namespace)
+
+    def __init__(cls, name, bases, namespace, java_name):
+        super().__init__(name, bases, namespace)
+
+
+class JavaObject(metaclass=JavaClass, java_name="java.lang.Object"):
+    def toString(self):
+        return repr(self)
+
+    def hashCode(self):
+        return id(self) & 0x7fffffff
+
+    def __repr__(self):
+        return f"{type(self).__module__}.{type(self).__qualname__}@{self.hashCode():x}"
+
+
+class AddressSpace(JavaObject, java_name="ghidra.program.model.address.AddressSpace"):
+    def getName(self):
+        return "ram"
+
+    def getAddress(self, offset):
+        return Address(offset)
+
+
+class AddressFactory(JavaObject, java_name="ghidra.program.model.address.AddressFactory"):
+    def getDefaultAddressSpace(self):
+        return RAM
+
+    def getAddressSpace(self, name):
+        return RAM if name == RAM.getName() else None
+
+
+class Address(JavaObject, java_name="ghidra.program.model.address.Address"):
+    def __init__(self, offset):
+        self._offset = offset
+
+    def getOffset(self):
+        return self._offset
+
+    def getAddressSpace(self):
+        return RAM
+
+    def add(self, displacement):
+        return Address(self._offset + displacement)
+
+    def compareTo(self, other):
+        return (self._offset > other.getOffset()) - (self._offset < other.getOffset())
+
+    def __repr__(self):
+        return f"{self._offset:08x}"
+
+
+class AddressRange(JavaObject, java_name="ghidra.program.model.address.AddressRangeImpl"):
+    def __init__(self, start, end):
+        self._start = start
+        self._end = end
+
+    def getMinAddress(self):
+        return self._start
+
+    def getMaxAddress(self):
+        return self._end
+
+
+class AddressSet(JavaObject, java_name="ghidra.program.model.address.AddressSet"):
+    def __init__(self):
+        self._ranges = []
+
+    def add(self, start, end):
+        self._ranges.append(AddressRange(start, end))
+
+    def getAddressRanges(self):
+        return sorted(self._ranges, key=lambda r: r.getMinAddress().getOffset())
+
+    def contains(self, address):
+        return any(r.getMinAddress().getOffset() <= address.getOffset() <= r.getMaxAddress().getOffset()
+                   for r in self._ranges)
+
+
+class MemoryBlock(JavaObject, java_name="ghidra.program.model.mem.MemoryBlock"):
+    def __init__(self, name, start, data):
+        self._name = name
+        self._start = Address(start)
+        self._data = data
+
+    def getName(self):
+        return self._name
+
+    def getStart(self):
+        return self._start
+
+    def getSize(self):
+        return len(self._data)
+
+    def isInitialized(self):
+        return True
+
+
+class Memory(JavaObject, java_name="ghidra.program.model.mem.Memory"):
+    def __init__(self, size):
+        # Deterministic pseudo random bytes, so the content is the same for every run
+        data = bytearray(size)
+        state = 0x12345678
+        for i in range(size):
+            state = (state * 1103515245 + 12345) & 0x7fffffff
+            data[i] = state >> 16 & 0xff
+        self._block = MemoryBlock(".text", 0x10000, bytes(data))
+
+    def getBlock(self, name):
+        return self._block if name == self._block.getName() else None
+
+    def getBlocks(self):
+        return [self._block]
+
+    def getBytes(self, address, buffer):
+        """Fills buffer from address on and returns how many bytes there were"""
+        start = address.getOffset() - self._block.getStart().getOffset()
+        data = self._block._data[start:start + len(buffer)]
+        buffer[:len(data)] = data
+        return len(data)
+
+
+class Namespace(JavaObject, java_name="ghidra.program.model.symbol.GlobalNamespace"):
+    def getName(self, fullyQualified=False):
+        return "Global"
+
+
+GLOBAL = Namespace()
+
+
+class AddressSetView(JavaObject, java_name="ghidra.program.database.function.FunctionDB$FunctionBody"):
+    def __init__(self, size):
+        self._size = size
+
+    def getNumAddresses(self):
+        return self._size
+
+
+class Function(JavaObject, java_name="ghidra.program.model.listing.Function"):
+    def __init__(self, index):
+        self._name = f"FUN_{0x10000 + index * 0x40:08x}"
+        self._entry = Address(0x10000 + index * 0x40)
+        self._thunk = index % 7 == 0
+        self._parameters = index % 5
+        self._body = AddressSetView(0x10 + index % 0x30)
+
+    def getName(self):
+        return self._name
+
+    def getEntryPoint(self):
+        return self._entry
+
+    def isThunk(self):
+        return self._thunk
+
+    def getParameterCount(self):
+        return self._parameters
+
+    def getParentNamespace(self):
+        return GLOBAL
+
+    def getBody(self):
+        return self._body
+
+    def getPrototypeString(self, formalSignature, includeCallingConvention):
+        parameters = ", ".join(f"int param_{i + 1}" for i in range(self._parameters))
+        return f"undefined {self._name}({parameters})"
+
+    def setName(self, name, source):
+        self._name = name
+        currentProgram._modified(ChangeRecord("SYMBOL_RENAMED", self._entry, self._entry))
+
+    def __repr__(self):
+        return self._name
+
+
+class FunctionIterator(JavaObject, java_name="ghidra.program.model.listing.FunctionIterator"):
+    def __init__(self, functions):
+        self._functions = iter(functions)
+        self._next = next(self._functions, None)
+
+    def hasNext(self):
+        return self._next is not None
+
+    def next(self):
+        function, self._next = self._next, next(self._functions, None)
+        return function
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._next is None:
+            raise StopIteration
+        return self.next()
+
+
+class FunctionManager(JavaObject, java_name="ghidra.program.model.listing.FunctionManager"):
+    def __init__(self, count):
+        self._functions = [Function(i) for i in range(count)]
+        self._by_entry = {f.getEntryPoint().getOffset(): f for f in self._functions}
+
+    def getFunctions(self, forward_or_addresses, forward=True):
+        """Both overloads, getFunctions(forward) and getFunctions(addressSet, forward)"""
+        functions = self._functions
+        if isinstance(forward_or_addresses, AddressSet):
+            functions = [f for f in functions if forward_or_addresses.contains(f.getEntryPoint())]
+        else:
+            forward = forward_or_addresses
+        return FunctionIterator(functions if forward else reversed(functions))
+
+    def getFunctionCount(self):
+        return len(self._functions)
+
+    def getFunctionAt(self, entryPoint):
+        return self._by_entry.get(entryPoint.getOffset())
+
+
+class Symbol(JavaObject, java_name="ghidra.program.database.symbol.FunctionSymbol"):
+    def __init__(self, function):
+        self._function = function
+
+    def getAddress(self):
+        return self._function.getEntryPoint()
+
+    def getName(self):
+        return self._function.getName()
+
+    def getParentNamespace(self):
+        return GLOBAL
+
+    def getSymbolType(self):
+        return "Function"
+
+    def getSource(self):
+        return "DEFAULT" if self._function.getName().startswith("FUN_") else "USER_DEFINED"
+
+    def isPrimary(self):
+        return True
+
+
+class SymbolTable(JavaObject, java_name="ghidra.program.database.symbol.SymbolManager"):
+    def __init__(self, function_manager):
+        self._symbols = [Symbol(f) for f in function_manager._functions]
+
+    def getAllSymbols(self, includeDynamicSymbols):
+        return iter(self._symbols)
+
+    def getSymbolIterator(self, startAddress, forward):
+        return (s for s in self._symbols if s.getAddress().getOffset() >= startAddress.getOffset())
+
+
+class Reference(JavaObject, java_name="ghidra.program.database.references.MemReferenceDB"):
+    def __init__(self, source, target):
+        self._from = source
+        self._to = target
+
+    def getFromAddress(self):
+        return self._from
+
+    def getToAddress(self):
+        return self._to
+
+    def getReferenceType(self):
+        return "UNCONDITIONAL_CALL"
+
+    def getOperandIndex(self):
+        return 0
+
+    def isPrimary(self):
+        return True
+
+
+class ReferenceManager(JavaObject, java_name="ghidra.program.database.references.ReferenceDBManager"):
+    def __init__(self, function_manager):
+        functions = function_manager._functions
+        # Every function calls the next two from its first instructions
+        self._references = {}
+        for i, f in enumerate(functions):
+            for n in (1, 2):
+                source = f.getEntryPoint().add(4 * n)
+                self._references[source.getOffset()] = [
+                    Reference(source, functions[(i + n) % len(functions)].getEntryPoint())]
+
+    def getReferenceSourceIterator(self, start_or_addresses, forward):
+        sources = sorted(self._references)
+        if isinstance(start_or_addresses, AddressSet):
+            return (Address(o) for o in sources if start_or_addresses.contains(Address(o)))
+        return (Address(o) for o in sources if o >= start_or_addresses.getOffset())
+
+    def getReferencesFrom(self, address):
+        return self._references.get(address.getOffset(), [])
+
+
+class DataType(JavaObject, java_name="ghidra.program.model.data.StructureDataType"):
+    def __init__(self, name, length):
+        self._name = name
+        self._length = length
+
+    def getName(self):
+        return self._name
+
+    def getPathName(self):
+        return f"/{self._name}"
+
+    def getCategoryPath(self):
+        return "/"
+
+    def getLength(self):
+        return self._length
+
+
+class DataTypeManager(JavaObject, java_name="ghidra.program.database.data.ProgramDataTypeManager"):
+    def __init__(self):
+        self._data_types = [DataType(f"struct_{i}", 4 * (i + 1)) for i in range(20)]
+
+    def getAllDataTypes(self):
+        return iter(self._data_types)
+
+
+class ChangeRecord(JavaObject, java_name="ghidra.program.util.ProgramChangeRecord"):
+    def __init__(self, event_type, start=None, end=None):
+        self._event_type = event_type
+        if start is not None:
+            # Records without an address have no getStart at all
+            self.getStart = lambda: start
+            self.getEnd = lambda: end
+
+    def getEventType(self):
+        return self._event_type
+
+
+class DomainObjectChangedEvent(JavaObject, java_name="ghidra.framework.model.DomainObjectChangedEvent"):
+    def __init__(self, records):
+        self._records = records
+
+    def numRecords(self):
+        return len(self._records)
+
+    def getChangeRecord(self, i):
+        return self._records[i]
+
+
+class DomainFile(JavaObject, java_name="ghidra.framework.data.GhidraFile"):
+    def __init__(self, name):
+        self._name = name
+        self._version = 1
+        # Fixed, so the program looks like the same saved file in every run
+        self._last_modified = 1700000000000
+
+    def getPathname(self):
+        return "/" + self._name
+
+    def getFileID(self):
+        return "fake%08x" % zlib.crc32(self._name.encode('utf-8'))
+
+    def getVersion(self):
+        return self._version
+
+    def getLastModifiedTime(self):
+        return self._last_modified
+
+
+class Program(JavaObject, java_name="ghidra.program.model.listing.Program"):
+    def __init__(self, name, function_count, memory_size):
+        self._name = name
+        self._function_manager = FunctionManager(function_count)
+        self._memory = Memory(memory_size)
+        self._symbol_table = SymbolTable(self._function_manager)
+        self._reference_manager = ReferenceManager(self._function_manager)
+        self._data_type_manager = DataTypeManager()
+        self._modification_number = 0
+        self._domain_file = DomainFile(name)
+        self._changed = False
+        self._listeners = []
+
+    def _modified(self, *records):
+        self._modification_number += 1
+        self._changed = True
+        # Ghidra buffers the events and sends them a little later, here they go out right away
+        event = DomainObjectChangedEvent(list(records) or [ChangeRecord("RESTORED")])
+        for listener in list(self._listeners):
+            listener.domainObjectChanged(event)
+
+    def addListener(self, listener):
+        self._listeners.append(listener)
+
+    def removeListener(self, listener):
+        self._listeners.remove(listener)
+
+    def getSymbolTable(self):
+        return self._symbol_table
+
+    def getReferenceManager(self):
+        return self._reference_manager
+
+    def getDataTypeManager(self):
+        return self._data_type_manager
+
+    def getMinAddress(self):
+        return self._memory._block.getStart()
+
+    def getFunctionManager(self):
+        return self._function_manager
+
+    def getName(self):
+        return self._name
+
+    def getModificationNumber(self):
+        return self._modification_number
+
+    def getDomainFile(self):
+        return self._domain_file
+
+    def isChanged(self):
+        return self._changed
+
+    def save(self, comment, monitor):
+        self._domain_file._version += 1
+        self._domain_file._last_modified += 1000
+        self._changed = False
+
+    def getUniqueProgramID(self):
+        return 0x1234
+
+    def getMemory(self):
+        return self._memory
+
+    def getAddressFactory(self):
+        return AddressFactory()
+
+    def getImageBase(self):
+        return Address(0x10000)
+
+
+class GhidraState(JavaObject, java_name="ghidra.app.script.GhidraState"):
+    def getTool(self):
+        # Like a headless Ghidra, so there is no listing panel to follow
+        return None
+
+    def getCurrentProgram(self):
+        return currentProgram
+
+
+class GhidraScript(JavaObject, java_name="ghidra.app.script.GhidraScript"):
+    def getFunctionAt(self, entryPoint):
+        return currentProgram.getFunctionManager().getFunctionAt(entryPoint)
+
+    def toAddr(self, offset):
+        return Address(offset)
+
+
+class File(object):
+    def __init__(self, path):
+        self.absolutePath = path
+
+
+def fake_ghidra_package(install_dir, version):
+    """The parts of the `ghidra` package DocHelper uses to find the doc and the version"""
+    ghidra = types.ModuleType("ghidra")
+    ghidra.util = types.ModuleType("ghidra.util")
+    ghidra.framework = types.ModuleType("ghidra.framework")
+    ghidra.util.SystemUtilities = types.SimpleNamespace(isInDevelopmentMode=lambda: False)
+    ghidra.framework.Application = types.SimpleNamespace(getApplicationVersion=lambda: version)
+    # What the listener of the mirror needs
+    ghidra.framework.model = types.ModuleType("ghidra.framework.model")
+    ghidra.framework.model.DomainObjectListener = type("DomainObjectListener", (object,), {})
+    ghidra.program = types.ModuleType("ghidra.program")
+    ghidra.program.model = types.ModuleType("ghidra.program.model")
+    ghidra.program.model.address = types.ModuleType("ghidra.program.model.address")
+    ghidra.program.model.address.AddressSet = AddressSet
+    # For isinstance checks against bridged types
+    ghidra.program.model.listing = types.ModuleType("ghidra.program.model.listing")
+    ghidra.program.model.listing.Function = Function
+    ghidra.program.model.listing.Program = Program
+    ghidra.GhidraApplicationLayout = lambda: types.SimpleNamespace(
+        applicationInstallationDir=File(install_dir), applicationRootDirs=[File(f"{install_dir}/Ghidra")])
+    return ghidra
+
+
+parser = argparse.ArgumentParser(description="Bridge server with fake Ghidra objects for the ipyghidra benchmarks")
+parser.add_argument("--port", type=int, required=True)
+parser.add_argument("--functions", type=int, default=1000, help="Number of functions in currentProgram")
+parser.add_argument("--install-dir", required=True, help="Fake Ghidra install dir with docs/GhidraAPI_javadoc.zip")
+parser.add_argument("--memory", type=int, default=1024 * 1024, help="Bytes in the .text memory block")
+parser.add_argument("--name", default="fake_program", help="Name of currentProgram")
+parser.add_argument("--version", default="0.0-bench", help="Ghidra version to report")
+args = parser.parse_args()
+
+ghidra = fake_ghidra_package(args.install_dir, args.version)
+for module in (ghidra, ghidra.util, ghidra.framework, ghidra.framework.model, ghidra.program, ghidra.program.model,
+               ghidra.program.model.address, ghidra.program.model.listing):
+    sys.modules[module.__name__] = module
+# The flat API, remote_eval and the bridge see the globals of this module like the ones of a Ghidra script
+RAM = AddressSpace()
+currentProgram = Program(args.name, args.functions, args.memory)
+currentAddress = currentProgram.getImageBase()
+state = GhidraState()
+monitor = None
+_script = GhidraScript()
+getFunctionAt = _script.getFunctionAt
+toAddr = _script.toAddr
+
+bridge.BridgeServer(server_host="127.0.0.1", server_port=args.port, loglevel=logging.WARNING).run()
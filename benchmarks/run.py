@@ -0,0 +1,247 @@
+"""
+Benchmarks of ipyghidra against the stand-in bridge server in fake_ghidra.py, no Ghidra needed:
+
+    python benchmarks/run.py --functions 100,1000,10000 --output results.json
+
+For every number of functions a fake server is started and a fresh kernel-like process loads the extension,
+so patches and caches of one measurement never leak into the next. Times are in milliseconds.
+"""
+import argparse
+import inspect
+import itertools
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+import fake_api
+
+EVAL_CODE = "[f.name for f in currentProgram.functionManager.getFunctions(True)]"
+COMPLETIONS = {
+    # Answered from the doc, following return types through the chain
+    'doc_chain': "currentProgram.functionManager.getFunctionAt(a).",
+    # Starts at a bridged object of the namespace, its class is known from the type sent with the handle
+    'bridged_dir': "fm.",
+    # Flat API names before they were ever used
+    'flat_api': "getFunc",
+}
+
+
+def measure(function, repeat) -> dict:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - start) * 1000)
+    return {'min': min(times), 'median': statistics.median(times), 'mean': statistics.mean(times), 'repeat': repeat}
+
+
+def probe_startup():
+    """Load the extension into a new shell, run in a child process"""
+    start = time.perf_counter()
+    from IPython.core.interactiveshell import InteractiveShell
+    import ipyghidra
+    imported = time.perf_counter()
+    ip = InteractiveShell.instance()
+    created = time.perf_counter()
+    ipyghidra.load_ipython_extension(ip)
+    loaded = time.perf_counter()
+    ready = ip.user_ns['_doc_helper'].wait_ready(60)
+    doc_ready = time.perf_counter()
+    return {
+        'import': (imported - start) * 1000,
+        'load_extension': (loaded - created) * 1000,
+        'doc_ready': (doc_ready - created) * 1000,
+        'doc_loaded': ready,
+    }
+
+
+def probe_session(repeat, local_limit):
+    """Everything that needs a loaded extension, run in a child process"""
+    from IPython.core.interactiveshell import InteractiveShell
+    import ipyghidra
+    ip = InteractiveShell.instance()
+    ipyghidra.load_ipython_extension(ip)
+    doc_helper = ip.user_ns['_doc_helper']
+    doc_helper.wait_ready(60)
+    ip.run_cell("fm = currentProgram.functionManager\na = currentProgram.imageBase", store_history=False)
+    fm = ip.user_ns['fm']
+    results = {}
+
+    # A class that was never looked up before goes to the doc store, after that it is an LRU hit
+    filler = [name for name, _ in fake_api.filler_classes(repeat)]
+    lookups = iter(filler)
+    results['doc_lookup_cold'] = measure(lambda: doc_helper._load_class(next(lookups)), repeat)
+    results['doc_lookup_warm'] = measure(lambda: doc_helper._load_class(filler[0]), repeat)
+    # Fetched once, so only the doc lookups are timed and not the round trip for the attribute
+    get_functions = fm.getFunctions
+    results['get_doc'] = measure(lambda: doc_helper.get_doc(get_functions), repeat)
+    results['signature'] = measure(lambda: inspect.signature(get_functions), repeat)
+    # What `fm.getFunctions?` does
+    results['inspect'] = measure(lambda: ip.object_inspect('fm.getFunctions'), repeat)
+
+    count = fm.functionCount
+    results['ghidra_eval'] = measure(lambda: ip.run_line_magic('ghidra_eval', EVAL_CODE), repeat)
+    results['ghidra_eval']['items'] = count
+    # Iterating locally costs a round trip per item, so only a prefix is timed
+    limit = min(count, local_limit)
+    results['local_iteration'] = measure(
+        lambda: [f.name for f in itertools.islice(fm.getFunctions(True), limit)], max(1, repeat // 5))
+    results['local_iteration']['items'] = limit
+    results['local_iteration']['per_item'] = results['local_iteration']['median'] / max(limit, 1)
+
+    # The first read transfers the block, after that it comes from the memory mapped cache file
+    memory = ip.user_ns['_memory']
+    results['memory_block_cold'] = measure(lambda: memory.block(".text", as_type="numpy"), 1)
+    results['memory_block_warm'] = measure(lambda: memory.block(".text", as_type="numpy"), repeat)
+    results['memory_block_warm']['bytes'] = len(memory.block(".text", as_type="bytes"))
+
+    # The first query exports the tables, after that queries are local apart from one round trip to sync
+    mirror = ip.user_ns['_mirror']
+    results['mirror_attach'] = measure(lambda: mirror.sql("SELECT count(*) FROM functions"), 1)
+    results['mirror_query'] = measure(lambda: mirror.sql("SELECT name FROM functions WHERE thunk"), repeat)
+
+    # The same query on every server of the cluster, all at once and one after the other
+    cluster = ip.user_ns.get('_cluster')
+    if cluster is not None:
+        fanout = lambda workers: cluster.fanout(EVAL_CODE, ip.user_ns, flat_api=ip.user_ns['_flat_api'], workers=workers)
+        fanout(None)
+        results['fanout'] = measure(lambda: fanout(None), repeat)
+        results['fanout_sequential'] = measure(lambda: fanout(1), repeat)
+        results['fanout']['servers'] = len(cluster.targets)
+
+    from ipyghidra.profiler import BridgeProfiler
+    for name, line in COMPLETIONS.items():
+        results[f'complete_{name}'] = measure(lambda: ip.complete(None, line, len(line)), repeat)
+        # Completion is meant to be answered locally, a request here means it went to the bridge after all.
+        # Handles released by the garbage collector meanwhile are not caused by the completion.
+        with BridgeProfiler(ip.user_ns['_bridge'].bridge) as profiler:
+            ip.complete(None, line, len(line))
+        results[f'complete_{name}']['requests'] = sum(r.command != "del" for r in profiler.requests)
+    return results
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"Fake Ghidra server did not start on port {port}")
+
+
+def run_probe(probe, env, *args) -> dict:
+    output = subprocess.run([sys.executable, __file__, "--probe", probe, *args], env=env, check=True,
+                            stdout=subprocess.PIPE, universal_newlines=True).stdout
+    # The result is the last line, anything before it is output of the extension
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def start_server(functions, install_dir, name="fake_program", port=None):
+    port = port or free_port()
+    server = subprocess.Popen([sys.executable, os.path.join(HERE, "fake_ghidra.py"), "--port", str(port),
+                               "--functions", str(functions), "--install-dir", install_dir, "--name", name],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return port, server
+
+
+def run_scale(functions, args) -> dict:
+    with tempfile.TemporaryDirectory(prefix="ipyghidra-bench-") as tmp:
+        os.makedirs(os.path.join(tmp, "ghidra", "docs"))
+        fake_api.write_javadoc_zip(os.path.join(tmp, "ghidra", "docs", "GhidraAPI_javadoc.zip"), args.classes)
+        port, server = start_server(functions, os.path.join(tmp, "ghidra"))
+        # Further servers for the cluster measurements, each with a program of its own
+        cluster = [start_server(functions, os.path.join(tmp, "ghidra"), f"program_{i}") for i in range(args.cluster)]
+        try:
+            for p in [port] + [p for p, _ in cluster]:
+                wait_for_port(p)
+            env = dict(os.environ, GHIDRA_BRIDGE_HOST="127.0.0.1", GHIDRA_BRIDGE_PORT=str(port),
+                       # A cache dir of its own, so the first start really builds the doc index
+                       XDG_CACHE_HOME=os.path.join(tmp, "cache"),
+                       PYTHONPATH=os.pathsep.join(filter(None, [os.path.dirname(HERE), os.environ.get('PYTHONPATH')])))
+            if cluster:
+                env['IPYGHIDRA_CLUSTER'] = ",".join(f"127.0.0.1:{p}" for p, _ in cluster)
+            cold = run_probe("startup", env)
+            warm = [run_probe("startup", env) for _ in range(args.startups)]
+            results = {
+                'startup_cold': cold,
+                'startup_warm': {key: statistics.median(r[key] for r in warm) for key in cold if key != 'doc_loaded'},
+            }
+            results.update(run_probe("session", env, "--repeat", str(args.repeat), "--local-limit", str(args.local_limit)))
+            return results
+        finally:
+            for process in [server] + [s for _, s in cluster]:
+                process.terminate()
+                process.wait()
+
+
+def summary(scale) -> str:
+    results = scale['results']
+    return (f"{scale['functions']:>7} functions: startup {results['startup_warm']['load_extension']:.0f}ms "
+            f"(cold doc {results['startup_cold']['doc_ready']:.0f}ms), "
+            f"signature {results['signature']['median']:.2f}ms, "
+            f"ghidra_eval {results['ghidra_eval']['median']:.0f}ms vs "
+            f"{results['local_iteration']['per_item'] * scale['functions']:.0f}ms local (extrapolated), "
+            f"completion {results['complete_doc_chain']['median']:.2f}ms "
+            f"({sum(v['requests'] for k, v in results.items() if k.startswith('complete_'))} bridge requests)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ipyghidra against a fake Ghidra bridge server")
+    parser.add_argument("--functions", default="100,1000,10000", help="Comma separated program sizes to measure")
+    parser.add_argument("--classes", type=int, default=2000, help="Number of filler classes in the generated doc")
+    parser.add_argument("--repeat", type=int, default=20, help="Repetitions of every measurement")
+    parser.add_argument("--startups", type=int, default=3, help="Warm extension starts per size")
+    parser.add_argument("--local-limit", type=int, default=200, help="Functions to iterate locally per repetition")
+    parser.add_argument("--cluster", type=int, default=0, help="Extra servers to measure %%ghidra_fanout with")
+    parser.add_argument("--output", help="Write the JSON results to this file instead of stdout")
+    parser.add_argument("--probe", choices=("startup", "session"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.probe == "startup":
+        print(json.dumps(probe_startup()))
+        return
+    if args.probe == "session":
+        print(json.dumps(probe_session(args.repeat, args.local_limit)))
+        return
+
+    scales = []
+    for functions in (int(n) for n in args.functions.split(",")):
+        scales.append({'functions': functions, 'results': run_scale(functions, args)})
+        print(summary(scales[-1]), file=sys.stderr)
+    report = json.dumps({
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'time': time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            'classes': args.classes,
+            'repeat': args.repeat,
+            'cluster': args.cluster,
+        },
+        'scales': scales,
+    }, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report)
+    else:
+        print(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,28 +1,40 @@
 
-from IPython.core.magic import (Magics, magics_class, line_cell_magic)
-
-import ast
+from IPython.core.magic import (Magics, magics_class, line_cell_magic, line_magic, cell_magic)
+from IPython.core.error import UsageError
 
 
 import ghidra_bridge
 import logging
+import os
+import sys
 
 from ipyghidra.doc_helper import DocHelper
+from ipyghidra.flat_api import LazyFlatAPI, FlatAPILoader
+from ipyghidra.completer import DocCompleter
+from ipyghidra.batch import GhidraBatch
+from ipyghidra.offload import ComprehensionOffloader, OFFLOAD_NAME
+from ipyghidra.profiler import BridgeProfiler
+from ipyghidra.prefetch import Prefetcher
+from ipyghidra.parallel import BridgePool, ghidra_map
+from ipyghidra.cluster import GhidraCluster, parse_servers, DEFAULT_PROGRAMS
+from ipyghidra.memory import MemoryCache
+from ipyghidra.define import Definitions
+from ipyghidra.mirror import ProgramMirror
+from ipyghidra.eval_plan import EvalPlanCache
+from ipyghidra.result_cache import ResultCache
+from ipyghidra.options import split_options, parse_assignments
+from ipyghidra.scope import shipped_variables, wire_size
+from ipyghidra.stream import RemoteStream, as_generator
+from ipyghidra.tasks import TaskRunner
+from ipyghidra.table import ghidra_table
+from ipyghidra.startup import StartupTimer
 
-b = None
-
-
-class VarVisitor(ast.NodeVisitor):
-    """
-    Simple visitor that gathers all variable names from an AST
-    """
-    def __init__(self):
-        super(VarVisitor, self).__init__()
-        self.variables = set()
-
-    def visit_Name(self, node):
-        self.variables.add(node.id)
+logger = logging.getLogger('ipyghidra')
 
+b = None
+startup_timer = None
+eval_plans = EvalPlanCache()
+eval_results = ResultCache()
 
 
 @magics_class
@@ -30,33 +42,438 @@ class GhidraBridgeMagics(Magics):
 
     @line_cell_magic
     def ghidra_eval(self, line, cell=None):
+        """
+        Evaluate an expression on the server, local variables it uses are sent along.
+
+        Options:
+          --stream   Return a local iterator that fetches the results in chunks while it is consumed
+          --chunk N  Number of items per chunk with --stream, default 5000
+          --cache    Reuse the result of an earlier run while currentProgram is unchanged, see %ghidra_cache
+          --async    Return a GhidraTask right away, `await` it or call its result(), see %ghidra_tasks
+          --timeout S  Cancel the evaluation on the server after S seconds and raise TimeoutError
+        """
         b = self.shell.user_ns['_bridge'] # type: ghidra_bridge.ghidra_bridge.GhidraBridge
+        options, line = split_options(line, flags=('stream', 'cache', 'async'), valued=('chunk', 'timeout'))
+        if 'stream' in options and ('async' in options or 'timeout' in options):
+            raise UsageError("--stream can't be combined with --async or --timeout")
         # Of the cell is not none use it and ignore the line, otherwise use the line
         code = cell or line
-        # Parse the AST and gather all variable names used
-        code_ast = ast.parse(code)
-        v = VarVisitor()
-        v.visit(code_ast)
-        # For every variable in the AST check if it is defined in the current user namespace and if yes get its actual value
-        vars = {var: self.shell.user_ns[var] for var in  v.variables if var in self.shell.user_ns}
-        # This mapping from variable names to objects can now be passed to remote_eval which makes sure those variables exist when evaluating on the server side
-        return b.bridge.remote_eval(code, **vars)
+        if 'stream' in options:
+            # A list comprehension would be built completely on the server before the first chunk could be sent
+            code = f"iter({as_generator(code)}\n)"
+        # Parsing, scope analysis and compiling on the server only happen the first time a piece of code is run
+        plan = eval_plans.plan(code)
+        # A stream is consumed once, caching it makes no sense
+        cached = (eval_results.enabled or 'cache' in options) and 'stream' not in options
+        # Flat API names are only resolved on first use, current* ones are refreshed so the server sees the latest values
+        self.shell.user_ns['_flat_api'].populate(plan.free_variables | ({'currentProgram'} if cached else set()))
+        # Only the variables the code actually reads from the enclosing scope are candidates to send to the server.
+        # Comprehension targets, lambda parameters and names the code assigns itself are local to the evaluation.
+        # For every free variable check if it is defined in the current user namespace and if yes get its actual value
+        vars = shipped_variables(plan.free_variables, self.shell.user_ns)
+        if logger.isEnabledFor(logging.DEBUG):
+            # wire_size walks every value, only worth it when the message is shown
+            logger.debug(f"ghidra_eval: sending {len(vars)} variables (~{sum(wire_size(v) for v in vars.values())} bytes)")
+        # This mapping from variable names to objects is passed along with the handle of the compiled code, which makes sure those variables exist when evaluating on the server side
+        if 'stream' in options:
+            return RemoteStream(b.bridge, plan.run(b.bridge, vars, as_globals=True), int(options.get('chunk', 5000)))
+        tasks = self.shell.user_ns['_tasks'] # type: TaskRunner
+        key = eval_results.key(b.bridge, code, vars, self.shell.user_ns.get('currentProgram')) if cached else None
+        if key is not None:
+            found, result = eval_results.lookup(key)
+            if found:
+                return tasks.completed(code, result) if 'async' in options else result
+        timeout = float(options['timeout']) if 'timeout' in options else None
+        if 'async' in options:
+            task = tasks.submit(plan, vars, timeout=timeout)
+            if key is not None:
+                task.add_done_callback(lambda t: t.exception() is None and eval_results.put(key, t.result()))
+            return task
+        if timeout is not None:
+            result = tasks.run(plan, vars, timeout=timeout)
+        else:
+            result = plan.run(b.bridge, vars)
+        if key is not None:
+            eval_results.put(key, result)
+        return result
 
-def load_ipython_extension(ip):
-    global b
-    import ghidra_bridge
-    logger = logging.getLogger('ipyghidra')
-    logger.setLevel(logging.INFO)
-
-    b = ghidra_bridge.GhidraBridge(namespace=ip.user_ns, interactive_mode=True) # creates the bridge and loads the flat API into the global namespace
-    logger.info("Connected to bridge")
-    ip.user_ns.update({'_bridge': b})
-    logger.info("Registering Magics")
-    ip.register_magics(GhidraBridgeMagics)
-    logger.info("Setting up DocHelper")
-    doc_helper = DocHelper(b.bridge)
-    ip.user_ns.update({'_doc_helper': doc_helper})
-    logger.info("Patching ghidra_bridge")
-    doc_helper.patch_ghidra_bridge()
+    @line_magic
+    def ghidra_tasks(self, line):
+        """
+        List the `ghidra_eval --async` evaluations that are still running,
+        `%ghidra_tasks cancel ID` stops one of them on the server, `%ghidra_tasks cancel` all of them.
+        """
+        tasks = self.shell.user_ns['_tasks'] # type: TaskRunner
+        command, _, task_id = line.strip().partition(" ")
+        if command == "cancel" and task_id.strip():
+            task = tasks.running().get(task_id.strip())
+            if task is None:
+                raise UsageError(f"No running task {task_id.strip()}")
+            task.cancel()
+        elif command == "cancel":
+            print(f"Cancelled {tasks.cancel_all()} tasks")
+        elif command:
+            raise UsageError("Usage: %ghidra_tasks [cancel [ID]]")
+        else:
+            for task in tasks.running().values():
+                print(task)
+
+    @line_cell_magic
+    def ghidra_define(self, line, cell=None):
+        """
+        Define the functions in the cell on the server, where they run entirely inside the JVM,
+        and bind a local stub with the same name. ghidra_eval passes the stubs as the server side function:
+
+            %%ghidra_define
+            def callers(f):
+                return sorted(set(c.name for c in f.getCallingFunctions(monitor)))
+
+            %ghidra_eval {f.name: callers(f) for f in currentProgram.functionManager.getFunctions(True)}
+
+        The functions see the globals of the server like the flat API and currentProgram, not local variables,
+        and have to be valid Python for the server (Jython 2.7). They can't take the name of one of those globals.
+        Without a cell lists the defined functions.
+        """
+        definitions = self.shell.user_ns['_definitions'] # type: Definitions
+        if cell is None:
+            for function in definitions.functions.values():
+                print(repr(function))
+            return
+        try:
+            stubs = definitions.define(cell)
+        except ValueError as e:
+            raise UsageError(str(e))
+        print(f"Defined {', '.join(stubs)} on the server")
+
+    @cell_magic
+    def ghidra_table(self, line, cell):
+        """
+        Evaluate columns over a server side iterable and transfer each of them as one packed buffer.
+        The line is the iterable, every line of the cell defines a column as `name = expression` of the item `x`:
 
+            %%ghidra_table currentProgram.functionManager.getFunctions(True)
+            name = x.name
+            entry = x.entryPoint
+            size = x.body.numAddresses
+
+        Options:
+          --df       Return a pandas DataFrame instead of a dict of NumPy arrays
+          --as NAME  Name of the item in the column expressions instead of `x`
+        """
+        b = self.shell.user_ns['_bridge'] # type: ghidra_bridge.ghidra_bridge.GhidraBridge
+        options, iterable = split_options(line, flags=('df',), valued=('as',))
+        columns = parse_assignments(cell)
+        return ghidra_table(b.bridge, iterable, columns, self.shell.user_ns, item_name=options.get('as', 'x'),
+                            dataframe='df' in options, plans=eval_plans, flat_api=self.shell.user_ns['_flat_api'])
+
+    @cell_magic
+    def ghidra_map(self, line, cell):
+        """
+        Evaluate the expression in the cell for every item `x` of the server side iterable on the line,
+        spread over several bridge connections so the server works on the items with several threads:
+
+            %%ghidra_map --workers 8 currentProgram.functionManager.getFunctions(True)
+            decompiler.decompileFunction(x, 60, monitor).getDecompiledFunction().getC()
+
+        Options:
+          --workers N    Number of connections to use, default is the size of `_bridge_pool`
+          --chunk N      Items per request, default 16
+          --unordered    Return a generator of (index, result) that yields results as they finish
+          --keep-errors  Return a GhidraMapError for failed items instead of raising it
+          --as NAME      Name of the item in the expression instead of `x`
+          --quiet        Don't report progress
+        """
+        b = self.shell.user_ns['_bridge'] # type: ghidra_bridge.ghidra_bridge.GhidraBridge
+        options, iterable = split_options(line, flags=('unordered', 'keep-errors', 'quiet'),
+                                          valued=('workers', 'chunk', 'as'))
+
+        def progress(done, total):
+            print(f"\rghidra_map: {done}/{total}", end="\n" if done == total else "", file=sys.stderr, flush=True)
+
+        return ghidra_map(b.bridge, self.shell.user_ns['_bridge_pool'], iterable, cell.strip(), self.shell.user_ns,
+                          item_name=options.get('as', 'x'), workers=int(options.get('workers', 0)) or None,
+                          chunk_size=int(options.get('chunk', 16)), ordered='unordered' not in options,
+                          keep_errors='keep-errors' in options, progress=None if 'quiet' in options else progress,
+                          plans=eval_plans, flat_api=self.shell.user_ns['_flat_api'])
+
+    @line_cell_magic
+    def ghidra_cluster(self, line, cell=None):
+        """
+        Connect to several bridge servers for %ghidra_fanout, given as `host:port` separated by spaces or commas.
+        The cell is evaluated on every server for the programs it contributes, by default `[currentProgram]`:
+
+            %%ghidra_cluster 127.0.0.1:4768 127.0.0.1:4769
+            list(state.getTool().getService(ghidra.app.services.ProgramManager).getAllOpenPrograms())
+
+        `IPYGHIDRA_CLUSTER` sets up a cluster the same way when the extension loads. Without servers shows the cluster.
+        """
+        if line.strip():
+            self.shell.user_ns['_cluster'] = GhidraCluster(parse_servers(line),
+                                                           programs=(cell or "").strip() or DEFAULT_PROGRAMS)
+        cluster = self.shell.user_ns.get('_cluster') # type: GhidraCluster
+        if cluster is None:
+            raise UsageError("No cluster, use %ghidra_cluster host:port host:port ...")
+        cluster.connect()
+        print(repr(cluster))
+
+    @line_cell_magic
+    def ghidra_fanout(self, line, cell=None):
+        """
+        Evaluate an expression on every program of the cluster (see %ghidra_cluster) at the same time
+        and return the results as dict by program name. The expression sees its program as `currentProgram`:
+
+            %ghidra_fanout [f.name for f in currentProgram.functionManager.getFunctions(True) if f.isThunk()]
+
+        Programs the expression failed for are reported and left out, their exceptions are in `.errors` of the result.
+
+        Options:
+          --strict  Raise the first error instead
+        """
+        cluster = self.shell.user_ns.get('_cluster') # type: GhidraCluster
+        if cluster is None:
+            raise UsageError("No cluster, use %ghidra_cluster host:port host:port ...")
+        options, line = split_options(line, flags=('strict',))
+        results = cluster.fanout((cell or line).strip(), self.shell.user_ns, flat_api=self.shell.user_ns['_flat_api'],
+                                 plans=eval_plans)
+        if results.errors and 'strict' in options:
+            label, error = next(iter(results.errors.items()))
+            raise RuntimeError(f"ghidra_fanout failed for {label}") from error
+        for label, error in results.errors.items():
+            print(f"ghidra_fanout: {label} failed: {error}", file=sys.stderr)
+        return results
+
+    @cell_magic
+    def ghidra_batch(self, line, cell):
+        """
+        Evaluate several independent expressions in a single round trip and bind the results in the namespace.
+        Every line of the cell is `name = expression`:
+
+            %%ghidra_batch
+            count = currentProgram.functionManager.functionCount
+            entry = currentProgram.imageBase
+            blocks = list(currentProgram.memory.blocks)
+        """
+        b = self.shell.user_ns['_bridge'] # type: ghidra_bridge.ghidra_bridge.GhidraBridge
+        batch = GhidraBatch(b.bridge, self.shell.user_ns, bind=True, plans=eval_plans,
+                            flat_api=self.shell.user_ns['_flat_api'])
+        for name, expression in parse_assignments(cell).items():
+            batch.add(name, expression)
+        return batch.run()
+
+    @line_magic
+    def ghidra_doc_index(self, line):
+        """Show the doc index in use, `%ghidra_doc_index rebuild` rebuilds it from the API ZIP"""
+        doc_helper = self.shell.user_ns['_doc_helper'] # type: DocHelper
+        if line.strip() == "rebuild":
+            try:
+                doc_helper.rebuild_index()
+            except RuntimeError as e:
+                raise UsageError(str(e))
+        if not doc_helper.wait_ready(doc_helper.ready_timeout):
+            print(f"No doc: {doc_helper.load_error}" if doc_helper.load_error else "The doc is still loading")
+        else:
+            print(doc_helper.index_path or "No index in use, reading the API ZIP directly")
+
+    @line_magic
+    def ghidra_cache(self, line):
+        """
+        `%ghidra_cache on` caches the results of all ghidra_eval runs, not only those with `--cache`, `off` stops that.
+        `clear` drops the cached results, `size N` limits them to about N MiB. Always shows the cache stats.
+        """
+        command, _, argument = line.strip().partition(" ")
+        if command in ("on", "off"):
+            eval_results.enabled = command == "on"
+        elif command == "clear":
+            eval_results.clear()
+        elif command == "size" and argument.strip().isdigit():
+            eval_results.resize(int(argument) * 1024 * 1024)
+        elif command:
+            raise UsageError("Usage: %ghidra_cache [on|off|clear|size MiB]")
+        print(f"Result cache is {'on' if eval_results.enabled else 'off'}: {eval_results.stats}")
+
+    @line_cell_magic
+    def ghidra_prof(self, line, cell=None):
+        """
+        Run a statement or cell and report the bridge requests it caused, ranked by the time spent on them,
+        per line of the cell and per remote method.
+
+        Options:
+          --trace FILE  Also write the requests as Chrome trace JSON to FILE
+          --top N       Number of entries in each ranking, default 15
+        """
+        b = self.shell.user_ns['_bridge'] # type: ghidra_bridge.ghidra_bridge.GhidraBridge
+        options, line = split_options(line, valued=('trace', 'top'))
+        code = cell or line
+        if not code.strip():
+            raise UsageError("Usage: %ghidra_prof [--trace FILE] [--top N] statement")
+        with BridgeProfiler(b.bridge) as profiler:
+            self.shell.run_cell(code)
+        print(profiler.report(top=int(options.get('top', 15))))
+        if 'trace' in options:
+            profiler.save_trace(options['trace'])
+        self.shell.user_ns['_ghidra_prof'] = profiler
+
+    @line_magic
+    def ghidra_prefetch(self, line):
+        """
+        `%ghidra_prefetch on` makes the first read of a bean property of a bridged object fetch all of its bean
+        properties in one request, `off` stops that. `clear` drops all prefetched values. Always shows the stats.
+        Use `_prefetcher.prefetch(objects, names)` to prefetch explicitly.
+        """
+        prefetcher = self.shell.user_ns['_prefetcher'] # type: Prefetcher
+        command = line.strip()
+        if command in ("on", "off"):
+            prefetcher.auto = command == "on"
+        elif command == "clear":
+            prefetcher.invalidate()
+        elif command:
+            raise UsageError("Usage: %ghidra_prefetch [on|off|clear]")
+        print(prefetcher.stats)
+
+    @line_magic
+    def ghidra_memory(self, line):
+        """
+        Program bytes in one transfer, cached in memory mapped files until the program changes:
+
+            %ghidra_memory .text              all bytes of the memory block `.text`
+            %ghidra_memory 0x401000 0x2000    0x2000 bytes starting at an offset or an address expression
+            %ghidra_memory clear              delete the cached bytes of all programs
+
+        Options:
+          --numpy  Return a NumPy uint8 array instead of a memoryview
+          --bytes  Return bytes instead of a memoryview
+        """
+        memory = self.shell.user_ns['_memory'] # type: MemoryCache
+        options, line = split_options(line, flags=('numpy', 'bytes'))
+        as_type = "numpy" if 'numpy' in options else "bytes" if 'bytes' in options else "memoryview"
+        args = line.split()
+        if not args:
+            print(memory.stats)
+        elif args == ["clear"]:
+            memory.clear()
+        elif len(args) == 1:
+            return memory.block(args[0], as_type=as_type)
+        elif len(args) == 2:
+            start, length = [self._int_or_eval(arg) for arg in args]
+            return memory.read(start, length, as_type=as_type)
+        else:
+            raise UsageError("Usage: %ghidra_memory [--numpy|--bytes] BLOCK | START LENGTH | clear")
+
+    @line_cell_magic
+    def ghidra_mirror(self, line, cell=None):
+        """
+        Query the local SQLite mirror of the functions, symbols, xrefs and data_types of currentProgram,
+        it is synced with the changes in Ghidra before every query:
+
+            %ghidra_mirror SELECT name, entry FROM functions WHERE thunk
+            %%ghidra_mirror --df
+            SELECT f.name, count(*) AS callers FROM xrefs x JOIN functions f ON f.entry = x.to_address
+            GROUP BY f.name ORDER BY callers DESC
+
+        `attach` mirrors currentProgram, even if another program was mirrored before, `sync` only syncs,
+        `detach` stops watching the program. Without query shows the stats.
+
+        Options:
+          --df  Return a pandas DataFrame instead of a list of rows
+        """
+        mirror = self.shell.user_ns['_mirror'] # type: ProgramMirror
+        options, line = split_options(line, flags=('df',))
+        query = (cell or line).strip()
+        if not query:
+            print(mirror.stats)
+        elif query == "attach":
+            mirror.attach()
+        elif query == "sync":
+            print(f"Synced {mirror.sync()} rows")
+        elif query == "detach":
+            mirror.detach()
+        elif 'df' in options:
+            return mirror.df(query)
+        else:
+            return mirror.sql(query)
+
+    def _int_or_eval(self, arg):
+        try:
+            return int(arg, 0)
+        except ValueError:
+            return eval(arg, self.shell.user_ns)
+
+    @line_magic
+    def ghidra_offload(self, line):
+        """
+        `%ghidra_offload on` rewrites comprehensions over bridged iterables in ordinary cells to run on the server,
+        `%ghidra_offload off` stops that. Without argument it shows the state and how often it was used.
+        """
+        offloader = self.shell.user_ns[OFFLOAD_NAME] # type: ComprehensionOffloader
+        command = line.strip()
+        if command in ("on", "off"):
+            offloader.enabled = command == "on"
+        elif command:
+            raise UsageError("Usage: %ghidra_offload [on|off]")
+        print(f"Offloading is {'on' if offloader.enabled else 'off'}, "
+              f"{offloader.offloaded} comprehensions ran on the server, {offloader.fallbacks} fell back to local")
+
+    @line_magic
+    def ghidra_startup(self, line):
+        """Break down where the time went while loading the extension, including the background doc loading"""
+        print(startup_timer.report())
+
+def load_ipython_extension(ip):
+    global b, startup_timer
+    startup_timer = StartupTimer()
+    with startup_timer.phase("load_ipython_extension"):
+        import ghidra_bridge
+        logger.setLevel(logging.INFO)
 
+        with startup_timer.phase("Connect bridge"):
+            # The defaults of ghidra_bridge apply unless the environment points somewhere else
+            connect = {}
+            if 'GHIDRA_BRIDGE_HOST' in os.environ:
+                connect['connect_to_host'] = os.environ['GHIDRA_BRIDGE_HOST']
+            if 'GHIDRA_BRIDGE_PORT' in os.environ:
+                connect['connect_to_port'] = int(os.environ['GHIDRA_BRIDGE_PORT'])
+            b = ghidra_bridge.GhidraBridge(**connect)
+        logger.info("Connected to bridge")
+        ip.user_ns.update({'_bridge': b})
+        # Instead of copying the whole flat API into the namespace, names are resolved when a cell first uses them
+        # and the current* variables are refreshed before every cell once they are used
+        flat_api = LazyFlatAPI(b.bridge, ip.user_ns, interactive_mode=True)
+        flat_api.provide_builtins()
+        ip.user_ns.update({'_flat_api': flat_api})
+        ip.ast_transformers.append(FlatAPILoader(flat_api))
+        ip.events.register('post_run_cell', flat_api.forget_current)
+        ip.Completer.custom_matchers.append(flat_api.complete)
+        logger.info("Registering Magics")
+        ip.register_magics(GhidraBridgeMagics)
+        logger.info("Setting up DocHelper")
+        # The doc is loaded on a background thread, the patched properties wait for it or degrade until it is ready
+        doc_helper = DocHelper(b.bridge, background=True, timer=startup_timer)
+        ip.user_ns.update({'_doc_helper': doc_helper})
+        logger.info("Patching ghidra_bridge")
+        with startup_timer.phase("Patch ghidra_bridge"):
+            doc_helper.patch_ghidra_bridge()
+        # Completes attribute/call chains on bridged objects from the doc, without asking the bridge
+        doc_completer = DocCompleter(doc_helper, ip.user_ns, ip.Completer, flat_api)
+        ip.Completer.custom_matchers.append(doc_completer.ipython_matcher)
+        # Attribute values read in bulk are kept on the proxies until the program changes
+        prefetcher = Prefetcher(b.bridge, ip.user_ns, doc_helper)
+        prefetcher.patch_ghidra_bridge()
+        # Reading the current* values changes nothing, the prefetched values stay unless the program changed
+        ip.events.register('pre_run_cell', prefetcher.quietly(flat_api.refresh))
+        ip.events.register('pre_run_cell', prefetcher.check_modified)
+        ip.user_ns.update({'_prefetcher': prefetcher})
+        # Further connections for %%ghidra_map, only opened when it first runs
+        ip.user_ns.update({'_bridge_pool': BridgePool(b.bridge, size=int(os.environ.get('IPYGHIDRA_POOL_SIZE', 4)))})
+        # Servers of %ghidra_fanout, connected when it first runs
+        if os.environ.get('IPYGHIDRA_CLUSTER'):
+            ip.user_ns.update({'_cluster': GhidraCluster(parse_servers(os.environ['IPYGHIDRA_CLUSTER']))})
+        ip.user_ns.update({'_definitions': Definitions(b.bridge, ip.user_ns)})
+        # Background evaluations of `ghidra_eval --async` and `--timeout`
+        ip.user_ns.update({'_tasks': TaskRunner(b.bridge)})
+        ip.user_ns.update({'_memory': MemoryCache(b.bridge, ip.user_ns, flat_api=flat_api)})
+        # Exports the program tables on first use only, a listener on the server keeps it in sync after that
+        ip.user_ns.update({'_mirror': ProgramMirror(b.bridge, ip.user_ns, flat_api=flat_api)})
+        # Off until `%ghidra_offload on`, then comprehensions over bridged iterables run on the server
+        offloader = ComprehensionOffloader(b.bridge, ip.user_ns, plans=eval_plans, flat_api=flat_api)
+        ip.user_ns.update({OFFLOAD_NAME: offloader})
+        ip.ast_transformers.append(offloader)
@@ -0,0 +1,55 @@
+from ipyghidra.eval_plan import EvalPlanCache
+from ipyghidra.scope import shipped_variables
+
+
+class GhidraBatch():
+    """
+    Collects named expressions and evaluates all of them on the server with a single remote_eval,
+    so N independent small queries cost one round trip instead of N:
+
+        with GhidraBatch(_bridge.bridge, globals(), bind=True) as batch:
+            batch.add('count', 'currentProgram.functionManager.functionCount')
+            batch.add('entry', 'currentProgram.imageBase')
+        count, entry
+    """
+
+    def __init__(self, bridge, namespace, bind=False, plans: EvalPlanCache = None, flat_api=None):
+        self._bridge = bridge
+        self._namespace = namespace
+        self._bind = bind
+        self._plans = plans if plans is not None else EvalPlanCache()
+        self._flat_api = flat_api
+        self.expressions = {}
+        self.results = None
+
+    def add(self, name, expression):
+        if self.results is not None:
+            raise RuntimeError("This batch already ran")
+        self.expressions[name] = expression
+
+    def code(self) -> str:
+        """One dict display with all expressions, evaluated in one go on the server"""
+        entries = ",\n".join(f"{name!r}: ({expression}\n)" for name, expression in self.expressions.items())
+        return "{" + entries + "}"
+
+    def run(self) -> dict:
+        plan = self._plans.plan(self.code())
+        if self._flat_api is not None:
+            self._flat_api.populate(plan.free_variables)
+        self.results = plan.run(self._bridge, shipped_variables(plan.free_variables, self._namespace))
+        if self._bind:
+            self._namespace.update(self.results)
+        return self.results
+
+    def __getitem__(self, name):
+        if self.results is None:
+            raise RuntimeError("The batch didn't run yet, results are available after the with block")
+        return self.results[name]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Don't send anything if the block that collected the expressions failed
+        if exc_type is None and self.expressions:
+            self.run()
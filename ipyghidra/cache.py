@@ -0,0 +1,100 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+
+def user_cache_dir(*parts) -> str:
+    """The ipyghidra directory in the users cache dir (respects XDG_CACHE_HOME), created on demand"""
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser("~"), ".cache")
+    path = os.path.join(base, "ipyghidra", *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def approx_size(obj) -> int:
+    """Rough deep size in bytes of nested dicts/lists/tuples/sets and the values in them"""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(approx_size(k) + approx_size(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(approx_size(v) for v in obj)
+    return size
+
+
+class LRUCache():
+    """
+    Thread safe least recently used cache, bounded by the summed `sizeof` of its values.
+    Without `sizeof` every value counts as 1, so `max_size` is the number of entries.
+    """
+
+    def __init__(self, max_size, sizeof=None):
+        self.max_size = max_size
+        self._sizeof = sizeof or (lambda value: 1)
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value, _ = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        size = self._sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self._size -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._size += size
+            # Never evict the entry that was just added, even if it alone is over the limit
+            self._evict(keep=1)
+
+    def _evict(self, keep):
+        while self._size > self.max_size and len(self._entries) > keep:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._size -= evicted_size
+            self.evictions += 1
+
+    def resize(self, max_size):
+        """Change the limit, a smaller one evicts the least recently used entries right away"""
+        with self._lock:
+            self.max_size = max_size
+            self._evict(keep=0)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+            value, size = self._entries.pop(key)
+            self._size -= size
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def keys(self):
+        with self._lock:
+            return list(self._entries)
+
+    @property
+    def stats(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'entries': len(self._entries), 'size': self._size, 'max_size': self.max_size}
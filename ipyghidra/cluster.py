@@ -0,0 +1,157 @@
+import concurrent.futures
+import logging
+
+import ghidra_bridge
+from ghidra_bridge.bridge import BridgedObject
+from ghidra_bridge.ghidra_bridge import DEFAULT_SERVER_PORT
+
+from ipyghidra.eval_plan import EvalPlanCache
+from ipyghidra.scope import shipped_variables
+
+logger = logging.getLogger('ipyghidra')
+
+# Evaluated on every server, the programs it contributes to the cluster
+DEFAULT_PROGRAMS = "[currentProgram]"
+
+
+def parse_servers(spec) -> list:
+    """`host:port` entries separated by commas or whitespace into (host, port), the port defaults to that of the bridge"""
+    servers = []
+    for entry in spec.replace(",", " ").split():
+        host, _, port = entry.rpartition(":") if ":" in entry else (entry, "", "")
+        servers.append((host or "127.0.0.1", int(port) if port else DEFAULT_SERVER_PORT))
+    return servers
+
+
+class ClusterMember():
+    """One bridge server of the cluster and the programs bound to it"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.bridge = None
+        # [(name, bridged program)] as the server reported them
+        self.named_programs = []
+        # [(label, bridged program)]
+        self.programs = []
+
+    @property
+    def address(self) -> str:
+        return f"{self.host}:{self.port}"
+
+    def __repr__(self):
+        return f"<ClusterMember {self.address}: {', '.join(label for label, _ in self.programs) or 'no programs'}>"
+
+
+class ClusterResults(dict):
+    """Results by program, the programs the expression failed for are in `errors` with their exception instead"""
+
+    def __init__(self):
+        super(ClusterResults, self).__init__()
+        self.errors = {}
+
+
+class GhidraCluster():
+    """
+    Several Ghidra bridge servers, e.g. headless Ghidras each analysing a share of a firmware set,
+    that run the same ghidra_eval expression in parallel:
+
+        cluster = GhidraCluster([("127.0.0.1", 4768), ("10.0.0.2", 4768)])
+        sizes = cluster.fanout("currentProgram.functionManager.functionCount", namespace)
+
+    Every server contributes the programs `programs` evaluates to there, by default its currentProgram.
+    The expression sees the program as `currentProgram`. Other flat API names resolve on the server itself.
+    """
+
+    def __init__(self, servers, programs=DEFAULT_PROGRAMS, response_timeout=600):
+        self.members = [ClusterMember(host, port) for host, port in servers]
+        self.programs = programs
+        self.response_timeout = response_timeout
+        # address -> exception of the servers that could not be connected to
+        self.errors = {}
+
+    @property
+    def connected(self) -> list:
+        """The members with a working connection"""
+        return [member for member in self.members if member.bridge is not None]
+
+    def connect(self):
+        """
+        Connect to all servers in parallel and bind their programs. Servers that fail are left out until the
+        next call, which tries them again
+        """
+        pending = [member for member in self.members if member.bridge is None]
+        if not pending:
+            return
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(pending)) as executor:
+            futures = [(member, executor.submit(self._connect, member)) for member in pending]
+            for member, future in futures:
+                if future.exception() is not None:
+                    logger.warning(f"Cluster: {member.address} left out: {future.exception()}")
+                    self.errors[member.address] = future.exception()
+                else:
+                    self.errors.pop(member.address, None)
+        self._label_programs()
+
+    def _connect(self, member):
+        bridge = ghidra_bridge.GhidraBridge(connect_to_host=member.host, connect_to_port=member.port,
+                                            response_timeout=self.response_timeout).bridge
+        # The programs and their names in one round trip
+        member.named_programs = bridge.remote_eval(f"[(p.getName(), p) for p in ({self.programs})]")
+        member.bridge = bridge
+
+    def _label_programs(self):
+        """Results are tagged with the program name, or name@host:port where several servers have the same one"""
+        members = self.connected
+        # Labels can change when a server that failed before joins with a program of the same name
+        names = [name for member in members for name, _ in member.named_programs]
+        for member in members:
+            labels = [name if names.count(name) == 1 else f"{name}@{member.address}"
+                      for name, _ in member.named_programs]
+            # The same program name twice on one server, e.g. two versions of a binary
+            labels = [label if labels.count(label) == 1 else f"{label}#{i}" for i, label in enumerate(labels)]
+            member.programs = [(label, program) for label, (_, program) in zip(labels, member.named_programs)]
+
+    @property
+    def targets(self) -> list:
+        """(label, member, program) for every program of the cluster, after trying to connect the missing servers"""
+        self.connect()
+        return [(label, member, program) for member in self.connected for label, program in member.programs]
+
+    def fanout(self, expression, namespace, flat_api=None, plans: EvalPlanCache = None, workers=None) -> ClusterResults:
+        """
+        Evaluate expression for every program of the cluster, all of them at the same time.
+        Local variables the expression uses are sent along, flat API values of the main bridge are not:
+        every server resolves those itself.
+        """
+        plans = plans if plans is not None else EvalPlanCache()
+        plan = plans.plan(expression)
+        names = {n for n in plan.free_variables if not (flat_api is not None and flat_api.provided(n))}
+        variables = shipped_variables(names, namespace)
+        variables.pop('currentProgram', None)
+        for name, value in variables.items():
+            if isinstance(value, BridgedObject):
+                # Handles only mean something to the server that created them
+                raise ValueError(f"{name} is an object of another bridge, it can't be sent to the cluster servers")
+
+        results = ClusterResults()
+        targets = self.targets
+        if not targets:
+            return results
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers or len(targets)) as executor:
+            futures = [(label, executor.submit(plan.run, member.bridge, dict(variables, currentProgram=program),
+                                               as_globals=True))
+                       for label, member, program in targets]
+            # Collected in the order of the servers, all of them run at the same time
+            for label, future in futures:
+                if future.exception() is not None:
+                    results.errors[label] = future.exception()
+                else:
+                    results[label] = future.result()
+        return results
+
+    def __repr__(self):
+        lines = [f"<GhidraCluster of {len(self.connected)} servers, programs {self.programs}>"]
+        lines += [f"  {member!r}" for member in self.connected]
+        lines += [f"  {address}: failed, {error}" for address, error in self.errors.items()]
+        return "\n".join(lines)
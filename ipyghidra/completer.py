@@ -0,0 +1,180 @@
+import logging
+import re
+
+from ghidra_bridge.bridge import BridgedObject
+
+try:
+    from IPython.core.completer import SimpleCompletion
+except ImportError:
+    # IPython before 8.6 only knows matchers that return a list of strings and can't suppress other matchers
+    SimpleCompletion = None
+
+from ipyghidra.flat_api import LazyFlatAPI
+
+logger = logging.getLogger('ipyghidra')
+
+# Types of flat API variables, so chains starting at them complete before they were ever fetched
+FLAT_API_TYPES = {
+    "currentProgram": "ghidra.program.model.listing.Program",
+    "currentAddress": "ghidra.program.model.address.Address",
+    "currentLocation": "ghidra.program.util.ProgramLocation",
+    "currentSelection": "ghidra.program.util.ProgramSelection",
+    "currentHighlight": "ghidra.program.util.ProgramSelection",
+    "monitor": "ghidra.util.task.TaskMonitor",
+    "state": "ghidra.app.script.GhidraState",
+}
+# The flat API functions are the methods of the script the bridge server runs in
+FLAT_API_CLASS = "ghidra.app.script.GhidraScript"
+
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def split_chain(line):
+    """
+    Split the attribute/call chain at the end of line into its steps and the prefix of the attribute being completed.
+    'x = currentProgram.functionManager.getFunction(a.b).na' -> [('currentProgram', False), ('functionManager', False), ('getFunction', True)], 'na'
+    Returns None if the line doesn't end in such a chain.
+    """
+    match = re.search(r"\.([A-Za-z0-9_]*)$", line)
+    if match is None:
+        return None
+    prefix = match.group(1)
+    pos = match.start()
+    steps = []
+    while True:
+        called = False
+        if line[:pos].endswith(")"):
+            # Skip back over the argument list, the arguments don't matter for the return type
+            depth = 0
+            for i in range(pos - 1, -1, -1):
+                if line[i] == ")":
+                    depth += 1
+                elif line[i] == "(":
+                    depth -= 1
+                    if depth == 0:
+                        break
+            else:
+                return None
+            pos = i
+            called = True
+        name = _IDENTIFIER.search(line[:pos])
+        if name is None:
+            return None
+        steps.append((name.group(0), called))
+        pos = name.start()
+        if pos > 0 and line[pos - 1] == ".":
+            pos -= 1
+        else:
+            break
+    return steps[::-1], prefix
+
+
+def normalize_type(type_long):
+    """'java.util.List<ghidra.X>' -> 'java.util.List', None for arrays and primitives which have no doc"""
+    if not type_long or type_long.endswith("]"):
+        return None
+    type_long = type_long.split("<")[0]
+    return type_long if "." in type_long else None
+
+
+class DocCompleter():
+    """
+    IPython matcher (`ipython_matcher`) that follows return types through attribute/call chains with the API doc,
+    so completing e.g. `currentProgram.functionManager.getFunction(x).` needs no bridge round trip.
+    """
+
+    def __init__(self, doc_helper, namespace, completer, flat_api: LazyFlatAPI = None):
+        self._doc_helper = doc_helper
+        self._namespace = namespace
+        self._completer = completer
+        self._flat_api = flat_api
+
+    def _root_type(self, name, called):
+        if name in self._namespace:
+            value = self._namespace[name]
+            if not isinstance(value, BridgedObject):
+                return None
+            class_name, method_name, is_class = self._doc_helper._get_class_and_method(value)
+            if method_name is not None:
+                return self._step_type(class_name, method_name, called) if called else None
+            # Calling a class constructs an instance of it
+            return class_name if called or not is_class else None
+        if self._flat_api is not None and name in self._flat_api.names:
+            if called:
+                return self._step_type(FLAT_API_CLASS, name, called)
+            return FLAT_API_TYPES.get(name)
+        return None
+
+    def _step_type(self, class_name, name, called):
+        methods = self._doc_helper._resolved_methods(class_name)
+        if called:
+            overloads = methods.get(name)
+        else:
+            # Jython turns bean getters into properties, `functionManager` is `getFunctionManager()`
+            capitalized = name[:1].upper() + name[1:]
+            overloads = [m for m in methods.get("get" + capitalized, []) + methods.get("is" + capitalized, [])
+                         if not m['params']]
+            if not overloads:
+                field = next((f for f in self._doc_helper.get_jsondoc(class_name).get('fields', [])
+                              if f.get('name') == name), None)
+                return normalize_type(field.get('type_long')) if field else None
+        if not overloads:
+            return None
+        return normalize_type(overloads[0]['return']['type_long'])
+
+    def resolve(self, steps):
+        """The Java class the chain of (name, called) steps evaluates to, or None if it can't be known offline"""
+        class_name = self._root_type(*steps[0])
+        for name, called in steps[1:]:
+            if class_name is None:
+                return None
+            class_name = self._step_type(class_name, name, called)
+        return class_name
+
+    def members(self, class_name):
+        """Method names and bean properties of a class, including inherited ones"""
+        members = set(self._doc_helper._resolved_methods(class_name)) - {"<init>"}
+        return members | set(self._doc_helper.bean_properties(class_name))
+
+    def complete(self, text):
+        """Matcher of the v1 API, the completions for `text` if the chain before the cursor resolves"""
+        # Only ever answer from what is available locally, never wait for the doc or ask the bridge
+        if not self._doc_helper.wait_ready(0):
+            return []
+        chain = split_chain(self._completer.text_until_cursor)
+        if chain is None:
+            return []
+        steps, prefix = chain
+        members = set()
+        try:
+            class_name = self.resolve(steps)
+            if class_name is not None:
+                members = self.members(class_name)
+        except Exception as e:
+            logger.debug(f"Doc based completion failed: {e}")
+        root = self._namespace.get(steps[0][0]) if len(steps) == 1 and not steps[0][1] else None
+        if isinstance(root, BridgedObject):
+            # The attribute names of an object in the namespace came with its handle, so they are local as well.
+            # They also have what the doc of the declared type lacks, like public fields or members of the
+            # implementation class, e.g. ProgramDB behind a Program
+            members |= {m for m in root._bridge_attrs if prefix.startswith("_") or not m.startswith("_")}
+        # IPython replaces `text`, which ends with the attribute prefix being completed
+        base = text[:len(text) - len(prefix)]
+        return [base + m for m in sorted(members) if m.startswith(prefix)]
+
+    def matcher(self, context):
+        """
+        Matcher of the v2 API of IPython 8.6+. Once the doc or the attribute names of a bridged object in the
+        namespace answered, the other matchers are suppressed: they have nothing to add, but jedi and the attribute
+        matcher would inspect the bridged objects of the chain, a round trip per attribute.
+        """
+        completions = self.complete(context.token)
+        return {'completions': [SimpleCompletion(c, type="attribute") for c in completions],
+                'suppress': bool(completions)}
+
+    matcher.matcher_api_version = 2
+
+    @property
+    def ipython_matcher(self):
+        """What to append to `custom_matchers`, bound methods because IPython identifies matchers by __qualname__"""
+        return self.matcher if SimpleCompletion is not None else self.complete
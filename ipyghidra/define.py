@@ -0,0 +1,52 @@
+import os
+
+from ghidra_bridge.bridge import BridgeException
+
+from ipyghidra.remote import remote_call
+
+
+class RemoteFunction():
+    """
+    Local stand-in for a function defined on the server with %%ghidra_define.
+    Calling it is one round trip, the function itself runs in the JVM. ghidra_eval and the other magics
+    send the server side function instead of the stub, so code there calls it without going back to the client.
+    """
+
+    def __init__(self, name, remote, source):
+        self.__name__ = name
+        self.remote = remote
+        self.source = source
+
+    def __call__(self, *args, **kwargs):
+        return self.remote(*args, **kwargs)
+
+    def __repr__(self):
+        return f"<RemoteFunction {self.__name__} defined on the server>"
+
+
+class Definitions():
+    """
+    Functions defined on the server by %%ghidra_define, they live as long as the server session.
+    They run in a namespace of this client on the server, so they neither see nor replace the definitions of other
+    clients. Names not defined there come from the server's __main__, e.g. the flat API and currentProgram.
+    """
+
+    def __init__(self, bridge, namespace):
+        self._bridge = bridge
+        self._namespace = namespace
+        # Unique per client process, several kernels can use the same server
+        self._client = f"{os.getpid()}-{id(self):x}"
+        self.functions = {}
+
+    def define(self, source) -> dict:
+        """Run source on the server, bind a RemoteFunction for every top level def or class in the namespace"""
+        # The server parses the source, so Python 2 only syntax for a Jython server is fine
+        try:
+            names, remotes = remote_call(self._bridge, 'define', "define(globals(), c, s)", c=self._client, s=source)
+        except BridgeException as e:
+            # No definitions, one that would hide a name of the server's globals or code the server can't compile
+            raise ValueError(str(e.args[-1])) from e
+        stubs = {name: RemoteFunction(name, remote, source) for name, remote in zip(names, remotes)}
+        self.functions.update(stubs)
+        self._namespace.update(stubs)
+        return stubs
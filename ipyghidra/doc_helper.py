@@ -5,25 +5,133 @@ import json
 import re
 from inspect import Signature, Parameter
 
-import tempfile
 import os
+import logging
+import sqlite3
+import threading
+from contextlib import nullcontext
 
 import ghidra_bridge
 
+from ipyghidra.cache import LRUCache, approx_size
+from ipyghidra.doc_index import DocIndex
 
+logger = logging.getLogger('ipyghidra')
+
+
+class ZipDocStore():
+    """Reads the class JSON docs straight from the API ZIP, only when they are requested"""
+
+    def __init__(self, zip_path):
+        self._zip = zipfile.ZipFile(zip_path, "r")
+
+    def get_jsondoc(self, class_name):
+        # Members of a ZIP always use forward slashes, independent of the OS
+        member = "/".join(["api", *class_name.split('.')]) + '.json'
+        with self._zip.open(member) as f:
+            return json.load(f)
+
+    def close(self):
+        self._zip.close()
+
+
+def _signature_key(method) -> tuple:
+    """The parameter types of a method doc, which tell overloads apart"""
+    return tuple(param.get('type_long') for param in method['params'])
 
 
 class DocHelper():
     """Doc helper that is based on ghidradoc.py helper, but returns the doc dict instead of printing it"""
 
-    def __init__(self, bridge: ghidra_bridge.bridge.BridgeClient, zip_path=None):
+    def __init__(self, bridge: ghidra_bridge.bridge.BridgeClient, zip_path=None, version=None, use_index=True,
+                 cache_size=64 * 1024 * 1024, background=False, ready_timeout=2.0, timer=None):
 
-        self._zip_path = zip_path or self._find_zip(bridge)
         self._bridge = bridge
-        self._ghidra = bridge.remote_import('ghidra')
-        with zipfile.ZipFile(self._zip_path, "r") as fzip:
-            self._doc_dir = tempfile.TemporaryDirectory()
-            fzip.extractall(self._doc_dir.name)
+        self._zip_path = zip_path
+        self._version = version
+        self._use_index = use_index
+        self._timer = timer
+        # How long the patched properties wait for the doc before giving up, in seconds
+        self.ready_timeout = ready_timeout
+        self._ready = threading.Event()
+        self._load_error = None
+        # Parsed class docs and their `name -> [overloads]` dict, bounded by their approximate size in bytes
+        self._class_cache = LRUCache(cache_size, sizeof=lambda entry: approx_size(entry[0]))
+        # Flattened method tables including everything inherited. They keep the overloads of the parent docs alive,
+        # so they are bounded by their approximate size as well
+        self._resolved_cache = LRUCache(cache_size, sizeof=approx_size)
+        # (class_name, method_name, is_class) of remote objects, so introspecting a known type needs no round trips
+        self._identity_cache = LRUCache(16384)
+        self.bridge_calls_saved = 0
+
+        if background:
+            threading.Thread(target=self._load, name="ipyghidra-doc-loader", daemon=True).start()
+        else:
+            self._load()
+            if self._load_error is not None:
+                raise self._load_error
+
+    def _phase(self, name):
+        return self._timer.phase(name) if self._timer else nullcontext()
+
+    def _load(self):
+        """Everything that needs the bridge or the disk, this is what runs on the background thread"""
+        try:
+            with self._phase("DocHelper: find ZIP"):
+                self._zip_path = self._zip_path or self._find_zip(self._bridge)
+            with self._phase("DocHelper: Ghidra version"):
+                self._ghidra = self._bridge.remote_import('ghidra')
+                self._version = self._version or self._find_version()
+            with self._phase("DocHelper: open doc store"):
+                self._store = self._open_store(self._use_index)
+        except Exception as e:
+            logger.warning(f"Could not load the Ghidra API doc: {e}")
+            self._load_error = e
+        finally:
+            self._ready.set()
+
+    def wait_ready(self, timeout=None) -> bool:
+        """Wait for the doc to be loaded, False if that didn't happen within timeout or loading failed"""
+        return self._ready.wait(timeout) and self._load_error is None
+
+    @property
+    def load_error(self):
+        """The exception loading the doc failed with, None while it is loading or when it succeeded"""
+        return self._load_error
+
+    @property
+    def index_path(self):
+        """Path of the doc index in use, None while the doc is loading or if it is read from the ZIP directly"""
+        if not self.wait_ready(0):
+            return None
+        return getattr(self._store, 'path', None)
+
+    def _find_version(self) -> str:
+        try:
+            return str(self._ghidra.framework.Application.getApplicationVersion())
+        except Exception:
+            return "unknown"
+
+    def _open_store(self, use_index, rebuild=False):
+        if use_index:
+            # The index is shared by all sessions, so only the very first start for a Ghidra version pays for parsing the doc
+            try:
+                return DocIndex.for_zip(self._zip_path, self._version, rebuild=rebuild)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Could not use the doc index, falling back to reading the ZIP: {e}")
+        # The ZIP is kept open and members are only read on demand, nothing is extracted to disk
+        return ZipDocStore(self._zip_path)
+
+    def rebuild_index(self) -> str:
+        """Rebuild the on disk doc index for the current ZIP and switch to it, waits for the doc to be loaded first"""
+        if not self.wait_ready():
+            raise RuntimeError(f"The Ghidra API doc could not be loaded: {self._load_error}")
+        old_store = self._store
+        self._store = self._open_store(use_index=True, rebuild=True)
+        old_store.close()
+        self._class_cache.clear()
+        self._resolved_cache.clear()
+        return getattr(self._store, 'path', None)
 
 
     def _find_zip(self, bridge: ghidra_bridge.bridge.BridgeClient) -> str:
@@ -53,24 +161,123 @@ class DocHelper():
 
     def get_jsondoc(self, class_name):
         "cls is a string of the classpath e.g. 'ghidra.program.database.ProgramDB'"
-        json_path = os.path.join("api", *class_name.split('.')) + '.json'
-        with open(os.path.join(self._doc_dir.name, json_path)) as f:
-            return json.load(f)
-
+        return self._load_class(class_name)[0]
 
+    def _load_class(self, class_name):
+        """The parsed doc of a class together with a dict from method name to all its overloads"""
+        entry = self._class_cache.get(class_name)
+        if entry is None:
+            try:
+                jdoc = self._store.get_jsondoc(class_name)
+            except KeyError:
+                # Types outside of the Ghidra API like java.lang.Object have no doc, which is worth remembering too
+                entry = (None, None)
+            else:
+                methods = {}
+                for method in jdoc['methods']:
+                    methods.setdefault(method['name'], []).append(method)
+                entry = (jdoc, methods)
+            self._class_cache.put(class_name, entry)
+        if entry[0] is None:
+            raise KeyError(class_name)
+        return entry
+
+    def _resolved_methods(self, class_name) -> dict:
+        """`name -> [overloads]` of a class merged with everything inherited from its superclasses and interfaces"""
+        resolved = self._resolved_cache.get(class_name)
+        if resolved is None:
+            try:
+                jdoc, methods = self._load_class(class_name)
+            except KeyError:
+                return {}
+            resolved = {name: list(overloads) for name, overloads in methods.items()}
+            extends = jdoc.get('extends')
+            # Interfaces can extend several interfaces, so `extends` might be a list
+            parents = (extends if isinstance(extends, list) else [extends]) + jdoc.get('implements', [])
+            # The superclass chain comes first so an implementation is preferred over the doc of the interface method
+            for parent in parents:
+                if parent:
+                    for name, overloads in self._resolved_methods(parent).items():
+                        # Overriding one signature doesn't hide the other overloads of the parent
+                        merged = resolved.setdefault(name, [])
+                        signatures = {_signature_key(m) for m in merged}
+                        merged.extend(m for m in overloads if _signature_key(m) not in signatures)
+            self._resolved_cache.put(class_name, resolved)
+        return resolved
+
+    def bean_properties(self, class_name) -> dict:
+        """`property -> getter` for the getters without parameters, which Jython also exposes as properties"""
+        properties = {}
+        for name, overloads in self._resolved_methods(class_name).items():
+            for prefix in ("get", "is"):
+                if name.startswith(prefix) and len(name) > len(prefix) and any(not m['params'] for m in overloads):
+                    prop = name[len(prefix):]
+                    properties[prop[:1].lower() + prop[1:]] = name
+        # getClass() is on every object and never interesting
+        properties.pop('class', None)
+        return properties
+
+    @property
+    def cache_stats(self) -> dict:
+        """Hit/miss/eviction counters of the caches and how many bridge calls the type identity cache saved"""
+        return {'classes': self._class_cache.stats, 'resolved': self._resolved_cache.stats,
+                'identity': dict(self._identity_cache.stats, bridge_calls_saved=self.bridge_calls_saved)}
+
+
+
+    def _identity_key(self, obj):
+        """Identifies the remote type of obj only from what the bridge already sent along with the handle"""
+        bridge_type = getattr(obj, '_bridge_type', None)
+        if bridge_type is None:
+            # Older bridges don't send the type, so only the exact same remote object can be recognized
+            return 'handle', obj._bridge_handle
+        if bridge_type == 'java.lang.Class':
+            # The repr of a class is "<type 'ghidra.app.util.cparser.C.CParserUtils'>"
+            return 'class', obj._bridge_repr
+        if "instancemethod" in bridge_type:
+            # The repr is "<bound method ghidra.X.foo of ghidra.X@45b958e0>", the part after " of " differs per instance
+            return 'method', str(obj._bridge_repr).split(" of ")[0]
+        return 'type', bridge_type
 
     def _get_class_and_method(self, obj):
+        key = self._identity_key(obj)
+        cached = self._identity_cache.get(key)
+        if cached is not None:
+            identity, bridge_calls = cached
+            self.bridge_calls_saved += bridge_calls
+            return identity
+        if key[0] == 'handle':
+            identity, bridge_calls = self._resolve_class_and_method(obj)
+        else:
+            identity, bridge_calls = self._identity_from_key(*key)
+            self.bridge_calls_saved += bridge_calls
+        self._identity_cache.put(key, (identity, bridge_calls))
+        return identity
+
+    def _identity_from_key(self, kind, value):
+        """Same result as _resolve_class_and_method, but only from the type/repr sent with the handle"""
+        if kind == 'class':
+            match = re.search("'(.*)'", value)
+            return (match.group(1) if match else None, None, True), 2
+        if kind == 'method':
+            tokens = value.split(" ")[2].split(".")
+            return (".".join(tokens[:-1]), tokens[-1], False), 1
+        return (value, None, False), 1
+
+    def _resolve_class_and_method(self, obj):
         """A collection of hacks and string extraction mostly taken from the original ghidradoc.py"""
         class_name = None
         method_name = None
         is_class = False
         t = str(obj._bridged_get_type())
+        bridge_calls = 1
 
         if "<type 'java.lang.Class'>" == t:
             # this is a Class that isn't instantiated yet
             # Get the string representation which should look like "<type 'ghidra.app.util.cparser.C.CParserUtils'>" again
             is_class = True
             t = str(obj)
+            bridge_calls += 1
 
         if "instancemethod" in t:
             # we have a callable. use obj._bridge_repr because the type info is useless
@@ -83,17 +290,18 @@ class DocHelper():
             if match is not None:
                 class_name = match.group(1)
 
-        return class_name, method_name, is_class
+        return (class_name, method_name, is_class), bridge_calls
 
 
     def get_doc(self, obj):
+        if not self.wait_ready(self.ready_timeout):
+            raise RuntimeError("The Ghidra API doc is not loaded (yet)")
         class_name, method_name, is_class = self._get_class_and_method(obj)
 
         if is_class:
             # A type/class was passed in. The most useful result to return is the doc of the constructor, but there might be multiple
             # TODO: If a class doesn't implement it's own constructor we might still have to search for an implementation
-            jdoc = self.get_jsondoc(class_name)
-            constructor_doc = [c for c in jdoc['methods'] if c['name'] == "<init>"]
+            constructor_doc = self._load_class(class_name)[1].get("<init>", [])
             if len(constructor_doc) > 1:
                 # TODO: Find a sensible solution here.
                 # For now this does also just returns the first constructor
@@ -101,20 +309,13 @@ class DocHelper():
             else:
                 return constructor_doc[0]
 
-        try_again = True
-        while try_again:
-            try_again = False
-            jdoc = self.get_jsondoc(class_name)
-            if method_name is None:
-                return jdoc
-            else:
-                method_doc = next((x for x in jdoc['methods'] if x['name'] == method_name), None)
-                if method_doc:
-                    return method_doc
-                else:
-                    if 'extends' in jdoc:
-                        class_name = jdoc['extends']
-                        try_again = True
+        if method_name is None:
+            return self.get_jsondoc(class_name)
+        else:
+            # Inherited methods are already merged into the resolved table, so this is a single dict lookup
+            method_doc = self._resolved_methods(class_name).get(method_name)
+            if method_doc:
+                return method_doc[0]
 
     def render_method(self, json_doc) -> str:
         jd = json_doc
@@ -138,10 +339,15 @@ class DocHelper():
     def patch_ghidra_bridge(self):
         from ghidra_bridge.bridge import BridgedCallable, BridgedObject
 
+        # Until the doc is loaded these degrade to what inspect expects for "nothing known"
         def __signature__(target_self):
+            if not self.wait_ready(self.ready_timeout):
+                return None
             return self.get_signature(target_self)
 
         def __annotations__(target_self):
+            if not self.wait_ready(self.ready_timeout):
+                return {}
             return self.get_annotations(target_self)
 
         def __doc__(target_self):
@@ -0,0 +1,206 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import zipfile
+
+from ipyghidra.cache import user_cache_dir
+
+logger = logging.getLogger('ipyghidra')
+
+# Bump this whenever the layout of the tables changes, so stale indexes are not picked up
+SCHEMA_VERSION = 2
+
+# The `doc` columns hold the JSON of the ZIP as it is, minus the parts that have rows of their own,
+# so get_jsondoc returns exactly the keys the source had. The other columns are there to query by.
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID;
+CREATE TABLE classes (
+    name TEXT PRIMARY KEY,
+    extends TEXT,
+    implements TEXT,
+    doc TEXT
+) WITHOUT ROWID;
+CREATE TABLE methods (
+    class TEXT,
+    position INTEGER,
+    name TEXT,
+    return_long TEXT,
+    return_short TEXT,
+    doc TEXT,
+    PRIMARY KEY (class, position)
+) WITHOUT ROWID;
+CREATE TABLE params (
+    class TEXT,
+    method INTEGER,
+    position INTEGER,
+    name TEXT,
+    type_long TEXT,
+    type_short TEXT,
+    doc TEXT,
+    PRIMARY KEY (class, method, position)
+) WITHOUT ROWID;
+"""
+
+
+def zip_digest(zip_path) -> str:
+    """SHA-256 of the ZIP. The result is remembered by path, size and mtime so it is only computed once per ZIP"""
+    stamps_path = os.path.join(user_cache_dir("doc_index"), "stamps.json")
+    try:
+        with open(stamps_path) as f:
+            stamps = json.load(f)
+    except (OSError, ValueError):
+        stamps = {}
+
+    st = os.stat(zip_path)
+    key = os.path.abspath(zip_path)
+    stamp = stamps.get(key)
+    if stamp and stamp[0] == st.st_size and stamp[1] == st.st_mtime_ns:
+        return stamp[2]
+
+    h = hashlib.sha256()
+    with open(zip_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    stamps[key] = [st.st_size, st.st_mtime_ns, h.hexdigest()]
+    tmp_path = f"{stamps_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(stamps, f)
+    os.replace(tmp_path, stamps_path)
+    return h.hexdigest()
+
+
+def index_path(zip_path, version=None) -> str:
+    """Location of the index for this ZIP and Ghidra version in the user cache dir"""
+    version = re.sub(r"[^\w.-]", "_", version or "unknown")
+    name = f"{version}-{zip_digest(zip_path)[:16]}-v{SCHEMA_VERSION}.sqlite"
+    return os.path.join(user_cache_dir("doc_index"), name)
+
+
+def build_index(zip_path, db_path, version=None):
+    """Parse every class JSON in the API ZIP once and write the result to a SQLite database at db_path"""
+    # Build into a temporary file and move it into place at the end,
+    # so concurrently starting kernels never see a half written index
+    tmp_path = f"{db_path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript(SCHEMA)
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ('schema', str(SCHEMA_VERSION)),
+            ('ghidra_version', version or "unknown"),
+            ('zip_sha256', zip_digest(zip_path)),
+        ])
+        with zipfile.ZipFile(zip_path, "r") as fzip:
+            for member in fzip.namelist():
+                if not (member.startswith("api/") and member.endswith(".json")):
+                    continue
+                class_name = member[len("api/"):-len(".json")].replace("/", ".")
+                try:
+                    with fzip.open(member) as f:
+                        rows = _class_rows(class_name, json.load(f))
+                except (ValueError, KeyError, TypeError, AttributeError) as e:
+                    # A broken doc of one class shouldn't cost the index of all the others
+                    logger.warning(f"Skipping the doc of {class_name} in the index: {e!r}")
+                    continue
+                _insert_class(conn, *rows)
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, db_path)
+
+
+def _class_rows(class_name, jdoc):
+    """The rows of a class doc, everything that can fail on malformed JSON happens here before anything is written"""
+    implements = list(jdoc.get('implements') or [])
+    extends = jdoc.get('extends')
+    if isinstance(extends, list):
+        # Interfaces can extend several other interfaces, those are handled like implemented ones
+        implements = extends[1:] + implements
+        extends = extends[0] if extends else None
+    # Methods and params are rows of their own, an empty list in their place only marks that the source had the key
+    doc = {k: ([] if k == 'methods' else v) for k, v in jdoc.items()}
+    class_row = (class_name, extends, ",".join(implements), json.dumps(doc))
+
+    method_rows = []
+    param_rows = []
+    for position, method in enumerate(jdoc.get('methods', [])):
+        ret = method.get('return') or {}
+        doc = {k: ([] if k == 'params' else v) for k, v in method.items()}
+        method_rows.append((class_name, position, method['name'], ret.get('type_long'), ret.get('type_short'),
+                            json.dumps(doc)))
+        param_rows.extend((class_name, position, i, p.get('name'), p.get('type_long'), p.get('type_short'),
+                           json.dumps(p))
+                          for i, p in enumerate(method.get('params', [])))
+    return class_row, method_rows, param_rows
+
+
+def _insert_class(conn, class_row, method_rows, param_rows):
+    conn.execute("INSERT OR REPLACE INTO classes VALUES (?, ?, ?, ?)", class_row)
+    conn.executemany("INSERT INTO methods VALUES (?, ?, ?, ?, ?, ?)", method_rows)
+    conn.executemany("INSERT INTO params VALUES (?, ?, ?, ?, ?, ?, ?)", param_rows)
+
+
+class DocIndex():
+    """Read only view on a prebuilt SQLite doc index, every lookup is a primary key query"""
+
+    def __init__(self, db_path):
+        self.path = db_path
+        self._conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_zip(cls, zip_path, version=None, rebuild=False) -> 'DocIndex':
+        """Open the index for this ZIP and Ghidra version, building it first if it doesn't exist yet"""
+        db_path = index_path(zip_path, version)
+        if rebuild or not os.path.exists(db_path):
+            logger.info(f"Building doc index {db_path}, this only happens once per Ghidra version")
+            build_index(zip_path, db_path, version)
+        return cls(db_path)
+
+    def get_supertypes(self, class_name):
+        """The `extends` class and the list of implemented interfaces"""
+        with self._lock:
+            row = self._conn.execute("SELECT extends, implements FROM classes WHERE name = ?", (class_name,)).fetchone()
+        if row is None:
+            raise KeyError(class_name)
+        return row[0], [i for i in row[1].split(",") if i]
+
+    def get_jsondoc(self, class_name):
+        """Reassembles the dict in the same shape as the JSON file in the ZIP"""
+        with self._lock:
+            row = self._conn.execute("SELECT doc FROM classes WHERE name = ?", (class_name,)).fetchone()
+            if row is None:
+                raise KeyError(class_name)
+            methods = self._conn.execute("SELECT doc FROM methods WHERE class = ? ORDER BY position",
+                                         (class_name,)).fetchall()
+            params = self._conn.execute("SELECT method, doc FROM params WHERE class = ? ORDER BY method, position",
+                                        (class_name,)).fetchall()
+
+        jdoc = json.loads(row[0])
+        if 'methods' in jdoc:
+            jdoc['methods'] = [json.loads(doc) for doc, in methods]
+        for position, doc in params:
+            jdoc['methods'][position]['params'].append(json.loads(doc))
+        return jdoc
+
+    def close(self):
+        self._conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="(Re)build the ipyghidra doc index for a GhidraAPI_javadoc.zip")
+    parser.add_argument("zip_path", help="Path to GhidraAPI_javadoc.zip")
+    parser.add_argument("--version", help="Ghidra version the ZIP belongs to, e.g. 9.1.2")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild even if an index already exists")
+    args = parser.parse_args()
+    print(DocIndex.for_zip(args.zip_path, args.version, rebuild=args.rebuild).path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+from ipyghidra.cache import LRUCache
+from ipyghidra.scope import free_variables, nested_free_variables
+
+
+class EvalPlan():
+    """Everything about a piece of ghidra_eval code that stays the same between runs"""
+
+    def __init__(self, code):
+        self.code = code
+        self.free_variables = free_variables(code)
+        # Read from comprehensions or lambdas, which only see them when they are globals
+        self.nested_variables = nested_free_variables(code)
+        # Handles to the code object compiled on each server. The handle keeps the code object alive on the server
+        self._remote_code = {}
+
+    def remote_code(self, bridge):
+        key = id(bridge)
+        if key not in self._remote_code:
+            self._remote_code[key] = bridge.remote_eval("compile(source, '<ghidra_eval>', 'eval')", source=self.code)
+        return self._remote_code[key]
+
+    def run(self, bridge, variables, as_globals=False):
+        """Evaluate on the server, after the first run only the handle of the compiled code and the variables are sent"""
+        if as_globals or self.nested_variables & set(variables):
+            # Generator expressions have their own scope and can't see the locals of eval,
+            # so the variables become globals in a copy of the server namespace instead
+            return bridge.remote_eval("eval(__ipyghidra_code, dict(globals(), **__ipyghidra_vars))",
+                                      __ipyghidra_code=self.remote_code(bridge), __ipyghidra_vars=variables)
+        # Same globals and locals as a plain remote_eval(code, **variables) would use
+        return bridge.remote_eval("eval(__ipyghidra_code, globals(), locals())",
+                                  __ipyghidra_code=self.remote_code(bridge), **variables)
+
+
+class EvalPlanCache(LRUCache):
+    """EvalPlans by source text, so re-running a cell neither parses it again nor sends the source"""
+
+    def __init__(self, max_size=256):
+        super(EvalPlanCache, self).__init__(max_size)
+
+    def plan(self, code) -> EvalPlan:
+        plan = self.get(code)
+        if plan is None:
+            plan = EvalPlan(code)
+            self.put(code, plan)
+        return plan
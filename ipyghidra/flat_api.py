@@ -0,0 +1,186 @@
+import ast
+import builtins
+import logging
+import pydoc
+
+from ghidra_bridge.bridge import BridgedObject, bridged_isinstance as _bridged_isinstance
+
+logger = logging.getLogger('ipyghidra')
+
+# Names in the remote __main__ that only exist because of the bridge server and must not shadow local modules
+EXCLUDED_REMOTE_NAMES = {"logging", "subprocess", "sys", "ghidra_bridge", "bridge", "GhidraBridgeServer"}
+
+# Variables that follow the GUI, so they are fetched again whenever a cell reads them
+CURRENT_VARIABLES = ("currentProgram", "currentAddress", "currentLocation", "currentSelection", "currentHighlight")
+
+# Fetches all current* values from the listing panel of the tool in a single round trip.
+# An empty selection or highlight is None, like in a GhidraScript
+CURRENT_VALUES_EXPR = """(lambda panel: (lambda location, selection, highlight: {
+    'currentProgram': panel.getProgram(),
+    'currentLocation': location,
+    'currentAddress': location.getAddress() if location else None,
+    'currentSelection': selection if selection is not None and not selection.isEmpty() else None,
+    'currentHighlight': highlight if highlight is not None and not highlight.isEmpty() else None,
+})(panel.getProgramLocation(), panel.getProgramSelection(), panel.getProgramHighlight()))(
+    state.getTool().getService(ghidra.app.services.CodeViewerService).getListingPanel())"""
+
+# A GhidraState of the tool for what the GUI shows right now, what ghidra_bridge's interactive getState fix returns.
+# The remote getState would return the state of when the server started and reset the GUI to it.
+CURRENT_STATE_EXPR = """(lambda tool, panel: ghidra.app.script.GhidraState(
+    tool, tool.getProject(), panel.getProgram(), panel.getProgramLocation(),
+    panel.getProgramSelection(), panel.getProgramHighlight()
+))(state.getTool(), state.getTool().getService(ghidra.app.services.CodeViewerService).getListingPanel())"""
+
+
+def local_builtin(function):
+    """Marks a local replacement of a builtin, the server has its own, so it is never sent there"""
+    function.server_has_builtin = True
+    return function
+
+
+@local_builtin
+def bridged_isinstance(obj, class_or_tuple):
+    """isinstance that also checks bridged objects against bridged types, e.g. ghidra.program.model.listing.Function"""
+    return _bridged_isinstance(obj, class_or_tuple)
+
+
+class LazyFlatAPI():
+    """
+    Provides the flat API in the user namespace without copying all of it there at startup.
+    Names are only resolved over the bridge the first time a cell uses them and are then kept in the namespace.
+    """
+
+    def __init__(self, bridge, namespace, interactive_mode=True):
+        self._bridge = bridge
+        self._namespace = namespace
+        self._main = None
+        self._names = None
+        # name -> value we put into the namespace, so values the user assigned are never overwritten
+        self._provided = {}
+        self._interactive_mode = interactive_mode
+        self._interactive_checked = False
+        # The current* values of the GUI as fetched for the running cell, see refresh
+        self._current_values = None
+
+    @property
+    def main(self):
+        if self._main is None:
+            self._main = self._bridge.remote_import("__main__")
+        return self._main
+
+    @property
+    def names(self) -> set:
+        """All names of the flat API, fetched in one round trip the first time they are needed"""
+        if self._names is None:
+            # remote_eval runs with the globals of the remote __main__, which is where the flat API lives
+            names = self._bridge.remote_eval("[n for n in globals().keys() if not n.startswith('_')]")
+            self._names = set(names) - EXCLUDED_REMOTE_NAMES
+        return self._names
+
+    @property
+    def interactive_mode(self) -> bool:
+        if self._interactive_mode and not self._interactive_checked:
+            # Against a headless Ghidra there is no tool, so the current* variables can't follow a GUI
+            self._interactive_checked = True
+            try:
+                self._interactive_mode = bool(self._bridge.remote_eval("state.getTool() is not None"))
+            except Exception:
+                self._interactive_mode = False
+            if not self._interactive_mode:
+                logger.warning("Disabling interactive mode - not supported when running against a headless Ghidra")
+        return self._interactive_mode
+
+    def _is_ours(self, name) -> bool:
+        return name not in self._namespace or self.provided(name)
+
+    def populate(self, names):
+        """Make sure all flat API names out of `names` are in the namespace, current* ones with their latest value"""
+        names = set(names)
+        current = [n for n in CURRENT_VARIABLES if n in names and self._is_ours(n)]
+        if current and self.interactive_mode:
+            self._provide_current(current)
+            names.difference_update(current)
+        if 'getState' in names and 'getState' not in self._namespace and self.interactive_mode:
+            self._provide('getState', self.get_state)
+
+        missing = [n for n in names if n not in self._namespace and n in self.names]
+        for name in missing:
+            self._provide(name, getattr(self.main, name))
+
+    def provide_builtins(self):
+        """
+        isinstance for bridged types and help showing Ghidra's help for bridged objects,
+        which ghidra_bridge puts into the namespace it loads the flat API into
+        """
+        if self._is_ours('isinstance'):
+            self._provide('isinstance', bridged_isinstance)
+        if self._is_ours('help'):
+            self._provide('help', self.help)
+
+    @local_builtin
+    def help(self, obj=None):
+        """Ghidra's help for a bridged object, or the GhidraScript API without one, the builtin help for the rest"""
+        if obj is not None and not isinstance(obj, BridgedObject):
+            builtins.help(obj)
+            return
+        pydoc.pager(self.main.GhidraBridgeServer.ghidra_help(obj))
+
+    def refresh(self, *args):
+        """
+        Registered for pre_run_cell, updates the current* values in the namespace to what the GUI shows now,
+        also those only functions of earlier cells read. One round trip, which the cell then shares
+        """
+        self._current_values = None
+        current = [n for n in CURRENT_VARIABLES if self.provided(n)]
+        if not current or not self.interactive_mode:
+            return
+        try:
+            self._provide_current(current)
+        except Exception as e:
+            # Never block running a cell, the values stay those of the previous one
+            logger.warning(f"Could not refresh the current* variables: {e}")
+
+    def forget_current(self, *args):
+        """Registered for post_run_cell, the next cell or call outside a cell fetches the current* values again"""
+        self._current_values = None
+
+    def _provide_current(self, names):
+        if self._current_values is None:
+            self._current_values = self._bridge.remote_eval(CURRENT_VALUES_EXPR)
+        for name in names:
+            self._provide(name, self._current_values[name])
+
+    def get_state(self):
+        """getState() in interactive mode, a GhidraState with the current* values of the GUI in one round trip"""
+        return self._bridge.remote_eval(CURRENT_STATE_EXPR)
+
+    def provided(self, name) -> bool:
+        """Whether the value of name in the namespace came from the flat API, not from the user"""
+        return name in self._provided and self._namespace.get(name) is self._provided[name]
+
+    def _provide(self, name, value):
+        self._provided[name] = value
+        self._namespace[name] = value
+
+    def complete(self, text):
+        """Custom IPython matcher so flat API names can be completed before they were ever used"""
+        if "." in text or not text:
+            return []
+        return sorted(n for n in self.names if n.startswith(text) and n not in self._namespace)
+
+
+class FlatAPILoader(ast.NodeTransformer):
+    """Registered in `ast_transformers`, resolves the flat API names a cell reads right before it runs"""
+
+    def __init__(self, flat_api: LazyFlatAPI):
+        super(FlatAPILoader, self).__init__()
+        self.flat_api = flat_api
+
+    def visit(self, node):
+        names = {n.id for n in ast.walk(node) if isinstance(n, ast.Name) and isinstance(n.ctx, ast.Load)}
+        try:
+            self.flat_api.populate(names)
+        except Exception as e:
+            # Never block running a cell, the worst case is a NameError for the flat API name
+            logger.warning(f"Could not resolve flat API names: {e}")
+        return node
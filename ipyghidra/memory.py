@@ -0,0 +1,129 @@
+import base64
+import glob
+import logging
+import mmap
+import os
+import re
+
+from ghidra_bridge.bridge import BridgedObject
+
+from ipyghidra.cache import user_cache_dir
+from ipyghidra.remote import remote_call
+
+logger = logging.getLogger('ipyghidra')
+
+
+class MemoryCache():
+    """
+    Reads program bytes in a few large transfers instead of byte by byte and keeps them in memory mapped files
+    under the user cache dir, keyed by program, version of its content and range. Saved content is keyed by the
+    file and the time it was saved, so it can be read from the cache in later sessions, unsaved changes only within
+    the session they were made in. Reading the same range again while the program is unchanged needs one tiny
+    round trip and no copy:
+
+        data = _memory.block(".text", as_type="numpy")  # uint8 array backed by the cache file
+    """
+
+    def __init__(self, bridge, namespace, chunk_size=16 * 1024 * 1024, flat_api=None):
+        self._bridge = bridge
+        self._namespace = namespace
+        self._flat_api = flat_api
+        # Bytes per request, every chunk is sent base64 encoded inside one JSON message
+        self.chunk_size = chunk_size
+        self.hits = 0
+        self.misses = 0
+
+    def _program(self, program):
+        if program is None:
+            if self._flat_api is not None:
+                self._flat_api.populate({'currentProgram'})
+            program = self._namespace.get('currentProgram')
+        if not isinstance(program, BridgedObject):
+            raise ValueError("No program, pass one or make sure currentProgram is set")
+        return program
+
+    def _call(self, call, **kwargs):
+        return remote_call(self._bridge, 'memory', call, timeout=600, **kwargs)
+
+    def read(self, address, length, program=None, as_type="memoryview"):
+        """
+        `length` bytes starting at address, a bridged Address or an offset in the default address space.
+        The result is shorter if the memory ends or has no bytes before that.
+        as_type is "memoryview" or "numpy" (both backed by the cache file without a copy) or "bytes"
+        """
+        program = self._program(program)
+        program_key, version, space, offset, start = self._call("location(p, a)", p=program, a=address)
+        return self._cached(program, program_key, version, space, offset, start, length, as_type)
+
+    def block(self, block, program=None, as_type="memoryview"):
+        """All bytes of a memory block, given as bridged MemoryBlock or by name, see read for as_type"""
+        program = self._program(program)
+        program_key, version, space, offset, start, size = self._call("block(p, b)", p=program, b=block)
+        return self._cached(program, program_key, version, space, offset, start, size, as_type)
+
+    @staticmethod
+    def _safe(name):
+        return re.sub(r"[^\w.-]", "_", name)
+
+    def _path(self, program_key, version, space, offset, length):
+        return os.path.join(user_cache_dir("memory", self._safe(program_key)),
+                            f"{self._safe(version)}-{self._safe(space)}-{offset:x}-{length:x}.bin")
+
+    def _cached(self, program, program_key, version, space, offset, start, length, as_type):
+        path = self._path(program_key, version, space, offset, length)
+        if os.path.exists(path):
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._fetch(program, start, length, path)
+            self._drop_outdated(program_key, version)
+        return self._load(path, as_type)
+
+    def _fetch(self, program, start, length, path):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            for position in range(0, length, self.chunk_size):
+                chunk = base64.b64decode(self._call("read(p, a, o, n)", p=program, a=start, o=position,
+                                                    n=min(self.chunk_size, length - position)))
+                f.write(chunk)
+                if len(chunk) < min(self.chunk_size, length - position):
+                    logger.warning(f"Memory ends {position + len(chunk)} bytes after the start, the result is shorter")
+                    break
+        os.replace(tmp_path, path)
+
+    def _drop_outdated(self, program_key, version):
+        """Ranges of older versions of the program are never read again"""
+        for path in glob.glob(os.path.join(user_cache_dir("memory", self._safe(program_key)), "*.bin")):
+            if not os.path.basename(path).startswith(f"{self._safe(version)}-"):
+                try:
+                    os.remove(path)
+                except OSError:
+                    # Still mapped on Windows, it goes with the next change of the program
+                    pass
+
+    @staticmethod
+    def _load(path, as_type):
+        with open(path, 'rb') as f:
+            if as_type == "bytes":
+                return f.read()
+            if os.fstat(f.fileno()).st_size == 0:
+                # An empty file can't be mapped
+                data = b''
+            else:
+                # The map stays valid after the file is closed, the view or array keeps it alive
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if as_type == "numpy":
+            import numpy
+            return numpy.frombuffer(data, dtype=numpy.uint8)
+        return memoryview(data)
+
+    def clear(self):
+        """Delete all cached ranges of all programs"""
+        for path in glob.glob(os.path.join(user_cache_dir("memory"), "**", "*.bin"), recursive=True):
+            os.remove(path)
+
+    @property
+    def stats(self) -> dict:
+        files = glob.glob(os.path.join(user_cache_dir("memory"), "**", "*.bin"), recursive=True)
+        return {'hits': self.hits, 'misses': self.misses, 'ranges': len(files),
+                'bytes': sum(os.path.getsize(f) for f in files), 'path': user_cache_dir("memory")}
@@ -0,0 +1,226 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from ghidra_bridge.bridge import BridgedObject
+
+from ipyghidra.cache import user_cache_dir
+from ipyghidra.remote import remote_call
+from ipyghidra.stream import RemoteStream
+
+logger = logging.getLogger('ipyghidra')
+
+# Bump this whenever the layout of the tables changes, so stale mirrors are not picked up
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS functions (
+    space TEXT,
+    entry INTEGER,
+    name TEXT,
+    namespace TEXT,
+    body_size INTEGER,
+    thunk INTEGER,
+    parameter_count INTEGER,
+    signature TEXT
+);
+CREATE TABLE IF NOT EXISTS symbols (
+    space TEXT,
+    address INTEGER,
+    name TEXT,
+    namespace TEXT,
+    type TEXT,
+    source TEXT,
+    is_primary INTEGER
+);
+CREATE TABLE IF NOT EXISTS xrefs (
+    from_space TEXT,
+    from_address INTEGER,
+    to_space TEXT,
+    to_address INTEGER,
+    type TEXT,
+    operand INTEGER,
+    is_primary INTEGER
+);
+CREATE TABLE IF NOT EXISTS data_types (
+    path TEXT,
+    name TEXT,
+    category TEXT,
+    length INTEGER
+);
+CREATE INDEX IF NOT EXISTS functions_entry ON functions (space, entry);
+CREATE INDEX IF NOT EXISTS functions_name ON functions (name);
+CREATE INDEX IF NOT EXISTS symbols_address ON symbols (space, address);
+CREATE INDEX IF NOT EXISTS symbols_name ON symbols (name);
+CREATE INDEX IF NOT EXISTS xrefs_from ON xrefs (from_space, from_address);
+CREATE INDEX IF NOT EXISTS xrefs_to ON xrefs (to_space, to_address);
+CREATE INDEX IF NOT EXISTS data_types_name ON data_types (name);
+"""
+
+# table -> columns holding the (space, address) a change range of the server applies to
+ADDRESS_COLUMNS = {
+    'functions': ("space", "entry"),
+    'symbols': ("space", "address"),
+    'xrefs': ("from_space", "from_address"),
+}
+TABLES = ('functions', 'symbols', 'xrefs', 'data_types')
+
+
+class ProgramMirror():
+    """
+    Functions, symbols, references and data types of a program in a local SQLite database, queried without the bridge:
+
+        _mirror.sql("SELECT name FROM functions WHERE parameter_count > ?", 3)
+        _mirror.df("SELECT to_address, count(*) AS n FROM xrefs GROUP BY to_address ORDER BY n DESC")
+
+    The tables are exported once, a listener on the server records what changes after that,
+    and every query first pulls only the rows in the changed address ranges.
+    The database stays in the user cache dir, a new session with the same saved program reuses it.
+    """
+
+    def __init__(self, bridge, namespace, flat_api=None, chunk_size=5000):
+        self._bridge = bridge
+        self._namespace = namespace
+        self._flat_api = flat_api
+        self._lock = threading.RLock()
+        self._conn = None
+        self._program = None
+        self._watch = None
+        self.path = None
+        # Rows per request of an export, every chunk is sent as one JSON string
+        self.chunk_size = chunk_size
+        self.syncs = 0
+        self.rows_synced = 0
+
+    def _call(self, call, **kwargs):
+        return remote_call(self._bridge, 'mirror', call, timeout=600, **kwargs)
+
+    @property
+    def attached(self) -> bool:
+        return self._conn is not None
+
+    def attach(self, program=None):
+        """Mirror program, by default currentProgram. Exports the tables unless the stored mirror is still current"""
+        if program is None:
+            if self._flat_api is not None:
+                self._flat_api.populate({'currentProgram'})
+            program = self._namespace.get('currentProgram')
+        if not isinstance(program, BridgedObject):
+            raise ValueError("No program, pass one or make sure currentProgram is set")
+        with self._lock:
+            self.detach()
+            # Watch before exporting, so nothing that changes during the export is missed
+            self._watch = self._call("watch(p)", p=program)
+            self._program = program
+            # The version of saved content is the same in every session, that of unsaved changes only in this one
+            program_key, version = self._call("version(p)", p=program)
+            name = re.sub(r"[^\w.-]", "_", program_key)
+            self.path = os.path.join(user_cache_dir("mirror"), f"{name}-v{SCHEMA_VERSION}.sqlite")
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.executescript(SCHEMA)
+            if self._meta('stamp') == version:
+                logger.info(f"Mirror {self.path} is up to date")
+                return
+            start = time.perf_counter()
+            with self._conn:
+                for table in TABLES:
+                    self._replace(table, self._export(table))
+                self._set_meta('stamp', version)
+            logger.info(f"Mirrored program into {self.path} in {time.perf_counter() - start:.1f}s")
+
+    def detach(self):
+        """Stop watching the program and close the database"""
+        with self._lock:
+            if self._watch is not None:
+                try:
+                    self._call("unwatch(w)", w=self._watch)
+                except Exception as e:
+                    # The server may already be gone, the listener went with it
+                    logger.debug(f"Mirror: unwatch failed: {e}")
+            if self._conn is not None:
+                self._conn.close()
+            self._conn, self._program, self._watch = None, None, None
+
+    def sync(self) -> int:
+        """Pull the rows that changed since the last sync in one round trip per changed table, returns their number"""
+        with self._lock:
+            if not self.attached:
+                self.attach()
+                return 0
+            full, ranges, version = self._call("changes(w)", w=self._watch)
+            if not full and not ranges:
+                return 0
+            count = 0
+            with self._conn:
+                for table in TABLES:
+                    if table in full:
+                        count += self._replace(table, self._export(table))
+                    elif ranges and table in ADDRESS_COLUMNS:
+                        count += self._replace_ranges(table, ranges, self._export(table, ranges))
+                self._set_meta('stamp', version)
+            self.syncs += 1
+            self.rows_synced += count
+            logger.debug(f"Mirror: synced {count} rows, {', '.join(full) or 'no'} tables completely "
+                         f"and {len(ranges)} ranges")
+            return count
+
+    def _export(self, table, ranges=None):
+        """Chunks of rows of table, fetched one at a time in the way RemoteStream does"""
+        chunks = self._call("export(p, t, r, n)", p=self._program, t=table, r=ranges, n=self.chunk_size)
+        for chunk in RemoteStream(self._bridge, chunks, chunk_size=1):
+            yield json.loads(chunk)
+
+    def _insert(self, table, chunks) -> int:
+        count = 0
+        for rows in chunks:
+            if rows:
+                self._conn.executemany(f"INSERT INTO {table} VALUES ({', '.join('?' * len(rows[0]))})", rows)
+            count += len(rows)
+        return count
+
+    def _replace(self, table, chunks) -> int:
+        self._conn.execute(f"DELETE FROM {table}")
+        return self._insert(table, chunks)
+
+    def _replace_ranges(self, table, ranges, chunks) -> int:
+        space_column, address_column = ADDRESS_COLUMNS[table]
+        self._conn.executemany(f"DELETE FROM {table} WHERE {space_column} = ? AND {address_column} BETWEEN ? AND ?",
+                               ranges)
+        return self._insert(table, chunks)
+
+    def _meta(self, key):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self._conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+
+    def sql(self, query, *params) -> list:
+        """Rows of a query on the mirror, after syncing it"""
+        with self._lock:
+            self.sync()
+            return self._conn.execute(query, params).fetchall()
+
+    def df(self, query, *params):
+        """Like sql, as a pandas DataFrame"""
+        try:
+            import pandas
+        except ImportError:
+            raise ImportError("df needs pandas, install it or use sql")
+        with self._lock:
+            self.sync()
+            return pandas.read_sql_query(query, self._conn, params=params)
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            if not self.attached:
+                return {'attached': False}
+            rows = {table: self._conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0] for table in TABLES}
+            return {'attached': True, 'path': self.path, 'rows': rows, 'syncs': self.syncs,
+                    'rows_synced': self.rows_synced}
@@ -0,0 +1,104 @@
+import ast
+import logging
+
+from ghidra_bridge.bridge import BridgedObject
+
+from ipyghidra.eval_plan import EvalPlanCache
+from ipyghidra.scope import shipped_variables
+
+logger = logging.getLogger('ipyghidra')
+
+OFFLOAD_NAME = "__ipyghidra_offload__"
+ITERABLE_NAME = "__ipyghidra_it"
+
+# What the result of the server is turned into locally
+_KINDS = {ast.ListComp: "list", ast.SetComp: "set", ast.DictComp: "dict", ast.GeneratorExp: "generator"}
+
+
+class ComprehensionOffloader(ast.NodeTransformer):
+    """
+    Opt-in IPython AST transformer that lets comprehensions over bridged iterables run on the server.
+    A comprehension on the top level of a cell like
+
+        [f.name for f in fm.getFunctions(True)]
+
+    is rewritten to
+
+        __ipyghidra_offload__(fm.getFunctions(True), "[f.name for f in __ipyghidra_it]",
+                              lambda __ipyghidra_it: [f.name for f in __ipyghidra_it], "list")
+
+    which evaluates the server code if the iterable turns out to be a BridgedObject and runs the lambda otherwise.
+    The lambda also runs if the server can't compile the code, e.g. an f-string for Jython 2.7.
+    Once the server started evaluating, errors are raised as they are: part of a remote iterator may be consumed
+    and side effects of the code may have happened, so running it again locally could give a different result.
+    Comprehensions inside functions, lambdas and classes are left alone, their free variables aren't in the namespace.
+    """
+
+    def __init__(self, bridge, namespace, plans: EvalPlanCache = None, flat_api=None):
+        super(ComprehensionOffloader, self).__init__()
+        self._bridge = bridge
+        self._namespace = namespace
+        self._plans = plans if plans is not None else EvalPlanCache()
+        self._flat_api = flat_api
+        self.enabled = False
+        self.offloaded = 0
+        self.fallbacks = 0
+
+    def visit(self, node):
+        if not self.enabled:
+            return node
+        return super(ComprehensionOffloader, self).visit(node)
+
+    def _skip(self, node):
+        return node
+
+    visit_FunctionDef = visit_AsyncFunctionDef = visit_Lambda = visit_ClassDef = _skip
+
+    def _rewrite(self, node):
+        if any(isinstance(n, (ast.Await, ast.Yield, ast.YieldFrom)) for n in ast.walk(node)):
+            return node
+        iterable = node.generators[0].iter
+        node.generators[0].iter = ast.Name(id=ITERABLE_NAME, ctx=ast.Load())
+        if isinstance(node, (ast.GeneratorExp, ast.SetComp)):
+            # A generator would stay on the server and every item would be a round trip again,
+            # a set can't be serialized and would come back as a handle. The server builds a list of both.
+            server_node = ast.ListComp(elt=node.elt, generators=node.generators)
+        else:
+            server_node = node
+        local = ast.Lambda(
+            args=ast.arguments(posonlyargs=[], args=[ast.arg(arg=ITERABLE_NAME)], vararg=None, kwonlyargs=[],
+                               kw_defaults=[], kwarg=None, defaults=[]),
+            body=node)
+        call = ast.Call(func=ast.Name(id=OFFLOAD_NAME, ctx=ast.Load()),
+                        args=[iterable, ast.Constant(ast.unparse(server_node)), local,
+                              ast.Constant(_KINDS[type(node)])],
+                        keywords=[])
+        return ast.copy_location(call, node)
+
+    visit_ListComp = visit_SetComp = visit_DictComp = visit_GeneratorExp = _rewrite
+
+    def __call__(self, iterable, code, local, kind):
+        """Runtime half of the rewrite, injected into the namespace as __ipyghidra_offload__"""
+        if not isinstance(iterable, BridgedObject):
+            return local(iterable)
+        try:
+            plan = self._plans.plan(code)
+            # Compiling is a request of its own, so code the server rejects never touched the iterable
+            plan.remote_code(self._bridge)
+        except Exception as e:
+            logger.debug(f"Can't offload `{code}`, running it locally instead: {e}")
+            self.fallbacks += 1
+            return local(iterable)
+        names = plan.free_variables - {ITERABLE_NAME}
+        if self._flat_api is not None:
+            self._flat_api.populate(names)
+        variables = shipped_variables(names, self._namespace)
+        variables[ITERABLE_NAME] = iterable
+        # As globals, because nested comprehensions and generators can't see the locals of eval
+        result = plan.run(self._bridge, variables, as_globals=True)
+        self.offloaded += 1
+        if kind == "generator":
+            return iter(result)
+        if kind == "set":
+            return set(result)
+        return result
@@ -0,0 +1,48 @@
+import re
+
+from IPython.core.error import UsageError
+
+_OPTION = re.compile(r"--([\w-]+)(?:\s+|$)")
+_VALUE = re.compile(r"(\S+)(?:\s+|$)")
+_ASSIGNMENT = re.compile(r"^\s*([A-Za-z_]\w*)\s*=(?!=)\s*(.+?)\s*$")
+
+
+def split_options(line, flags=(), valued=()):
+    """
+    Peel the leading `--flag` and `--name value` options off a magic line and return them with the rest of the line.
+    Unlike argument parsing with shlex, the rest is returned untouched, so quotes and whitespace in code survive.
+    `--stream --chunk 5000 [f.name for f in fm.getFunctions(True)]` -> ({'stream': True, 'chunk': '5000'}, '[f.name ...]')
+    """
+    options = {}
+    rest = line.lstrip()
+    while True:
+        match = _OPTION.match(rest)
+        if match is None:
+            return options, rest
+        name = match.group(1)
+        rest = rest[match.end():]
+        if name in flags:
+            options[name] = True
+        elif name in valued:
+            value = _VALUE.match(rest)
+            if value is None:
+                raise UsageError(f"Option --{name} needs a value")
+            options[name] = value.group(1)
+            rest = rest[value.end():]
+        else:
+            raise UsageError(f"Unknown option --{name}")
+
+
+def parse_assignments(cell) -> dict:
+    """`name = expression` definitions, one per line, blank lines and comments are skipped"""
+    assignments = {}
+    for line in cell.splitlines():
+        if not line.strip() or line.strip().startswith("#"):
+            continue
+        match = _ASSIGNMENT.match(line)
+        if match is None:
+            raise UsageError(f"Expected a definition `name = expression`, got: {line.strip()}")
+        assignments[match.group(1)] = match.group(2)
+    if not assignments:
+        raise UsageError("Nothing defined")
+    return assignments
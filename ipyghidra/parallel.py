@@ -0,0 +1,130 @@
+import queue
+import threading
+
+import ghidra_bridge
+
+from ipyghidra.eval_plan import EvalPlanCache
+from ipyghidra.remote import remote_module
+from ipyghidra.scope import shipped_variables
+
+MODULE_NAME = "__ipyghidra_pmap"
+
+
+class BridgePool():
+    """
+    Extra connections to the server the main bridge is connected to, opened on first use and kept open.
+    The server handles every connection on threads of its own, so work sent over several of them runs in parallel.
+    Handles are per connection, bridged objects a pool connection returned only work with that same connection.
+    """
+
+    def __init__(self, bridge, size=4, response_timeout=600):
+        conn = getattr(bridge, 'client', bridge)
+        self.host = conn.host
+        self.port = conn.port
+        self.size = size
+        # A chunk of decompiling easily takes longer than the default timeout of the bridge
+        self.response_timeout = response_timeout
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def connections(self, count=None) -> list:
+        count = count or self.size
+        with self._lock:
+            while len(self._connections) < count:
+                self._connections.append(ghidra_bridge.GhidraBridge(
+                    connect_to_host=self.host, connect_to_port=self.port, response_timeout=self.response_timeout).bridge)
+            return self._connections[:count]
+
+
+class GhidraMapError(Exception):
+    """An item the mapped expression failed for, with the message of the exception on the server"""
+
+    def __init__(self, index, message):
+        super(GhidraMapError, self).__init__(f"Item {index}: {message}")
+        self.index = index
+
+
+def _chunks(pool, job, count, workers, chunk_size, progress):
+    """Yields (start, [(ok, value)]) as the workers finish chunks, every worker pulls the next chunk when it is done"""
+    results = queue.Queue()
+    starts = iter(range(0, count, chunk_size))
+    starts_lock = threading.Lock()
+    stop = threading.Event()
+
+    def work(conn):
+        try:
+            module = remote_module(conn, 'pmap')
+            while not stop.is_set():
+                with starts_lock:
+                    start = next(starts, None)
+                if start is None:
+                    break
+                chunk = conn.remote_eval(f"{MODULE_NAME}.run_chunk(job, start, stop)", timeout_override=pool.response_timeout,
+                                         job=job, start=start, stop=min(start + chunk_size, count),
+                                         **{MODULE_NAME: module})
+                results.put((start, chunk, None))
+        except Exception as e:
+            results.put((None, None, e))
+        finally:
+            results.put(None)
+
+    connections = pool.connections(workers)
+    for conn in connections:
+        threading.Thread(target=work, args=(conn,), name="ipyghidra-map", daemon=True).start()
+    done = 0
+    running = len(connections)
+    try:
+        while running:
+            result = results.get()
+            if result is None:
+                running -= 1
+                continue
+            start, chunk, error = result
+            if error is not None:
+                raise error
+            done += len(chunk)
+            if progress is not None:
+                progress(done, count)
+            yield start, chunk
+    finally:
+        # Workers that are still running finish their current chunk and stop
+        stop.set()
+
+
+def ghidra_map(bridge, pool: BridgePool, iterable, expression, namespace, item_name="x", workers=None, chunk_size=16,
+               ordered=True, keep_errors=False, progress=None, plans: EvalPlanCache = None, flat_api=None):
+    """
+    Evaluate expression for every item `item_name` of the server side iterable, spread over `workers` connections
+    of the pool. The items are collected on the server first, the workers then pull chunks of them.
+    Returns the results as list in the order of the items, or without `ordered` a generator of (index, result)
+    as chunks finish. Failed items raise GhidraMapError, with keep_errors they are returned as one instead.
+    progress is called with (done, total) after every chunk.
+    """
+    plans = plans if plans is not None else EvalPlanCache()
+    plan = plans.plan(f"{MODULE_NAME}.create(({iterable}), lambda {item_name}: ({expression}))")
+    names = plan.free_variables - {MODULE_NAME}
+    if flat_api is not None:
+        flat_api.populate(names)
+    variables = shipped_variables(names, namespace)
+    variables[MODULE_NAME] = remote_module(bridge, 'pmap')
+    # As globals, so the lambda sees the variables when it runs on the worker threads
+    job, count = plan.run(bridge, variables, as_globals=True)
+
+    def results():
+        try:
+            for start, chunk in _chunks(pool, job, count, workers, chunk_size, progress):
+                for index, (ok, value) in enumerate(chunk, start):
+                    if not ok:
+                        value = GhidraMapError(index, value)
+                        if not keep_errors:
+                            raise value
+                    yield index, value
+        finally:
+            bridge.remote_eval(f"{MODULE_NAME}.close(job)", job=job, **{MODULE_NAME: variables[MODULE_NAME]})
+
+    if not ordered:
+        return results()
+    ordered_results = [None] * count
+    for index, value in results():
+        ordered_results[index] = value
+    return ordered_results
@@ -0,0 +1,199 @@
+import functools
+import logging
+import threading
+from contextlib import contextmanager
+
+from ghidra_bridge.bridge import BridgeClient, BridgedCallable, BridgedIterator, BridgedObject
+
+from ipyghidra.remote import remote_module
+
+logger = logging.getLogger('ipyghidra')
+
+
+class Prefetcher():
+    """
+    Reads many attributes of many bridged objects in a single request and keeps the values on the proxies,
+    so showing a Function doesn't cost a round trip for each of `name`, `entryPoint`, `body`, ...:
+
+        functions = %ghidra_eval list(currentProgram.functionManager.getFunctions(True))
+        _prefetcher.prefetch(functions, ["name", "entryPoint", "thunk"])
+
+    Without names the bean getters the API doc lists for the class of each object are used, or the names set
+    in `properties` for that class. With `auto` the first read of such a property prefetches all of them.
+    Values are dropped by `invalidate()`, when a cell starts after currentProgram changed, per object when an
+    attribute of it is set, and all at once when a bridged method is called or code is evaluated remotely, since
+    that may have changed any object (`f.setName(...)` followed by `f.name` reads the new name). Stepping a
+    bridged iterator doesn't drop them.
+
+    Changes the client can't see are not noticed until the next cell starts: those made from the Ghidra GUI,
+    a script or another client while a cell runs, and those made by operators of bridged objects
+    (`obj[key] = value`, `obj += 1`).
+    """
+
+    def __init__(self, bridge, namespace, doc_helper=None):
+        self._bridge = bridge
+        self._namespace = namespace
+        self._doc_helper = doc_helper
+        self._remote_prefetch = None
+        # Values are only valid for the generation they were fetched in, so invalidating everything is O(1)
+        self.generation = 0
+        self._modification_number = None
+        self._has_values = False
+        # Counts per thread how deep it is in quiet(), other threads keep invalidating meanwhile
+        self._local = threading.local()
+        # class name -> property names to prefetch instead of all bean getters
+        self.properties = {}
+        self._bean_properties = {}
+        self.auto = False
+        self.requests = 0
+        self.hits = 0
+
+    def names_for(self, obj):
+        """The property names prefetched for obj when none are given"""
+        if self._doc_helper is None:
+            return []
+        class_name, method_name, is_class = self._doc_helper._get_class_and_method(obj)
+        # Bound methods and classes have no bean properties of their own
+        if class_name is None or method_name is not None or is_class:
+            return []
+        if class_name in self.properties:
+            return self.properties[class_name]
+        if class_name not in self._bean_properties:
+            if not self._doc_helper.wait_ready(0):
+                return []
+            self._bean_properties[class_name] = sorted(self._doc_helper.bean_properties(class_name))
+        return self._bean_properties[class_name]
+
+    def prefetch(self, objects, names=None):
+        """Fetch names (default: see names_for) of one bridged object or a list of them in one request"""
+        single = isinstance(objects, BridgedObject)
+        objects = [objects] if single else list(objects)
+        groups = {}
+        for obj in objects:
+            groups.setdefault(tuple(names) if names is not None else tuple(self.names_for(obj)), []).append(obj)
+        groups = [(group_objects, list(group_names)) for group_names, group_objects in groups.items() if group_names]
+        if not groups:
+            return objects[0] if single else objects
+        if self._remote_prefetch is None:
+            self._remote_prefetch = remote_module(self._bridge, 'prefetch').prefetch
+        program = self._namespace.get('currentProgram')
+        with self.quiet():
+            number, results = self._remote_prefetch(groups, program if isinstance(program, BridgedObject) else None)
+        self.requests += 1
+        if number != self._modification_number:
+            # Values from before the program changed must not be mixed with the new ones
+            self.invalidate()
+            self._modification_number = number
+        for (group_objects, _), values in zip(groups, results):
+            for obj, obj_values in zip(group_objects, values):
+                obj._bridge_prefetched = (self.generation, dict(obj_values))
+        self._has_values = True
+        return objects[0] if single else objects
+
+    def invalidate(self, obj=None):
+        """Drop the prefetched values of obj, or of all objects"""
+        if obj is not None:
+            obj._bridge_prefetched = None
+            return
+        self.generation += 1
+        self._has_values = False
+
+    def check_modified(self, *args):
+        """Registered for pre_run_cell, drops all values once currentProgram has changed since they were fetched"""
+        program = self._namespace.get('currentProgram')
+        # Only costs a round trip while there are values that could be outdated
+        if not self._has_values or self._modification_number is None or not isinstance(program, BridgedObject):
+            return
+        try:
+            with self.quiet():
+                number = self._bridge.remote_eval("p.getModificationNumber()", p=program)
+        except Exception as e:
+            logger.debug(f"Could not check the modification number: {e}")
+            number = None
+        if number != self._modification_number:
+            self.invalidate()
+            self._modification_number = number
+
+    @contextmanager
+    def quiet(self):
+        """Requests of the current thread inside this only read, they keep the prefetched values"""
+        self._local.depth = getattr(self._local, 'depth', 0) + 1
+        try:
+            yield
+        finally:
+            self._local.depth -= 1
+
+    def quietly(self, function):
+        """function, running quiet()"""
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with self.quiet():
+                return function(*args, **kwargs)
+        return wrapper
+
+    def _remote_change(self):
+        """Called before a request that may change any object on the server"""
+        if self._has_values and not getattr(self._local, 'depth', 0):
+            self.invalidate()
+
+    def _cached(self, obj, name):
+        prefetched = obj._bridge_prefetched
+        if prefetched is not None and prefetched[0] == self.generation and name in prefetched[1]:
+            self.hits += 1
+            return True, prefetched[1][name]
+        return False, None
+
+    @property
+    def stats(self) -> dict:
+        return {'auto': self.auto, 'requests': self.requests, 'hits': self.hits, 'generation': self.generation}
+
+    def patch_ghidra_bridge(self):
+        original_get = BridgedObject._bridged_get
+        original_set = BridgedObject._bridged_set
+        original_call = BridgedCallable.__call__
+        original_next = BridgedIterator.__next__
+        original_eval = BridgeClient.remote_eval
+        original_exec = BridgeClient.remote_exec
+        # Attributes starting with _bridge are always local, so this never causes bridge traffic
+        BridgedObject._bridge_prefetched = None
+
+        def _bridged_get(target_self, name):
+            found, value = self._cached(target_self, name)
+            if found:
+                return value
+            prefetched = target_self._bridge_prefetched
+            stale = prefetched is None or prefetched[0] != self.generation
+            if self.auto and stale and name in self.names_for(target_self):
+                self.prefetch(target_self)
+                found, value = self._cached(target_self, name)
+                if found:
+                    return value
+            return original_get(target_self, name)
+
+        def _bridged_set(target_self, name, value):
+            self.invalidate(target_self)
+            return original_set(target_self, name, value)
+
+        def __call__(target_self, *args, **kwargs):
+            self._remote_change()
+            return original_call(target_self, *args, **kwargs)
+
+        def __next__(target_self):
+            # Calls the bridged next method, but moving an iterator changes no object of the program
+            with self.quiet():
+                return original_next(target_self)
+
+        def remote_eval(client_self, *args, **kwargs):
+            self._remote_change()
+            return original_eval(client_self, *args, **kwargs)
+
+        def remote_exec(client_self, *args, **kwargs):
+            self._remote_change()
+            return original_exec(client_self, *args, **kwargs)
+
+        setattr(BridgedObject, '_bridged_get', _bridged_get)
+        setattr(BridgedObject, '_bridged_set', _bridged_set)
+        setattr(BridgedCallable, '__call__', __call__)
+        setattr(BridgedIterator, '__next__', __next__)
+        setattr(BridgeClient, 'remote_eval', remote_eval)
+        setattr(BridgeClient, 'remote_exec', remote_exec)
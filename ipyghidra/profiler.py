@@ -0,0 +1,157 @@
+import json
+import linecache
+import os
+import sys
+import threading
+import time
+from collections import namedtuple, defaultdict
+
+from ghidra_bridge.bridge import CMD, ARGS, HANDLE, NAME, TYPE, VALUE, EXPR
+
+# One request to the server. start is relative to when profiling started, both times are in seconds.
+# line is (cell filename, line number) of the innermost cell frame that caused the request, None if there is none
+# thread is the name of the thread that sent it, thread_id its identifier
+Request = namedtuple("Request", "label command start duration sent received line thread thread_id")
+
+
+class BridgeProfiler():
+    """
+    Records every request a bridge connection sends while active, with latency, payload sizes,
+    the remote method it was for and the cell line that caused it:
+
+        with BridgeProfiler(_bridge.bridge) as profiler:
+            ...
+        print(profiler.report())
+
+    Sizes are those of the JSON payload without the envelope around it.
+    """
+
+    def __init__(self, bridge):
+        # BridgedObjects talk to the connection directly, not to the BridgeClient
+        self._conn = getattr(bridge, 'client', bridge)
+        self.requests = []
+        self.started = None
+        self.finished = None
+        # handle -> name or type, learned from the results, so calls to a bridged method can be labeled with its name
+        self._handle_names = {}
+        self._cell_files = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        # Another profiler may have patched the connection already, it gets its send_cmd back on exit
+        self._previous = self._conn.__dict__.get('send_cmd')
+        original = self._conn.send_cmd
+
+        def send_cmd(command_dict, get_response=True, timeout_override=None):
+            start = time.perf_counter()
+            result = original(command_dict, get_response, timeout_override)
+            duration = time.perf_counter() - start
+            self._record(command_dict, result, start - self.started, duration)
+            return result
+
+        # Patching the instance only affects this connection, the class stays untouched
+        self._conn.send_cmd = send_cmd
+        return self
+
+    def __exit__(self, *exc_info):
+        self.finished = time.perf_counter()
+        if self._previous is not None:
+            self._conn.send_cmd = self._previous
+        else:
+            # Removing the instance attribute makes the class method visible again
+            del self._conn.send_cmd
+
+    def _cell_line(self):
+        """(filename, line) of the innermost frame running code of a notebook cell"""
+        frame = sys._getframe(2)
+        while frame is not None:
+            filename = frame.f_code.co_filename
+            is_cell = self._cell_files.get(filename)
+            if is_cell is None:
+                # IPython puts the source of cells into the linecache, there is no file for them
+                is_cell = self._cell_files[filename] = filename in linecache.cache and not os.path.exists(filename)
+            if is_cell:
+                return filename, frame.f_lineno
+            frame = frame.f_back
+        return None
+
+    def _label(self, command, args):
+        if command == "get":
+            return f".{args.get(NAME)}"
+        if command == "call":
+            name = self._handle_names.get(args.get(HANDLE))
+            if name in (None, "__call__"):
+                # Methods of Jython objects are called through __call__ of their type, with the method as argument
+                first = (args.get(ARGS) or {}).get(VALUE) or [None]
+                if isinstance(first[0], dict) and first[0].get(TYPE) == "bridged":
+                    name = self._handle_names.get(first[0].get(VALUE), name)
+            return f"{name or '?'}()"
+        if command == "eval":
+            expression = " ".join(str(args.get(EXPR, "")).split())
+            return f"eval {expression[:60]}"
+        return command
+
+    def _record(self, command_dict, result, start, duration):
+        command = command_dict.get(CMD)
+        args = command_dict.get(ARGS) or {}
+        label = self._label(command, args)
+        sent = len(json.dumps(command_dict))
+        received = len(json.dumps(result)) if result is not None else 0
+        line = self._cell_line()
+        thread = threading.current_thread()
+        with self._lock:
+            if isinstance(result, dict) and isinstance(result.get(VALUE), dict) and HANDLE in result[VALUE]:
+                self._handle_names[result[VALUE][HANDLE]] = args.get(NAME) or result[VALUE].get(TYPE, "?")
+            self.requests.append(Request(label, command, start, duration, sent, received, line,
+                                         thread.name, thread.ident))
+
+    @staticmethod
+    def _summarize(requests, key):
+        groups = defaultdict(lambda: [0, 0.0, 0, 0])
+        for request in requests:
+            group = groups[key(request)]
+            group[0] += 1
+            group[1] += request.duration
+            group[2] += request.sent
+            group[3] += request.received
+        return sorted(groups.items(), key=lambda item: item[1][1], reverse=True)
+
+    def report(self, top=15) -> str:
+        with self._lock:
+            requests = list(self.requests)
+        total = (self.finished or time.perf_counter()) - self.started
+        lines = [f"{len(requests)} requests, {sum(r.duration for r in requests) * 1000:.1f}ms on the bridge "
+                 f"of {total * 1000:.1f}ms, sent {sum(r.sent for r in requests)} bytes, "
+                 f"received {sum(r.received for r in requests)} bytes"]
+        header = f"{'Requests':>8} {'Time':>10} {'Sent':>9} {'Received':>9}  "
+
+        lines += ["", header + "Line"]
+        for line, (count, duration, sent, received) in self._summarize(requests, lambda r: r.line)[:top]:
+            source = f"{line[1]:>4}: {linecache.getline(*line).strip()}" if line else "(outside the cell)"
+            lines.append(f"{count:>8} {duration * 1000:>8.1f}ms {sent:>9} {received:>9}  {source}")
+
+        lines += ["", header + "Remote"]
+        for label, (count, duration, sent, received) in self._summarize(requests, lambda r: r.label)[:top]:
+            lines.append(f"{count:>8} {duration * 1000:>8.1f}ms {sent:>9} {received:>9}  {label}")
+        return "\n".join(lines)
+
+    def chrome_trace(self) -> dict:
+        """The requests in the Chrome trace event format, for chrome://tracing or https://ui.perfetto.dev"""
+        with self._lock:
+            requests = list(self.requests)
+        # Trace viewers want numeric thread ids, the names come as metadata events
+        events = [{'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': thread_id, 'args': {'name': name}}
+                  for thread_id, name in sorted({(r.thread_id, r.thread) for r in requests})]
+        for request in requests:
+            events.append({
+                'name': request.label, 'cat': request.command, 'ph': 'X', 'pid': 1, 'tid': request.thread_id,
+                'ts': request.start * 1e6, 'dur': request.duration * 1e6,
+                'args': {'sent': request.sent, 'received': request.received,
+                         'line': request.line[1] if request.line else None},
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def save_trace(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
@@ -0,0 +1,38 @@
+import hashlib
+import pkgutil
+
+# Creates a module on the server from source, unless a module with that name was already installed by another
+# session. Written as a single expression, because remote_eval is the only primitive every bridge version has.
+# `type(__import__('os'))` is the module type, type(sys) isn't one on Jython.
+_INSTALL_EXPR = """(lambda sys, name, source: sys.modules.get(name) or (lambda module: (
+    eval(compile(source, name, 'exec'), module.__dict__),
+    sys.modules.__setitem__(name, module),
+    module)[2])(type(__import__('os'))(name)))(__import__('sys'), name, source)"""
+
+_installed = {}
+
+
+def remote_module(bridge, name):
+    """
+    Handle to the helper module `ipyghidra/server/<name>.py` on the server, installed there on first use.
+    The module name contains the hash of the source, so a changed helper never collides with an old one
+    that is still loaded in a long running Ghidra.
+    """
+    key = (id(bridge), name)
+    if key not in _installed:
+        source = pkgutil.get_data('ipyghidra', f"server/{name}.py").decode('utf-8')
+        module_name = f"_ipyghidra_{name}_{hashlib.sha1(source.encode('utf-8')).hexdigest()[:10]}"
+        _installed[key] = bridge.remote_eval(_INSTALL_EXPR, name=module_name, source=source)
+    return _installed[key]
+
+
+def remote_call(bridge, name, call, timeout=None, **kwargs):
+    """
+    Evaluate `call`, e.g. "read(p, a)", on the helper module `name` with kwargs as variables.
+    One round trip, instead of one to get the function off the module and one to call it.
+    """
+    variable = f"__ipyghidra_{name}"
+    kwargs[variable] = remote_module(bridge, name)
+    if timeout is not None:
+        return bridge.remote_eval(f"{variable}.{call}", timeout_override=timeout, **kwargs)
+    return bridge.remote_eval(f"{variable}.{call}", **kwargs)
@@ -0,0 +1,75 @@
+from ghidra_bridge.bridge import BridgedObject
+
+from ipyghidra.cache import LRUCache, approx_size
+
+# Every fetch of a remote object creates a new handle, so bridged variables are identified by their id() on the server.
+# The first value is the program, its modification number changes with every change to it
+STAMP_EXPR = "[__ipyghidra_values[0].getModificationNumber()] + list(map(id, __ipyghidra_values))"
+
+_MISSING = object()
+
+
+def _copy(value):
+    """
+    value with new containers all the way down, so changing a result never changes the cached one.
+    Everything else is shared: strings and numbers are immutable, a BridgedObject is only a handle.
+    """
+    if isinstance(value, list):
+        return [_copy(v) for v in value]
+    if isinstance(value, tuple):
+        return tuple(_copy(v) for v in value)
+    if isinstance(value, dict):
+        return {k: _copy(v) for k, v in value.items()}
+    if isinstance(value, (set, bytearray)):
+        return type(value)(value)
+    return value
+
+
+class ResultCache(LRUCache):
+    """
+    Results of ghidra_eval by code, identity of the variables sent along and modification number of currentProgram,
+    so re-running a read only query on an unchanged program costs one tiny round trip instead of the whole query.
+    Bounded by the approximate size of the results, a bridged result only counts as its local proxy.
+    Results go in and out as copies, which is still a local operation and far cheaper than the query.
+    """
+
+    def __init__(self, max_size=64 * 1024 * 1024):
+        super(ResultCache, self).__init__(max_size, sizeof=approx_size)
+        self.enabled = False
+
+    def key(self, bridge, code, variables, program):
+        """The key for running code with variables against the current state of program, None if it can't be cached"""
+        if not isinstance(program, BridgedObject):
+            # Without a program there is no modification number that tells when the result is outdated
+            return None
+        local = []
+        bridged_names = []
+        bridged_values = [program]
+        for name, value in sorted(variables.items()):
+            if isinstance(value, BridgedObject):
+                bridged_names.append(name)
+                bridged_values.append(value)
+                continue
+            try:
+                hash(value)
+            except TypeError:
+                # Mutable local values like lists could change without the key changing
+                return None
+            # The type name keeps 1, 1.0 and True apart
+            local.append((name, type(value).__name__, value))
+        stamp = bridge.remote_eval(STAMP_EXPR, __ipyghidra_values=bridged_values)
+        return code, tuple(local), tuple(bridged_names), tuple(stamp)
+
+    def get(self, key, default=None):
+        value = super(ResultCache, self).get(key, _MISSING)
+        return default if value is _MISSING else _copy(value)
+
+    def put(self, key, value):
+        super(ResultCache, self).put(key, _copy(value))
+
+    def lookup(self, key):
+        """(True, result) for a cached result, (False, None) otherwise. Results can be None, so get() can't tell"""
+        result = self.get(key, _MISSING)
+        if result is _MISSING:
+            return False, None
+        return True, result
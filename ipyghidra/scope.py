@@ -0,0 +1,71 @@
+import builtins
+import json
+import symtable
+
+from ghidra_bridge.bridge import BridgedObject
+
+from ipyghidra.define import RemoteFunction
+
+
+def free_variables(code) -> set:
+    """
+    Names the code reads from the enclosing namespace.
+    Names that are bound by the code itself (assignment targets, comprehension targets, lambda parameters, imports)
+    are not included, because their value on the client is never used.
+    """
+    table = symtable.symtable(code, "<ghidra_eval>", "exec")
+    symbols = table.get_symbols()
+    bound = {s.get_name() for s in symbols if s.is_assigned() or s.is_imported()}
+    free = {s.get_name() for s in symbols if s.is_referenced()}
+    return (free | _nested_reads(table)) - bound
+
+
+def nested_free_variables(code) -> set:
+    """The free variables of code that are read inside a comprehension or lambda, see free_variables"""
+    table = symtable.symtable(code, "<ghidra_eval>", "exec")
+    bound = {s.get_name() for s in table.get_symbols() if s.is_assigned() or s.is_imported()}
+    return _nested_reads(table) - bound
+
+
+def _nested_reads(table) -> set:
+    # Nested scopes (comprehensions, lambdas) read the namespace through globals, everything else in them is local
+    free = set()
+    children = list(table.get_children())
+    while children:
+        child = children.pop()
+        children.extend(child.get_children())
+        free.update(s.get_name() for s in child.get_symbols() if s.is_global() and s.is_referenced())
+    return free
+
+
+def shipped_variables(names, namespace) -> dict:
+    """The values out of namespace for the free variables `names` that the code needs on the server"""
+    variables = {}
+    for name in names:
+        if name in namespace:
+            value = namespace[name]
+            # The server has its own builtins, no need to send ours or the local replacements the flat API provides
+            if hasattr(builtins, name) and (value is getattr(builtins, name) or (
+                    not isinstance(value, BridgedObject) and getattr(value, 'server_has_builtin', False))):
+                continue
+            # Functions of %%ghidra_define go by reference to the server side function, not as callback to the stub
+            variables[name] = value.remote if isinstance(value, RemoteFunction) else value
+    return variables
+
+
+def wire_size(value) -> int:
+    """Rough number of bytes the bridge serialization of value takes"""
+    if isinstance(value, BridgedObject):
+        # Only the handle is sent back
+        return len(value._bridge_handle) + 32
+    if isinstance(value, (bool, int, float)) or value is None:
+        return len(str(value)) + 16
+    if isinstance(value, (str, bytes)):
+        # Strings and bytes are base64 encoded
+        return len(value) * 4 // 3 + 16
+    if isinstance(value, dict):
+        return sum(wire_size(k) + wire_size(v) for k, v in value.items()) + 16
+    if isinstance(value, (list, tuple)):
+        return sum(wire_size(v) for v in value) + 16
+    # Any other local object is sent as a handle together with its repr and the names of all its attributes
+    return len(repr(value)) + len(json.dumps(dir(value))) + 64
@@ -0,0 +1,4 @@
+"""
+Helper modules that run inside the Ghidra Jython interpreter, installed there by `ipyghidra.remote.remote_module`.
+They must stay compatible with Python 2.7 and must not import anything from ipyghidra.
+"""
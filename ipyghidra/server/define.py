@@ -0,0 +1,50 @@
+import ast
+import hashlib
+import threading
+
+_lock = threading.Lock()
+# client id -> the namespace its definitions run in
+_namespaces = {}
+# (client id, sha1 of the source) -> {name: object} it defined
+_definitions = {}
+
+
+class _Namespace(dict):
+    """Globals of the definitions of one client, names it doesn't define come from the server's __main__ as they are now"""
+
+    def __init__(self, main):
+        dict.__init__(self)
+        self.main = main
+
+    def __missing__(self, name):
+        # A KeyError makes the lookup go on to the builtins
+        return self.main[name]
+
+
+def top_level_names(source):
+    """Names of the top level def and class statements of source, parsed by the server's own Python"""
+    tree = compile(source, "<ghidra_define>", "exec", ast.PyCF_ONLY_AST)
+    return [node.name for node in tree.body if isinstance(node, (ast.FunctionDef, ast.ClassDef))]
+
+
+def define(main, client, source):
+    """
+    Run source in the namespace of client, which falls back to main, the globals of the server's __main__.
+    Returns the names of the top level functions and classes it defines and the objects.
+    Source that already ran there is not compiled again, unless one of the names was bound to something else since.
+    """
+    names = top_level_names(source)
+    if not names:
+        raise ValueError("No top level def or class to define")
+    taken = [name for name in names if name in main]
+    if taken:
+        raise ValueError("%s would hide the server's global of that name, pick another one" % ", ".join(taken))
+    key = (client, hashlib.sha1(source.encode('utf-8')).hexdigest())
+    with _lock:
+        namespace = _namespaces.setdefault(client, _Namespace(main))
+        defined = _definitions.get(key)
+        if defined is None or any(namespace.get(name) is not defined.get(name) for name in names):
+            exec(compile(source, "<ghidra_define>", "exec"), namespace)
+            defined = dict((name, namespace[name]) for name in names)
+            _definitions[key] = defined
+    return [names, [defined[name] for name in names]]
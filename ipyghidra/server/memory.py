@@ -0,0 +1,70 @@
+import uuid
+
+try:
+    import jarray
+    from java.util import Arrays, Base64
+
+    def _read(memory, address, length):
+        data = jarray.zeros(length, 'b')
+        count = memory.getBytes(address, data)
+        if count < length:
+            data = Arrays.copyOf(data, count)
+        # Encoding in Java is much faster than iterating the byte[] in Jython
+        return Base64.getEncoder().encodeToString(data)
+except ImportError:
+    # Not Jython, e.g. the fake server of the benchmarks
+    import base64
+
+    def _read(memory, address, length):
+        data = bytearray(length)
+        count = memory.getBytes(address, data)
+        return base64.b64encode(bytes(data[:count])).decode('ascii')
+
+
+# Identifies this run of the server. Program ids and modification numbers start over with every open of a program,
+# so they only identify its content together with this
+_SESSION = uuid.uuid4().hex[:12]
+
+
+def version(program):
+    """
+    Key of the program and of its current content. Saved content is identified by the file and the version and
+    time it was saved, which still hold after reopening the program or restarting Ghidra.
+    Unsaved changes are only identified within this session.
+    """
+    domain_file = program.getDomainFile()
+    open_id = "%s-%x" % (_SESSION, program.getUniqueProgramID())
+    if domain_file is None:
+        return [open_id, str(program.getModificationNumber())]
+    key = domain_file.getFileID() or domain_file.getPathname()
+    if program.isChanged():
+        return [key, "%s-%d" % (open_id, program.getModificationNumber())]
+    return [key, "v%d-%d" % (domain_file.getVersion(), domain_file.getLastModifiedTime())]
+
+
+def _describe(program, address):
+    return version(program) + [address.getAddressSpace().getName(), address.getOffset()]
+
+
+def location(program, address):
+    """Program key, content version (see version), space name and offset of address, which can also be an offset"""
+    if not hasattr(address, 'getOffset'):
+        address = program.getAddressFactory().getDefaultAddressSpace().getAddress(address)
+    return _describe(program, address) + [address]
+
+
+def block(program, block):
+    """Like location for the start of block, which can also be its name, plus its size"""
+    if not hasattr(block, 'getStart'):
+        name = block
+        block = program.getMemory().getBlock(name)
+        if block is None:
+            raise KeyError("No memory block %s" % name)
+    if not block.isInitialized():
+        raise ValueError("Memory block %s has no bytes" % block.getName())
+    return _describe(program, block.getStart()) + [block.getStart(), block.getSize()]
+
+
+def read(program, address, offset, length):
+    """base64 of the bytes [address + offset, address + offset + length), shorter if memory ends before that"""
+    return _read(program.getMemory(), address.add(offset), length)
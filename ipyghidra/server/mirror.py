@@ -0,0 +1,211 @@
+import itertools
+import json
+import threading
+import uuid
+
+try:
+    integer_types = (int, long)  # Python 2 / Jython
+except NameError:
+    integer_types = (int,)
+
+TABLES = ("functions", "symbols", "xrefs", "data_types")
+ADDRESS_TABLES = ("functions", "symbols", "xrefs")
+# With more changed ranges than this, e.g. during auto analysis, re-exporting everything is cheaper
+MAX_RANGES = 10000
+
+# Identifies this run of the server. Program ids and modification numbers start over with every open of a program,
+# so they only identify its content together with this
+_SESSION = uuid.uuid4().hex[:12]
+
+_lock = threading.Lock()
+_watches = {}
+_ids = itertools.count(1)
+_event_names = None
+
+
+def _names_of_event_types():
+    """Before Ghidra 11 event types are ints, their names are those of the DOCR_/DO_ constants"""
+    names = {}
+    try:
+        from ghidra.framework.model import DomainObject
+        from ghidra.program.util import ChangeManager
+        for cls in (DomainObject, ChangeManager):
+            for name in dir(cls):
+                if name.startswith("DO") and isinstance(getattr(cls, name), integer_types):
+                    names.setdefault(getattr(cls, name), name)
+    except ImportError:
+        pass
+    return names
+
+
+def _tables_for(event_name):
+    """The tables an event without an address range can change"""
+    name = event_name.upper()
+    if "RESTORED" in name:
+        # Undo and redo can change anything
+        return TABLES
+    tables = set()
+    if "FUNCTION" in name:
+        tables.update(("functions", "symbols"))
+    if "SYMBOL" in name or "NAMESPACE" in name:
+        tables.update(("symbols", "functions"))
+    if "REFERENCE" in name:
+        tables.add("xrefs")
+    if "DATA_TYPE" in name or "CATEGORY" in name:
+        tables.add("data_types")
+    return tables
+
+
+class _Watch(object):
+    def __init__(self, program):
+        self.program = program
+        self.listener = None
+        self.full = set()
+        self.ranges = []
+
+    def record(self, event):
+        global _event_names
+        for i in range(event.numRecords()):
+            record = event.getChangeRecord(i)
+            start = record.getStart() if hasattr(record, 'getStart') else None
+            with _lock:
+                if start is not None:
+                    end = record.getEnd() if hasattr(record, 'getEnd') else None
+                    if end is None or end.getAddressSpace() != start.getAddressSpace():
+                        end = start
+                    self.ranges.append((start.getAddressSpace().getName(), start.getOffset(), end.getOffset()))
+                    if len(self.ranges) > MAX_RANGES:
+                        self.full.update(ADDRESS_TABLES)
+                        self.ranges = []
+                    continue
+                event_type = record.getEventType()
+                if isinstance(event_type, integer_types):
+                    if _event_names is None:
+                        _event_names = _names_of_event_types()
+                    event_type = _event_names.get(event_type, "")
+                self.full.update(_tables_for(str(event_type)))
+
+
+def watch(program):
+    """Start recording the changes of program, returns the id to get them with"""
+    from ghidra.framework.model import DomainObjectListener
+
+    state = _Watch(program)
+
+    class Listener(DomainObjectListener):
+        def domainObjectChanged(self, event):
+            state.record(event)
+
+    state.listener = Listener()
+    program.addListener(state.listener)
+    with _lock:
+        watch_id = next(_ids)
+        _watches[watch_id] = state
+    return watch_id
+
+
+def unwatch(watch_id):
+    with _lock:
+        state = _watches.pop(watch_id, None)
+    if state is not None:
+        state.program.removeListener(state.listener)
+
+
+def changes(watch_id):
+    """Tables that changed completely, changed (space, start, end) ranges and the version of the program, then resets"""
+    state = _watches[watch_id]
+    with _lock:
+        full, ranges = sorted(state.full), sorted(set(state.ranges))
+        state.full, state.ranges = set(), []
+    return full, [list(r) for r in ranges], version(state.program)[1]
+
+
+def _address_set(program, ranges):
+    from ghidra.program.model.address import AddressSet
+    addresses = AddressSet()
+    factory = program.getAddressFactory()
+    for space_name, start, end in ranges:
+        space = factory.getAddressSpace(space_name)
+        if space is not None:
+            addresses.add(space.getAddress(start), space.getAddress(end))
+    return addresses
+
+
+def _address(address):
+    return [address.getAddressSpace().getName(), address.getOffset()]
+
+
+def _functions(program, addresses):
+    manager = program.getFunctionManager()
+    functions = manager.getFunctions(addresses, True) if addresses is not None else manager.getFunctions(True)
+    for f in functions:
+        yield _address(f.getEntryPoint()) + [f.getName(), f.getParentNamespace().getName(True),
+                                             f.getBody().getNumAddresses(), f.isThunk(), f.getParameterCount(),
+                                             f.getPrototypeString(False, False)]
+
+
+def _symbols(program, addresses):
+    table = program.getSymbolTable()
+    if addresses is None:
+        ranges = [(table.getAllSymbols(True), None)]
+    else:
+        ranges = [(table.getSymbolIterator(r.getMinAddress(), True), r.getMaxAddress()) for r in addresses.getAddressRanges()]
+    for symbols, end in ranges:
+        for s in symbols:
+            if end is not None and s.getAddress().compareTo(end) > 0:
+                break
+            yield _address(s.getAddress()) + [s.getName(), s.getParentNamespace().getName(True),
+                                              str(s.getSymbolType()), str(s.getSource()), s.isPrimary()]
+
+
+def _xrefs(program, addresses):
+    manager = program.getReferenceManager()
+    if addresses is None:
+        if program.getMinAddress() is None:
+            return
+        sources = manager.getReferenceSourceIterator(program.getMinAddress(), True)
+    else:
+        sources = manager.getReferenceSourceIterator(addresses, True)
+    for source in sources:
+        for r in manager.getReferencesFrom(source):
+            yield _address(r.getFromAddress()) + _address(r.getToAddress()) + [
+                str(r.getReferenceType()), r.getOperandIndex(), r.isPrimary()]
+
+
+def _data_types(program, addresses):
+    for dt in program.getDataTypeManager().getAllDataTypes():
+        yield [dt.getPathName(), dt.getName(), str(dt.getCategoryPath()), dt.getLength()]
+
+
+_EXPORTERS = {"functions": _functions, "symbols": _symbols, "xrefs": _xrefs, "data_types": _data_types}
+
+
+def export(program, table, ranges=None, chunk_size=5000):
+    """
+    Iterator over the rows of table, all of them or only those in the (space, start, end) ranges, as JSON strings
+    of chunk_size rows each, so neither side ever holds the whole table
+    """
+    addresses = _address_set(program, ranges) if ranges is not None else None
+    rows = _EXPORTERS[table](program, addresses)
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            return
+        # One string is much cheaper to send over the bridge than a list of lists
+        yield json.dumps(chunk)
+
+
+def version(program):
+    """
+    Key of the program and of its current content. Saved content is identified by the file and the version and
+    time it was saved, which still hold after reopening the program or restarting Ghidra.
+    Unsaved changes are only identified within this session.
+    """
+    domain_file = program.getDomainFile()
+    open_id = "%s-%x" % (_SESSION, program.getUniqueProgramID())
+    if domain_file is None:
+        return [open_id, str(program.getModificationNumber())]
+    key = domain_file.getFileID() or domain_file.getPathname()
+    if program.isChanged():
+        return [key, "%s-%d" % (open_id, program.getModificationNumber())]
+    return [key, "v%d-%d" % (domain_file.getVersion(), domain_file.getLastModifiedTime())]
@@ -0,0 +1,35 @@
+import itertools
+import sys
+import threading
+
+# job id -> (items, function), shared by all connections to this server
+_jobs = {}
+_lock = threading.Lock()
+_ids = itertools.count(1)
+
+
+def create(iterable, function):
+    """Register a job over the items of iterable, returns (job id, number of items)"""
+    items = list(iterable)
+    with _lock:
+        job = next(_ids)
+        _jobs[job] = (items, function)
+    return job, len(items)
+
+
+def run_chunk(job, start, stop):
+    """(True, result) or (False, error message) for the items [start, stop) of job"""
+    items, function = _jobs[job]
+    results = []
+    for item in items[start:stop]:
+        try:
+            results.append((True, function(item)))
+        except:  # Java exceptions are not always Exceptions on Jython
+            error = sys.exc_info()[1]
+            results.append((False, "%s: %s" % (type(error).__name__, error)))
+    return results
+
+
+def close(job):
+    with _lock:
+        _jobs.pop(job, None)
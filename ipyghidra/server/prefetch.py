@@ -0,0 +1,20 @@
+def prefetch(groups, program):
+    """
+    Read attributes of many objects at once. groups is a list of (objects, names), the result has the
+    modification number of program (None without one) and per group and object a dict of the names that could be read
+    """
+    results = []
+    for objects, names in groups:
+        group = []
+        for obj in objects:
+            values = {}
+            for name in names:
+                try:
+                    values[name] = getattr(obj, name)
+                except Exception:
+                    # The client falls back to reading the attribute on its own and gets the real exception then
+                    pass
+            group.append(values)
+        results.append(group)
+    number = program.getModificationNumber() if program is not None else None
+    return number, results
@@ -0,0 +1,66 @@
+import base64
+import struct
+
+try:
+    text_type = unicode  # Python 2 / Jython
+    integer_types = (int, long)
+except NameError:
+    text_type = str
+    integer_types = (int,)
+
+
+def _plain(value):
+    """Addresses become their offset, everything else stays as it is"""
+    if hasattr(value, 'getOffset') and hasattr(value, 'getAddressSpace'):
+        return value.getOffset()
+    return value
+
+
+def _b64(data):
+    return base64.b64encode(data).decode('ascii')
+
+
+INT64_MIN = -2 ** 63
+INT64_MAX = 2 ** 63 - 1
+# Larger integers don't survive float64
+FLOAT_EXACT = 2 ** 53
+
+
+def _pack_strings(kind, encoded):
+    offsets = [0]
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+    return (kind, _b64(struct.pack('<%dq' % len(offsets), *offsets)), _b64(b''.join(encoded)))
+
+
+def pack_column(values):
+    """
+    Pack a column into one buffer: ('q', int64s) for integers, ('d', float64s) for numbers with None as NaN,
+    ('?', uint8s) for booleans and ('s', int64 offsets, utf-8 blob) for everything else, all base64 encoded.
+    Integers that don't fit int64, or don't fit float64 exactly next to a None, are sent as decimal strings
+    with None as the empty string: ('i', int64 offsets, ascii blob)
+    """
+    values = [_plain(v) for v in values]
+    count = len(values)
+    if all(isinstance(v, bool) for v in values):
+        return ('?', _b64(struct.pack('<%dB' % count, *values)))
+    if all(v is None or isinstance(v, integer_types) and not isinstance(v, bool) for v in values):
+        present = [v for v in values if v is not None]
+        low, high = (min(present), max(present)) if present else (0, 0)
+        if len(present) == count and INT64_MIN <= low and high <= INT64_MAX:
+            return ('q', _b64(struct.pack('<%dq' % count, *values)))
+        if len(present) == count or -FLOAT_EXACT > low or high > FLOAT_EXACT:
+            return _pack_strings('i', [b'' if v is None else str(v).encode('ascii') for v in values])
+    if all(v is None or isinstance(v, integer_types + (float,)) for v in values):
+        return ('d', _b64(struct.pack('<%dd' % count, *[float('nan') if v is None else v for v in values])))
+
+    return _pack_strings('s', [b'' if v is None else text_type(v).encode('utf-8') for v in values])
+
+
+def table(iterable, projection, column_count):
+    """Run projection (item -> tuple of column values) over iterable and return the packed columns"""
+    columns = [[] for _ in range(column_count)]
+    for item in iterable:
+        for column, value in zip(columns, projection(item)):
+            column.append(value)
+    return [pack_column(column) for column in columns]
@@ -0,0 +1,109 @@
+import collections
+import sys
+import threading
+import time
+
+try:
+    from java.lang import Thread
+except ImportError:
+    # Not Jython, e.g. the fake server of the benchmarks
+    Thread = None
+
+try:
+    from ghidra.util.task import TaskMonitorAdapter
+except ImportError:
+    TaskMonitorAdapter = None
+
+# A cancel can overtake the request that starts its task, it waits this many seconds for the task to show up
+PENDING_CANCEL_TIMEOUT = 60
+# Ids of tasks that ended are remembered, a cancel that comes after its task has nothing left to stop
+FINISHED_IDS = 1000
+
+_lock = threading.Lock()
+_tasks = {}
+# task id -> time a cancel of a task that didn't start yet expires
+_pending_cancels = {}
+_finished = collections.OrderedDict()
+
+
+class TaskCancelled(Exception):
+    pass
+
+
+class _Task(object):
+    def __init__(self):
+        self.cancelled = False
+        self.thread = None
+        self.monitor = TaskMonitorAdapter(True) if TaskMonitorAdapter is not None else None
+
+    def trace(self, frame, event, arg):
+        if self.cancelled:
+            raise TaskCancelled("Cancelled")
+        # Loops of the evaluated code and of %%ghidra_define functions are checked line by line, the rest on every call
+        if frame.f_code.co_filename in ("<ghidra_eval>", "<ghidra_define>"):
+            return self.trace
+        return None
+
+
+def run(task_id, code, namespace, variables):
+    """
+    Evaluate compiled code with variables as globals on top of namespace, until it is done or cancel(task_id).
+    A cancelled task stops at the next line of the code or Python call, a blocking Java call is interrupted
+    and Ghidra API calls passed `monitor` see it as cancelled.
+    """
+    task = _Task()
+    with _lock:
+        task.cancelled = _pending_cancels.pop(task_id, None) is not None
+        _tasks[task_id] = task
+    try:
+        if task.cancelled:
+            raise TaskCancelled("Cancelled before it started")
+        task.thread = Thread.currentThread() if Thread is not None else threading.current_thread()
+        scope = dict(namespace, **variables)
+        if task.monitor is not None and scope.get('monitor') is namespace.get('monitor'):
+            scope['monitor'] = task.monitor
+        previous = sys.gettrace()
+        sys.settrace(task.trace)
+        try:
+            return eval(code, scope)
+        finally:
+            sys.settrace(previous)
+    finally:
+        with _lock:
+            # Once the task is gone cancel can't interrupt this thread anymore, so clearing the flag after that
+            # leaves no interrupt behind for the next command this handler thread serves
+            _tasks.pop(task_id, None)
+            _finished[task_id] = True
+            while len(_finished) > FINISHED_IDS:
+                _finished.popitem(last=False)
+            if Thread is not None:
+                Thread.interrupted()
+
+
+def cancel(task_id):
+    """
+    Ask a task to stop, also works for a while before it started. Returns whether the task was running,
+    the cancel of a task that already ended does nothing
+    """
+    now = time.time()
+    with _lock:
+        for pending_id, expires in list(_pending_cancels.items()):
+            if expires < now:
+                del _pending_cancels[pending_id]
+        task = _tasks.get(task_id)
+        if task is None:
+            if task_id not in _finished:
+                _pending_cancels[task_id] = now + PENDING_CANCEL_TIMEOUT
+            return False
+        # Still under the lock, so the task can't end in between and the interrupt always hits its own thread
+        task.cancelled = True
+        if task.monitor is not None:
+            task.monitor.cancel()
+        if Thread is not None and task.thread is not None:
+            task.thread.interrupt()
+    return True
+
+
+def running():
+    with _lock:
+        return [task_id for task_id, task in _tasks.items() if task.thread is not None]
@@ -0,0 +1,31 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupTimer():
+    """Records how long each phase of loading the extension took, `%ghidra_startup` prints the report"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = []  # (name, thread name, start offset, duration)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self.phases.append((name, threading.current_thread().name, start - self.started, end - start))
+
+    def report(self) -> str:
+        with self._lock:
+            phases = sorted(self.phases, key=lambda p: p[2])
+        width = max([len(p[0]) for p in phases] + [5])
+        lines = [f"{'Phase':<{width}}  {'Thread':<24} {'Start':>8} {'Duration':>9}"]
+        for name, thread, start, duration in phases:
+            lines.append(f"{name:<{width}}  {thread:<24} {start * 1000:>6.1f}ms {duration * 1000:>7.1f}ms")
+        return "\n".join(lines)
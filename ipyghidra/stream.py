@@ -0,0 +1,54 @@
+import ast
+from collections import deque
+
+
+def as_generator(code) -> str:
+    """Turn a list comprehension into a generator expression, so the server doesn't build the whole list first"""
+    stripped = code.strip()
+    body = ast.parse(stripped, mode='eval').body
+    # A trailing comment would end up inside the parentheses, so only the plain `[...]` case is rewritten
+    if isinstance(body, ast.ListComp) and stripped.startswith("[") and stripped.endswith("]"):
+        return "(" + stripped[1:-1] + ")"
+    return code
+
+
+class RemoteStream():
+    """
+    Iterates over an iterator that lives on the server. Items are fetched `chunk_size` at a time and only when the
+    previous chunk has been consumed, so neither side ever holds more than one chunk of the results.
+    """
+
+    def __init__(self, bridge, iterator, chunk_size=5000):
+        self._bridge = bridge
+        self._iterator = iterator
+        self.chunk_size = chunk_size
+        self._buffer = deque()
+        self.fetched = 0
+
+    def _fetch(self):
+        chunk = self._bridge.remote_eval("list(__import__('itertools').islice(it, n))",
+                                         it=self._iterator, n=self.chunk_size)
+        self.fetched += len(chunk)
+        self._buffer.extend(chunk)
+        if len(chunk) < self.chunk_size:
+            # Exhausted, release the server side iterator right away
+            self._iterator = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if not self._buffer and self._iterator is not None:
+            self._fetch()
+        if not self._buffer:
+            raise StopIteration
+        return self._buffer.popleft()
+
+    def close(self):
+        """Stop early and release the iterator on the server"""
+        self._iterator = None
+        self._buffer.clear()
+
+    def __repr__(self):
+        state = "exhausted" if self._iterator is None else "open"
+        return f"<RemoteStream {state}, {self.fetched} items fetched in chunks of {self.chunk_size}>"
@@ -0,0 +1,72 @@
+import base64
+import logging
+import time
+from array import array
+
+from ipyghidra.eval_plan import EvalPlanCache
+from ipyghidra.remote import remote_module
+from ipyghidra.scope import shipped_variables
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+logger = logging.getLogger('ipyghidra')
+
+_DTYPES = {'q': '<i8', 'd': '<f8', '?': '?'}
+_ARRAY_TYPES = {'q': 'q', 'd': 'd', '?': 'B'}
+
+
+def projection_code(iterable, columns, item_name="x") -> str:
+    """The expression evaluated on the server, the projection runs there so only the packed columns are sent back"""
+    expressions = ", ".join(f"({e})" for e in columns.values())
+    return f"__ipyghidra_table.table(({iterable}), lambda {item_name}: ({expressions},), {len(columns)})"
+
+
+def decode_column(packed):
+    """NumPy array for a packed column, or array.array/list if NumPy isn't installed"""
+    kind = packed[0]
+    if kind in ('s', 'i'):
+        offsets = array('q', base64.b64decode(packed[1]))
+        blob = base64.b64decode(packed[2])
+        strings = [blob[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+        if kind == 'i':
+            # Integers out of the range of int64, or of float64 with None among them
+            strings = [int(s) if s else None for s in strings]
+        return numpy.array(strings, dtype=object) if numpy is not None else strings
+    data = base64.b64decode(packed[1])
+    if numpy is not None:
+        return numpy.frombuffer(data, dtype=_DTYPES[kind])
+    return array(_ARRAY_TYPES[kind], data)
+
+
+def ghidra_table(bridge, iterable, columns, namespace, item_name="x", dataframe=False, plans: EvalPlanCache = None,
+                 flat_api=None):
+    """
+    Evaluate the column expressions for every item of a server side iterable and transfer every column as one packed
+    buffer: int64 for integers and addresses, float64 for other numbers and offsets into one utf-8 blob for strings.
+    Integers that don't fit those, or a None among integers beyond 2**53, come back as an object array of int and None.
+    """
+    plans = plans if plans is not None else EvalPlanCache()
+    plan = plans.plan(projection_code(iterable, columns, item_name))
+    if flat_api is not None:
+        flat_api.populate(plan.free_variables)
+    variables = shipped_variables(plan.free_variables, namespace)
+    variables['__ipyghidra_table'] = remote_module(bridge, 'table')
+
+    start = time.perf_counter()
+    packed = plan.run(bridge, variables, as_globals=True)
+    received = time.perf_counter()
+    result = {name: decode_column(column) for name, column in zip(columns, packed)}
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"ghidra_table: {sum(len(part) for column in packed for part in column[1:])} bytes in "
+                     f"{received - start:.3f}s, decoded in {time.perf_counter() - received:.3f}s")
+
+    if dataframe:
+        try:
+            import pandas
+        except ImportError:
+            raise ImportError("--df needs pandas, install it or use the dict of arrays")
+        return pandas.DataFrame(result)
+    return result
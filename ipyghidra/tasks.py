@@ -0,0 +1,173 @@
+import asyncio
+import concurrent.futures
+import itertools
+import logging
+import os
+import threading
+import time
+
+from ipyghidra.remote import remote_call
+
+logger = logging.getLogger('ipyghidra')
+
+# How long a timed out evaluation gets to notice it was cancelled before waiting for it is given up
+CANCEL_GRACE = 5
+
+
+class GhidraTask():
+    """
+    A ghidra_eval running on the server in the background. Await it, or block with result():
+
+        t1 = %ghidra_eval --async [f.name for f in currentProgram.functionManager.getFunctions(True)]
+        t2 = %ghidra_eval --async len(list(currentProgram.memory.blocks))
+        names, blocks = await asyncio.gather(t1, t2)
+
+    cancel() stops the work on the server too, not only the wait for it.
+    """
+
+    def __init__(self, runner, task_id, code, timeout=None):
+        self.id = task_id
+        self.code = code
+        self.timeout = timeout
+        self.started = time.monotonic()
+        self.cancelled = False
+        self.timed_out = False
+        self._runner = runner
+        self._future = concurrent.futures.Future()
+        self._timer = None
+
+    def done(self) -> bool:
+        return self._future.done()
+
+    def result(self, timeout=None):
+        """The value of the expression, raises what the evaluation raised, TimeoutError or CancelledError"""
+        return self._future.result(timeout)
+
+    def exception(self, timeout=None):
+        return self._future.exception(timeout)
+
+    def add_done_callback(self, callback):
+        """callback(task) once the task is done"""
+        self._future.add_done_callback(lambda _: callback(self))
+
+    def cancel(self):
+        """Stop the evaluation on the server, the task then raises CancelledError"""
+        if self.done():
+            return False
+        self.cancelled = True
+        self._runner.cancel_remote(self.id)
+        return True
+
+    def _expire(self):
+        if not self.done():
+            logger.info(f"ghidra_eval task {self.id} ran into its timeout of {self.timeout}s, cancelling it")
+            self.timed_out = True
+            self.cancel()
+
+    async def _wait(self):
+        try:
+            return await asyncio.wrap_future(self._future)
+        except asyncio.CancelledError:
+            # The awaiting coroutine was cancelled, e.g. by asyncio.wait_for, the server should stop as well
+            self.cancel()
+            raise
+
+    def __await__(self):
+        return self._wait().__await__()
+
+    def __repr__(self):
+        if not self.done():
+            state = f"running for {time.monotonic() - self.started:.1f}s"
+        elif self.timed_out:
+            state = "timed out"
+        elif self._future.cancelled() or self.cancelled:
+            state = "cancelled"
+        else:
+            state = "failed" if self._future.exception() is not None else "done"
+        return f"<GhidraTask {self.id} {state}: {self.code[:60]!r}>"
+
+
+class TaskRunner():
+    """
+    Runs ghidra_eval code in background threads, each evaluation registered on the server under an id so it can be
+    cancelled there. The bridge answers requests of one connection concurrently, so no extra connections are needed.
+    """
+
+    def __init__(self, bridge, workers=8):
+        self._bridge = bridge
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ghidra_eval")
+        # Ids are unique per client process, several kernels can use the same server
+        self._ids = itertools.count(1)
+        self._prefix = f"{os.getpid()}-{id(self):x}"
+        self._lock = threading.Lock()
+        self.tasks = {}
+
+    def submit(self, plan, variables, timeout=None) -> GhidraTask:
+        """Start evaluating an EvalPlan with variables and return right away"""
+        task = GhidraTask(self, f"{self._prefix}-{next(self._ids)}", plan.code, timeout)
+        with self._lock:
+            self.tasks[task.id] = task
+        if timeout is not None:
+            task._timer = threading.Timer(timeout, task._expire)
+            task._timer.daemon = True
+            task._timer.start()
+        self._executor.submit(self._run, task, plan, variables)
+        return task
+
+    def completed(self, code, result) -> GhidraTask:
+        """A task that is already done, for results that didn't need the server"""
+        task = GhidraTask(self, f"{self._prefix}-{next(self._ids)}", code)
+        task._future.set_result(result)
+        return task
+
+    def _run(self, task, plan, variables):
+        try:
+            # No response timeout, the server side work is limited by the timeout of the task instead
+            result = remote_call(self._bridge, 'tasks', "run(t, c, globals(), v)", timeout=-1,
+                                 t=task.id, c=plan.remote_code(self._bridge), v=variables)
+        except Exception as e:
+            if task.timed_out:
+                error = TimeoutError(f"ghidra_eval did not finish within {task.timeout}s and was cancelled")
+                error.__cause__ = e
+                task._future.set_exception(error)
+            elif task.cancelled:
+                task._future.set_exception(concurrent.futures.CancelledError(f"ghidra_eval task {task.id}"))
+            else:
+                task._future.set_exception(e)
+        else:
+            task._future.set_result(result)
+        finally:
+            if task._timer is not None:
+                task._timer.cancel()
+            with self._lock:
+                self.tasks.pop(task.id, None)
+
+    def run(self, plan, variables, timeout=None):
+        """
+        Evaluate and wait for the result. Unlike a plain remote_eval, interrupting the wait (Ctrl-C)
+        or running into the timeout also stops the evaluation on the server.
+        """
+        task = self.submit(plan, variables, timeout)
+        try:
+            return task.result(timeout + CANCEL_GRACE if timeout is not None else None)
+        except concurrent.futures.TimeoutError:
+            if task.done():
+                # The evaluation itself timed out and was cancelled
+                raise
+            raise TimeoutError(f"ghidra_eval did not finish within {timeout}s and does not react to being cancelled, "
+                               f"it is still running on the server as task {task.id}")
+        except KeyboardInterrupt:
+            task.cancel()
+            raise
+
+    def cancel_remote(self, task_id):
+        # The cancel overtakes the running evaluation, the bridge serves every request on a thread of its own
+        remote_call(self._bridge, 'tasks', "cancel(t)", t=task_id)
+
+    def running(self) -> dict:
+        """Snapshot of the tasks by id that are still running, the workers remove them as they finish"""
+        with self._lock:
+            return dict(self.tasks)
+
+    def cancel_all(self) -> int:
+        return sum(task.cancel() for task in self.running().values())
@@ -8,6 +8,6 @@ setup(
     description="Extension for IPython to start ghidra_bridge with some extra features",
     author="Florian Magin",
     url="none",
-    packages=["ipyghidra"],
+    packages=["ipyghidra", "ipyghidra.server"],
     install_requires=["ghidra_bridge", "ipython", "attr", "cattrs-3.8" if sys.version_info >= (3, 8) else "cattrs"],
 )
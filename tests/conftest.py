@@ -0,0 +1,69 @@
+import os
+import sys
+
+import pytest
+
+BENCHMARKS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks")
+sys.path.insert(0, BENCHMARKS)
+
+import fake_api
+from run import start_server, wait_for_port
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Indexes, mirrors and memory files of a test go to a cache dir of its own"""
+    path = tmp_path / "cache"
+    monkeypatch.setenv("XDG_CACHE_HOME", str(path))
+    return path
+
+
+@pytest.fixture(scope="session")
+def ghidra_install(tmp_path_factory) -> str:
+    """Install dir of a fake Ghidra, with the doc of the API benchmarks/fake_ghidra.py serves"""
+    path = tmp_path_factory.mktemp("ghidra")
+    os.makedirs(path / "docs")
+    fake_api.write_javadoc_zip(str(path / "docs" / "GhidraAPI_javadoc.zip"), filler=20)
+    return str(path)
+
+
+class FakeGhidra():
+    """benchmarks/fake_ghidra.py running in a process of its own"""
+
+    def __init__(self, install_dir, functions=100, name="fake_program", port=None):
+        self.port, self._process = start_server(functions, install_dir, name, port)
+        wait_for_port(self.port)
+
+    def stop(self):
+        self._process.terminate()
+        self._process.wait()
+
+
+@pytest.fixture(scope="session")
+def fake_ghidra(ghidra_install):
+    server = FakeGhidra(ghidra_install)
+    yield server
+    server.stop()
+
+
+@pytest.fixture(scope="session")
+def ip(fake_ghidra, tmp_path_factory):
+    """An IPython shell with the extension loaded and connected to the fake server, shared by the whole session"""
+    from IPython.core.interactiveshell import InteractiveShell
+    import ipyghidra
+
+    environ = dict(GHIDRA_BRIDGE_HOST="127.0.0.1", GHIDRA_BRIDGE_PORT=str(fake_ghidra.port),
+                   XDG_CACHE_HOME=str(tmp_path_factory.mktemp("cache")))
+    previous = {key: os.environ.get(key) for key in environ}
+    os.environ.update(environ)
+    try:
+        shell = InteractiveShell.instance()
+        ipyghidra.load_ipython_extension(shell)
+        assert shell.user_ns['_doc_helper'].wait_ready(60)
+    finally:
+        for key, value in previous.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+    return shell
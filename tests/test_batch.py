@@ -0,0 +1,74 @@
+import pytest
+from ghidra_bridge.bridge import BridgeException
+
+from ipyghidra.batch import GhidraBatch
+from ipyghidra.eval_plan import EvalPlanCache
+from ipyghidra.profiler import BridgeProfiler
+
+CELL = "\n".join([
+    "count = currentProgram.functionManager.functionCount",
+    "doubled = limit * 2",
+    "names = [f.name for f in currentProgram.functionManager.getFunctions(True)][:limit]",
+    "label = prefix + str(limit)",
+])
+
+
+def round_trips(bridge, function):
+    with BridgeProfiler(bridge) as profiler:
+        result = function()
+    return result, [r for r in profiler.requests if r.command != "del"]
+
+
+def test_batch_magic(ip):
+    bridge = ip.user_ns['_bridge'].bridge
+    ip.run_cell("limit = 3\nprefix = 'top'")
+    ip.run_cell_magic("ghidra_batch", "", CELL)
+    # Compiling the code on the server only happens the first time
+    results, requests = round_trips(bridge, lambda: ip.run_cell_magic("ghidra_batch", "", CELL))
+    assert [r.command for r in requests] == ["eval"]
+    assert list(results) == ["count", "doubled", "names", "label"]
+    assert results["count"] == 100 and results["doubled"] == 6 and results["label"] == "top3"
+    assert len(results["names"]) == 3 and all(name.startswith("FUN_") for name in results["names"])
+    assert all(ip.user_ns[name] == value for name, value in results.items())
+
+
+def test_batch_context_manager(ip):
+    bridge = ip.user_ns['_bridge'].bridge
+    namespace = {"limit": 4}
+    plans = EvalPlanCache()
+
+    def run():
+        with GhidraBatch(bridge, namespace, plans=plans) as batch:
+            for i in range(5):
+                batch.add(f"value{i}", f"limit * {i}")
+            with pytest.raises(RuntimeError):
+                batch["value0"]
+        return batch
+
+    run()
+    batch, requests = round_trips(bridge, run)
+    assert len(requests) == 1
+    assert list(batch.results.items()) == [(f"value{i}", 4 * i) for i in range(5)]
+    assert batch["value3"] == 12
+    # Not bound without bind=True
+    assert "value3" not in namespace
+
+
+def test_batch_errors(ip):
+    bridge = ip.user_ns['_bridge'].bridge
+    ip.run_cell("limit = 3")
+    # One failing expression fails the whole batch, nothing is bound
+    with pytest.raises(BridgeException, match="ZeroDivisionError"):
+        ip.run_cell_magic("ghidra_batch", "", "before = limit\nbroken = limit // 0")
+    assert "before" not in ip.user_ns and "broken" not in ip.user_ns
+
+    # An error in the block that collects the expressions sends nothing
+    def collect_and_fail():
+        with GhidraBatch(bridge, {}) as batch:
+            batch.add("never", "1")
+            raise KeyError("collecting")
+
+    with BridgeProfiler(bridge) as profiler:
+        with pytest.raises(KeyError):
+            collect_and_fail()
+    assert [r for r in profiler.requests if r.command != "del"] == []
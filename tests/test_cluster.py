@@ -0,0 +1,32 @@
+from conftest import FakeGhidra
+from ipyghidra.cluster import GhidraCluster
+from run import free_port
+
+COUNT = "currentProgram.functionManager.functionCount"
+
+
+def test_dead_server_is_left_out_and_retried(ghidra_install):
+    alive = FakeGhidra(ghidra_install, functions=3, name="alive")
+    dead_port = free_port()
+    late = None
+    try:
+        cluster = GhidraCluster([("127.0.0.1", alive.port), ("127.0.0.1", dead_port)], response_timeout=30)
+        results = cluster.fanout(COUNT, {})
+        assert dict(results) == {"alive": 3}
+        assert list(cluster.errors) == [f"127.0.0.1:{dead_port}"]
+
+        # The next fanout tries the server again
+        late = FakeGhidra(ghidra_install, functions=5, name="late", port=dead_port)
+        results = cluster.fanout(COUNT, {})
+        assert dict(results) == {"alive": 3, "late": 5}
+        assert cluster.errors == {}
+    finally:
+        alive.stop()
+        if late is not None:
+            late.stop()
+
+
+def test_no_server_reachable(ghidra_install):
+    cluster = GhidraCluster([("127.0.0.1", free_port())], response_timeout=30)
+    assert dict(cluster.fanout(COUNT, {})) == {}
+    assert len(cluster.errors) == 1 and cluster.connected == []
@@ -0,0 +1,62 @@
+from IPython.core.completer import provisionalcompleter
+
+from ipyghidra.profiler import BridgeProfiler
+
+
+def complete(ip, line):
+    return ip.complete(None, line, len(line))[1]
+
+
+def bridge_requests(ip, function):
+    with BridgeProfiler(ip.user_ns['_bridge'].bridge) as profiler:
+        result = function()
+    # Handles that get garbage collected meanwhile are released with a `del`, that's not the completion
+    return result, [r for r in profiler.requests if r.command != "del"]
+
+
+def test_doc_chain(ip):
+    ip.run_cell("a = currentProgram.imageBase")
+    line = "currentProgram.functionManager.getFunctionAt(a)."
+    complete(ip, line)
+    matches, requests = bridge_requests(ip, lambda: complete(ip, line))
+    assert {".getEntryPoint", ".entryPoint", ".getName", ".name", ".setName"} <= set(matches)
+    assert requests == []
+
+
+def test_doc_chain_prefix(ip):
+    line = "currentProgram.functionManager.getFunc"
+    assert complete(ip, line) == [f"currentProgram.functionManager.{m}"
+                                  for m in ("getFunctionAt", "getFunctionCount", "getFunctions")]
+
+
+def test_unknown_chain_falls_back(ip):
+    ip.run_cell("local_thing = {'key': 1}")
+    line = "local_thing.k"
+    with provisionalcompleter():
+        assert "keys" in {c.text for c in ip.Completer.completions(line, len(line))}
+
+
+def test_bridged_object_in_namespace(ip):
+    ip.run_cell("fm = currentProgram.functionManager")
+    complete(ip, "fm.")
+    matches, requests = bridge_requests(ip, lambda: complete(ip, "fm.getF"))
+    assert matches == ["fm.getFunctionAt", "fm.getFunctionCount", "fm.getFunctions"]
+    assert requests == []
+
+
+def test_dir_needs_no_round_trip(ip):
+    # The attribute names arrive with the handle, which is why dir() of bridged objects needs no cache
+    ip.run_cell("fm = currentProgram.functionManager")
+    members, requests = bridge_requests(ip, lambda: dir(ip.user_ns["fm"]))
+    assert "getFunctions" in members
+    assert requests == []
+
+
+def test_namespace_root_has_members_the_doc_lacks(ip):
+    # The doc of Program doesn't list getDomainFile, the fake implementation class has it
+    ip.run_cell("prog = currentProgram")
+    complete(ip, "prog.")
+    matches, requests = bridge_requests(ip, lambda: complete(ip, "prog.get"))
+    assert {"prog.getDomainFile", "prog.getFunctionManager"} <= set(matches)
+    assert not any(m.startswith("prog._") for m in complete(ip, "prog."))
+    assert requests == []
@@ -0,0 +1,42 @@
+import pytest
+from IPython.core.error import UsageError
+
+from ipyghidra.define import Definitions
+
+SUMMARY = '''
+def summary(f):
+    # def inside a comment or "def string():" must not count
+    return "%s/%d" % (f.getName(), helper(f))
+
+def helper(f):
+    return f.getParameterCount()
+'''
+
+
+def test_defined_functions_run_on_the_server(ip):
+    ip.run_cell_magic("ghidra_define", "", SUMMARY)
+    assert sorted(ip.user_ns['_definitions'].functions) == ["helper", "summary"]
+    names = ip.run_line_magic("ghidra_eval", "[summary(f) for f in currentProgram.functionManager.getFunctions(True)]")
+    assert names and all("/" in name for name in names)
+
+
+def test_flat_api_names_are_not_rebound(ip):
+    with pytest.raises(UsageError, match="currentProgram"):
+        ip.run_cell_magic("ghidra_define", "", "def currentProgram():\n    return None\n")
+    assert ip.run_line_magic("ghidra_eval", "currentProgram.getName()")
+
+
+def test_clients_have_namespaces_of_their_own(ip):
+    bridge = ip.user_ns['_bridge'].bridge
+    first, second = Definitions(bridge, {}), Definitions(bridge, {})
+    first.define("def which():\n    return 'first'\n")
+    second.define("def which():\n    return 'second'\n")
+    assert (first.functions['which'](), second.functions['which']()) == ('first', 'second')
+    # Nothing leaked into the server's globals
+    assert not bridge.remote_eval("'which' in globals()")
+
+
+def test_no_definitions():
+    with pytest.raises(ValueError, match="No top level def"):
+        from ipyghidra.server.define import define
+        define({}, "client", "x = 'def f(): pass'\n")
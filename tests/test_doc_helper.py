@@ -0,0 +1,104 @@
+import json
+import threading
+import zipfile
+
+import pytest
+
+from ipyghidra.doc_helper import DocHelper
+
+
+class StubBridge():
+    """Stands in for the bridge during loading, remote_import blocks until `release` and then fails or succeeds"""
+
+    def __init__(self, error=None):
+        self.release = threading.Event()
+        self.error = error
+
+    def remote_import(self, name):
+        self.release.wait(10)
+        if self.error is not None:
+            raise self.error
+        return None
+
+
+@pytest.fixture
+def api_zip(tmp_path):
+    path = tmp_path / "GhidraAPI_javadoc.zip"
+    with zipfile.ZipFile(path, "w") as z:
+        z.writestr("api/ghidra/Foo.json", json.dumps({"javadoc": "Foo", "methods": []}))
+    return str(path)
+
+
+def test_rebuild_index_waits_for_loading(api_zip):
+    bridge = StubBridge()
+    doc_helper = DocHelper(bridge, zip_path=api_zip, version="10.0", background=True)
+    assert doc_helper.index_path is None
+    rebuilt = []
+    rebuild = threading.Thread(target=lambda: rebuilt.append(doc_helper.rebuild_index()))
+    rebuild.start()
+    bridge.release.set()
+    rebuild.join(10)
+    assert rebuilt == [doc_helper.index_path]
+    assert doc_helper.get_jsondoc("ghidra.Foo")["javadoc"] == "Foo"
+
+
+def test_rebuild_index_after_failed_load(api_zip):
+    bridge = StubBridge(ConnectionError("bridge gone"))
+    bridge.release.set()
+    doc_helper = DocHelper(bridge, zip_path=api_zip, version="10.0", background=True)
+    with pytest.raises(RuntimeError, match="bridge gone"):
+        doc_helper.rebuild_index()
+    assert doc_helper.index_path is None
+    assert isinstance(doc_helper.load_error, ConnectionError)
+
+
+def method(name, *param_types):
+    return {"name": name, "javadoc": name, "params": [{"name": f"p{i}", "type_long": t, "type_short": t}
+                                                      for i, t in enumerate(param_types)]}
+
+
+@pytest.fixture
+def hierarchy_zip(tmp_path):
+    path = tmp_path / "GhidraAPI_javadoc.zip"
+    docs = {
+        "Parent": {"javadoc": "Parent", "extends": "java.lang.Object", "implements": [],
+                   "methods": [method("foo", "int"), method("foo", "java.lang.String"), method("getName")]},
+        "Child": {"javadoc": "Child", "extends": "ghidra.Parent", "implements": [],
+                  "methods": [dict(method("foo", "int"), javadoc="override")]},
+    }
+    with zipfile.ZipFile(path, "w") as z:
+        for name, doc in docs.items():
+            z.writestr(f"api/ghidra/{name}.json", json.dumps(doc))
+    return str(path)
+
+
+def doc_helper_for(path, **kwargs):
+    bridge = StubBridge()
+    bridge.release.set()
+    return DocHelper(bridge, zip_path=path, version="10.0", use_index=False, **kwargs)
+
+
+def test_overrides_keep_the_other_overloads(hierarchy_zip):
+    doc_helper = doc_helper_for(hierarchy_zip)
+    foo = doc_helper._resolved_methods("ghidra.Child")["foo"]
+    assert [(m["javadoc"], m["params"][0]["type_long"]) for m in foo] == [("override", "int"),
+                                                                          ("foo", "java.lang.String")]
+    assert "getName" in doc_helper._resolved_methods("ghidra.Child")
+
+
+def test_classes_without_doc_are_looked_up_once(hierarchy_zip):
+    doc_helper = doc_helper_for(hierarchy_zip)
+    lookups = []
+    get_jsondoc = doc_helper._store.get_jsondoc
+    doc_helper._store.get_jsondoc = lambda name: lookups.append(name) or get_jsondoc(name)
+    doc_helper._resolved_methods("ghidra.Child")
+    doc_helper._resolved_cache.clear()
+    doc_helper._resolved_methods("ghidra.Child")
+    assert lookups.count("java.lang.Object") == 1
+
+
+def test_resolved_tables_are_bounded_by_size(hierarchy_zip):
+    doc_helper = doc_helper_for(hierarchy_zip, cache_size=1)
+    doc_helper._resolved_methods("ghidra.Child")
+    # Each table alone is over the limit, so only the last one stays
+    assert len(doc_helper._resolved_cache) == 1 and doc_helper._resolved_cache.stats['size'] > 1
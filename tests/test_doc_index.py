@@ -0,0 +1,57 @@
+import json
+import zipfile
+
+import pytest
+
+from ipyghidra.doc_index import DocIndex
+
+PROGRAM = {
+    "javadoc": "A program",
+    "extends": "ghidra.framework.data.DomainObjectAdapterDB",
+    "implements": ["ghidra.program.model.listing.Program"],
+    "methods": [
+        {"name": "getName", "javadoc": "The name", "return": {"type_long": "java.lang.String", "type_short": "String"},
+         "params": []},
+        {"name": "getSymbol", "javadoc": None, "static": False,
+         "return": {"type_long": "ghidra.program.model.symbol.Symbol", "type_short": "Symbol", "comment": "or null"},
+         "params": [{"name": "name", "type_long": "java.lang.String", "type_short": "String"}]},
+    ],
+}
+# No implements, no methods, params without comment, the keys a class has vary
+LISTING = {"javadoc": "A listing", "extends": ["ghidra.A", "ghidra.B"], "fields": [{"name": "X"}]}
+
+
+@pytest.fixture
+def api_zip(tmp_path):
+    path = tmp_path / "GhidraAPI_javadoc.zip"
+    with zipfile.ZipFile(path, "w") as z:
+        z.writestr("api/ghidra/program/database/ProgramDB.json", json.dumps(PROGRAM))
+        z.writestr("api/ghidra/program/model/listing/Listing.json", json.dumps(LISTING))
+        z.writestr("api/ghidra/Broken.json", "{not json")
+        z.writestr("api/ghidra/NoName.json", json.dumps({"methods": [{"javadoc": "no name"}]}))
+    return str(path)
+
+
+def test_jsondoc_matches_zip(api_zip):
+    index = DocIndex.for_zip(api_zip, "10.0")
+    assert index.get_jsondoc("ghidra.program.database.ProgramDB") == PROGRAM
+    assert index.get_jsondoc("ghidra.program.model.listing.Listing") == LISTING
+    index.close()
+
+
+def test_supertypes(api_zip):
+    index = DocIndex.for_zip(api_zip, "10.0")
+    assert index.get_supertypes("ghidra.program.database.ProgramDB") == (
+        "ghidra.framework.data.DomainObjectAdapterDB", ["ghidra.program.model.listing.Program"])
+    # Further interfaces an interface extends are handled like implemented ones
+    assert index.get_supertypes("ghidra.program.model.listing.Listing") == ("ghidra.A", ["ghidra.B"])
+    index.close()
+
+
+def test_malformed_classes_are_skipped(api_zip):
+    index = DocIndex.for_zip(api_zip, "10.0")
+    for class_name in ("ghidra.Broken", "ghidra.NoName"):
+        with pytest.raises(KeyError):
+            index.get_jsondoc(class_name)
+    assert index.get_jsondoc("ghidra.program.database.ProgramDB") == PROGRAM
+    index.close()
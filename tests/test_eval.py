@@ -0,0 +1,24 @@
+import logging
+
+import ipyghidra
+
+
+def test_eval(ip):
+    ip.run_cell("limit = 3")
+    names = ip.run_line_magic("ghidra_eval", "[f.name for f in currentProgram.functionManager.getFunctions(True)][:limit]")
+    assert len(names) == 3 and all(name.startswith("FUN_") for name in names)
+
+
+def test_wire_size_only_for_debug(ip, monkeypatch):
+    sized = []
+    monkeypatch.setattr(ipyghidra, "wire_size", lambda value: sized.append(value) or 0)
+    ip.run_cell("limit = 3")
+    ip.run_line_magic("ghidra_eval", "limit + 1")
+    assert sized == []
+    level = ipyghidra.logger.level
+    ipyghidra.logger.setLevel(logging.DEBUG)
+    try:
+        ip.run_line_magic("ghidra_eval", "limit + 1")
+    finally:
+        ipyghidra.logger.setLevel(level)
+    assert sized == [3]
@@ -0,0 +1,108 @@
+import types
+
+from ipyghidra.flat_api import LazyFlatAPI, CURRENT_STATE_EXPR, CURRENT_VALUES_EXPR
+from ipyghidra.scope import shipped_variables
+
+
+class StubBridge():
+    """Answers the few expressions LazyFlatAPI evaluates, the GUI moves on with every request"""
+
+    def __init__(self, tool=True):
+        self.tool = tool
+        self.requests = []
+        self.main = types.SimpleNamespace(getState=lambda: "state of the server start", toAddr=lambda x: x)
+
+    def remote_eval(self, expr, **kwargs):
+        self.requests.append(expr)
+        if expr == "state.getTool() is not None":
+            return self.tool
+        if expr.startswith("[n for n in globals()"):
+            return ["getState", "toAddr", "currentProgram"]
+        if expr == CURRENT_VALUES_EXPR:
+            return dict.fromkeys(("currentProgram", "currentAddress", "currentLocation", "currentSelection",
+                                  "currentHighlight"), len(self.requests))
+        if expr == CURRENT_STATE_EXPR:
+            return f"state {len(self.requests)}"
+        raise AssertionError(expr)
+
+    def remote_import(self, name):
+        return self.main
+
+
+def test_get_state_follows_the_gui():
+    bridge = StubBridge()
+    namespace = {}
+    flat_api = LazyFlatAPI(bridge, namespace)
+    flat_api.populate({"getState", "toAddr"})
+    assert flat_api.provided("getState")
+    first, second = namespace["getState"](), namespace["getState"]()
+    assert first != second and first != "state of the server start"
+    assert namespace["toAddr"](1) == 1
+
+
+def test_get_state_headless():
+    bridge = StubBridge(tool=False)
+    namespace = {}
+    LazyFlatAPI(bridge, namespace).populate({"getState"})
+    assert namespace["getState"]() == "state of the server start"
+
+
+def test_user_get_state_is_kept():
+    namespace = {"getState": "mine"}
+    LazyFlatAPI(StubBridge(), namespace).populate({"getState"})
+    assert namespace["getState"] == "mine"
+
+
+def test_current_values_follow_the_gui_in_every_cell():
+    bridge = StubBridge()
+    namespace = {}
+    flat_api = LazyFlatAPI(bridge, namespace)
+    # Nothing used yet, so nothing to refresh
+    flat_api.refresh()
+    assert bridge.requests == []
+    flat_api.populate({"currentAddress"})
+    flat_api.forget_current()
+    first = namespace["currentAddress"]
+    # A function of an earlier cell reads the namespace, the next cell must see the new value without naming it
+    flat_api.refresh()
+    assert namespace["currentAddress"] != first
+    # The cell itself shares the values fetched before it ran
+    requests = len(bridge.requests)
+    flat_api.populate({"currentAddress", "currentSelection"})
+    assert len(bridge.requests) == requests
+
+
+def test_empty_selection_is_none():
+    class Selection():
+        def __init__(self, empty):
+            self.empty = empty
+
+        def isEmpty(self):
+            return self.empty
+
+    location = types.SimpleNamespace(getAddress=lambda: 0x1000)
+    panel = types.SimpleNamespace(getProgram=lambda: "program", getProgramLocation=lambda: location,
+                                  getProgramSelection=lambda: Selection(True),
+                                  getProgramHighlight=lambda: Selection(False))
+    tool = types.SimpleNamespace(getService=lambda service: types.SimpleNamespace(getListingPanel=lambda: panel))
+    ghidra = types.SimpleNamespace(app=types.SimpleNamespace(services=types.SimpleNamespace(CodeViewerService=None)))
+    values = eval(CURRENT_VALUES_EXPR, {"state": types.SimpleNamespace(getTool=lambda: tool), "ghidra": ghidra})
+    assert values["currentSelection"] is None and values["currentHighlight"] is not None
+    assert values["currentAddress"] == 0x1000
+
+
+def test_help_of_local_objects_is_the_builtin(capsys):
+    flat_api = LazyFlatAPI(StubBridge(), {})
+    flat_api.help(len)
+    assert "Return the number of items" in capsys.readouterr().out
+
+
+def test_isinstance_of_bridged_types(ip):
+    ip.run_cell("f = currentProgram.functionManager.getFunctions(True).next()\n"
+                "checks = (isinstance(f, ghidra.program.model.listing.Function),"
+                " isinstance(f, ghidra.program.model.listing.Program), isinstance(1, int))")
+    assert ip.user_ns["checks"] == (True, False, True)
+    assert ip.user_ns["_flat_api"].provided("help")
+    # The server uses its own isinstance, the local one is not sent along
+    assert shipped_variables({"isinstance", "help"}, ip.user_ns) == {}
+    assert ip.run_line_magic("ghidra_eval", "isinstance(currentProgram, ghidra.program.model.listing.Program)")
@@ -0,0 +1,31 @@
+import ghidra_bridge
+import pytest
+
+from conftest import FakeGhidra
+from ipyghidra.memory import MemoryCache
+
+RENAME = "[f.setName(f.getName() + '_changed', None) for f in [currentProgram.getFunctionManager().getFunctions(True).next()]]"
+
+
+def read_text(ghidra_install, change=None):
+    """Start a fake Ghidra, optionally change its program without saving, and read .text through a new MemoryCache"""
+    server = FakeGhidra(ghidra_install, functions=5)
+    try:
+        bridge = ghidra_bridge.GhidraBridge(connect_to_host="127.0.0.1", connect_to_port=server.port).bridge
+        if change is not None:
+            bridge.remote_eval(change)
+        memory = MemoryCache(bridge, {'currentProgram': bridge.remote_eval("currentProgram")})
+        data = memory.block(".text", as_type="bytes")
+        return data, memory.hits, memory.misses
+    finally:
+        server.stop()
+
+
+@pytest.mark.parametrize("change", [None, RENAME], ids=["saved", "unsaved"])
+def test_saved_bytes_survive_a_restart_unsaved_do_not(ghidra_install, change):
+    data, hits, misses = read_text(ghidra_install, change)
+    assert (hits, misses) == (0, 1)
+    # The modification number starts over, only saved content may come from the cache in the next session
+    again, hits, misses = read_text(ghidra_install, change)
+    assert again == data
+    assert (hits, misses) == ((1, 0) if change is None else (0, 1))
@@ -0,0 +1,48 @@
+import ghidra_bridge
+
+from conftest import FakeGhidra
+from ipyghidra.mirror import ProgramMirror
+
+
+def mirror_functions(ghidra_install):
+    """Start a fake Ghidra, mirror its program and return the function names and the sizes of the exported chunks"""
+    server = FakeGhidra(ghidra_install, functions=20)
+    try:
+        bridge = ghidra_bridge.GhidraBridge(connect_to_host="127.0.0.1", connect_to_port=server.port).bridge
+        mirror = ProgramMirror(bridge, {'currentProgram': bridge.remote_eval("currentProgram")}, chunk_size=7)
+        chunks = []
+        export = mirror._export
+
+        def counting_export(table, ranges=None):
+            for rows in export(table, ranges):
+                if table == "functions":
+                    chunks.append(len(rows))
+                yield rows
+
+        mirror._export = counting_export
+        mirror.attach()
+        names = [name for name, in mirror.sql("SELECT name FROM functions ORDER BY entry")]
+        mirror.detach()
+        return names, chunks
+    finally:
+        server.stop()
+
+
+def test_export_in_chunks_and_reuse_after_restart(ghidra_install):
+    names, chunks = mirror_functions(ghidra_install)
+    assert len(names) == 20 and chunks == [7, 7, 6]
+    # The saved program is the same after a restart of Ghidra, so the stored mirror is reused
+    assert mirror_functions(ghidra_install) == (names, [])
+
+
+def test_sync_streams_changed_rows(ip):
+    ip.run_cell("f = currentProgram.functionManager.getFunctions(True).next()\nold_name = f.name")
+    mirror = ip.user_ns['_mirror']
+    mirror.chunk_size = 3
+    mirror.attach()
+    try:
+        ip.run_cell("f.setName('mirrored', None)")
+        assert mirror.sql("SELECT count(*) FROM functions WHERE name = 'mirrored'") == [(1,)]
+    finally:
+        ip.run_cell("f.setName(old_name, None)")
+        mirror.detach()
@@ -0,0 +1,65 @@
+import pytest
+
+from ipyghidra.eval_plan import EvalPlan
+from ipyghidra.offload import OFFLOAD_NAME
+
+
+@pytest.fixture
+def offloader(ip):
+    offloader = ip.user_ns[OFFLOAD_NAME]
+    offloader.enabled = True
+    offloader.offloaded = offloader.fallbacks = 0
+    ip.run_cell("fm = currentProgram.functionManager")
+    yield offloader
+    offloader.enabled = False
+
+
+def run(ip, code):
+    result = ip.run_cell(code)
+    if result.error_in_exec is not None:
+        raise result.error_in_exec
+    return result.result
+
+
+def test_offloaded(ip, offloader):
+    names = run(ip, "[f.name for f in fm.getFunctions(True)]")
+    assert len(names) == ip.user_ns["fm"].functionCount
+    assert (offloader.offloaded, offloader.fallbacks) == (1, 0)
+
+
+def test_set_comprehension_is_a_local_set(ip, offloader):
+    thunks = run(ip, "{f.isThunk() for f in fm.getFunctions(True)}")
+    assert type(thunks) is set and thunks <= {True, False}
+    assert offloader.offloaded == 1
+
+
+def test_generator(ip, offloader):
+    names = run(ip, "(f.name for f in fm.getFunctions(True))")
+    assert next(names).startswith("FUN_")
+
+
+def test_fallback_when_the_server_cant_compile(ip, offloader, monkeypatch):
+    def remote_code(plan, bridge):
+        raise SyntaxError("f-strings are not Python 2.7")
+
+    monkeypatch.setattr(EvalPlan, "remote_code", remote_code)
+    # Locally every item is a round trip, a short remote iterable keeps that quick
+    ip.run_cell("numbers = _bridge.remote_eval('range(3)')")
+    assert run(ip, "[f'{n}!' for n in numbers]") == ["0!", "1!", "2!"]
+    assert (offloader.offloaded, offloader.fallbacks) == (0, 1)
+
+
+def test_server_errors_are_not_run_again(ip, offloader):
+    ip.run_cell("""
+checked = []
+def check(f):
+    checked.append(f)
+    if len(checked) == 3:
+        raise ValueError("third function")
+    return True
+""")
+    with pytest.raises(Exception, match="third function"):
+        run(ip, "[f.name for f in fm.getFunctions(True) if check(f)]")
+    # Running it again locally would have continued with the rest of the already consumed iterator
+    assert len(ip.user_ns["checked"]) == 3
+    assert offloader.fallbacks == 0
@@ -0,0 +1,53 @@
+import pytest
+
+from ipyghidra.parallel import GhidraMapError, ghidra_map
+from ipyghidra.remote import remote_module
+
+
+@pytest.fixture
+def mapper(ip):
+    bridge = ip.user_ns['_bridge'].bridge
+    pool = ip.user_ns['_bridge_pool']
+    jobs = remote_module(bridge, 'pmap')._jobs
+
+    def run(iterable, expression, **kwargs):
+        return ghidra_map(bridge, pool, iterable, expression, ip.user_ns, workers=3, chunk_size=4, **kwargs)
+
+    yield run
+    # Every job is closed on the server, also those that failed or were stopped early
+    assert len(jobs) == 0
+
+
+def test_ordered(mapper):
+    assert mapper("range(30)", "x * 2") == [x * 2 for x in range(30)]
+
+
+def test_unordered(mapper):
+    results = list(mapper("range(30)", "x * 2", ordered=False))
+    assert sorted(results) == [(x, x * 2) for x in range(30)]
+
+
+def test_errors_raise(mapper):
+    with pytest.raises(GhidraMapError, match="Item 7: ZeroDivisionError") as info:
+        mapper("range(30)", "1 // (x - 7)")
+    assert info.value.index == 7
+
+
+def test_keep_errors(mapper):
+    results = mapper("range(10)", "1 // (x - 7)", keep_errors=True)
+    assert isinstance(results[7], GhidraMapError)
+    assert [r for i, r in enumerate(results) if i != 7] == [1 // (x - 7) for x in range(10) if x != 7]
+
+
+def test_stopped_early(mapper):
+    results = mapper("range(30)", "x", ordered=False)
+    next(results)
+    results.close()
+    # The pool still works afterwards
+    assert mapper("range(5)", "x + 1") == [1, 2, 3, 4, 5]
+
+
+def test_magic_with_local_variables(ip):
+    ip.run_cell("offset = 100")
+    result = ip.run_cell_magic("ghidra_map", "--quiet --workers 2 --chunk 3 range(10)", "x + offset")
+    assert result == [x + 100 for x in range(10)]
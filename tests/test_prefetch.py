@@ -0,0 +1,59 @@
+import threading
+
+FIRST_FUNCTION = "f = currentProgram.functionManager.getFunctions(True).next()\n"
+
+
+def test_prefetched_values_are_served(ip):
+    prefetcher = ip.user_ns['_prefetcher']
+    ip.run_cell(FIRST_FUNCTION + "_prefetcher.prefetch(f, ['name', 'entryPoint'])")
+    hits = prefetcher.hits
+    ip.run_cell("name = f.name")
+    assert prefetcher.hits == hits + 1
+
+
+def test_method_call_drops_values_in_the_same_cell(ip):
+    ip.run_cell(FIRST_FUNCTION + "old_name = f.name")
+    try:
+        result = ip.run_cell("_prefetcher.prefetch(f, ['name'])\nf.setName('renamed', None)\nnew_name = f.name")
+        assert result.success
+        assert ip.user_ns['new_name'] == 'renamed'
+    finally:
+        ip.run_cell("f.setName(old_name, None)")
+
+
+def test_iterating_keeps_values(ip):
+    prefetcher = ip.user_ns['_prefetcher']
+    ip.run_cell("it = currentProgram.functionManager.getFunctions(True)\nf = it.next()\n"
+                "_prefetcher.prefetch(f, ['name'])")
+    generation = prefetcher.generation
+    ip.run_cell("g = next(it)\nname = f.name")
+    assert prefetcher.generation == generation
+
+
+def test_quiet_is_per_thread(ip):
+    prefetcher = ip.user_ns['_prefetcher']
+    bridge = ip.user_ns['_bridge'].bridge
+    ip.run_cell(FIRST_FUNCTION + "_prefetcher.prefetch(f, ['name'])")
+    inside, done = threading.Event(), threading.Event()
+
+    def read_quietly():
+        with prefetcher.quiet():
+            inside.set()
+            done.wait(10)
+
+    reader = threading.Thread(target=read_quietly)
+    reader.start()
+    try:
+        inside.wait(10)
+        # Another thread is quiet, a request of this one may still change objects
+        generation = prefetcher.generation
+        bridge.remote_eval("1")
+        assert prefetcher.generation == generation + 1
+    finally:
+        done.set()
+        reader.join()
+
+    ip.run_cell("_prefetcher.prefetch(f, ['name'])")
+    generation = prefetcher.generation
+    prefetcher.quietly(bridge.remote_eval)("1")
+    assert prefetcher.generation == generation
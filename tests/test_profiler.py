@@ -0,0 +1,39 @@
+import json
+
+from ipyghidra.profiler import BridgeProfiler
+
+
+def test_prof_magic_reports_and_traces(ip, tmp_path, capsys):
+    trace = tmp_path / "trace.json"
+    ip.run_cell_magic("ghidra_prof", f"--trace {trace}", "\n".join([
+        "import threading",
+        "fm = currentProgram.getFunctionManager()",
+        "worker = threading.Thread(target=fm.getFunctionCount, name='prof-worker')",
+        "worker.start(); worker.join()",
+    ]))
+    report = capsys.readouterr().out
+    assert "fm = currentProgram.getFunctionManager()" in report
+    assert "getFunctionCount()" in report
+
+    events = json.load(open(trace))['traceEvents']
+    names = {e['tid']: e['args']['name'] for e in events if e['ph'] == 'M' and e['name'] == 'thread_name'}
+    requests = [e for e in events if e['ph'] == 'X']
+    assert all(isinstance(e['tid'], int) and e['tid'] in names for e in requests)
+    assert [e['name'] for e in requests if names[e['tid']] == 'prof-worker' and e['cat'] == 'call'] == \
+        ["getFunctionCount()"]
+
+
+def test_nested_profilers(ip):
+    bridge = ip.user_ns['_bridge'].bridge
+    ip.run_cell("fm = currentProgram.getFunctionManager()")
+    fm = ip.user_ns["fm"]
+    with BridgeProfiler(bridge) as outer:
+        fm.getFunctionCount()
+        with BridgeProfiler(bridge) as inner:
+            fm.getFunctionCount()
+        fm.getFunctionCount()
+    fm.getFunctionCount()
+    # The outer profiler still records after the inner one is done, and stops with its own exit
+    assert [r.label for r in outer.requests if r.command == "call"] == ["getFunctionCount()"] * 3
+    assert [r.label for r in inner.requests if r.command == "call"] == ["getFunctionCount()"]
+    assert 'send_cmd' not in bridge.client.__dict__
@@ -0,0 +1,48 @@
+import ipyghidra
+from ipyghidra.result_cache import ResultCache
+
+QUERY = "--cache [f.name for f in currentProgram.functionManager.getFunctions(True)][:limit]"
+
+
+def test_results_are_copies():
+    cache = ResultCache()
+    result = {"names": ["a", "b"], "pair": (1, [2])}
+    cache.put("key", result)
+    result["names"].append("changed by the caller")
+    cached = cache.get("key")
+    cached["pair"][1].append("changed again")
+    assert cache.get("key") == {"names": ["a", "b"], "pair": (1, [2])}
+
+
+def test_none_is_a_result():
+    cache = ResultCache()
+    cache.put("key", None)
+    assert cache.lookup("key") == (True, None)
+    assert cache.lookup("other") == (False, None)
+
+
+def test_resize_evicts_right_away():
+    cache = ResultCache()
+    for i in range(10):
+        cache.put(i, list(range(100)))
+    cache.resize(cache.stats['size'] // 2)
+    assert len(cache) < 10 and cache.stats['size'] <= cache.max_size
+    # The most recently used entries stay
+    assert 9 in cache and 0 not in cache
+
+
+def test_cached_until_the_program_changes(ip):
+    ip.run_cell("limit = 2")
+    first = ip.run_line_magic("ghidra_eval", QUERY)
+    first.append("changed by the caller")
+    hits = ipyghidra.eval_results.hits
+    assert ip.run_line_magic("ghidra_eval", QUERY) == first[:2]
+    assert ipyghidra.eval_results.hits == hits + 1
+
+    ip.run_cell("f = currentProgram.functionManager.getFunctions(True).next()\nold_name = f.name\n"
+                "f.setName('renamed', None)")
+    try:
+        assert ip.run_line_magic("ghidra_eval", QUERY)[0] == "renamed"
+    finally:
+        ip.run_cell("f.setName(old_name, None)")
+    assert ip.run_line_magic("ghidra_eval", QUERY) == first[:2]
@@ -0,0 +1,42 @@
+import itertools
+
+import pytest
+
+from ipyghidra.profiler import BridgeProfiler
+from ipyghidra.stream import RemoteStream
+
+NAMES = "[f.name for f in currentProgram.functionManager.getFunctions(True)]"
+
+
+@pytest.fixture
+def bridge(ip):
+    return ip.user_ns['_bridge'].bridge
+
+
+@pytest.mark.parametrize("count, chunk_size", [(23, 5), (20, 5), (3, 5), (0, 5)])
+def test_every_item_once(bridge, count, chunk_size):
+    stream = RemoteStream(bridge, bridge.remote_eval(f"iter(range({count}))"), chunk_size=chunk_size)
+    with BridgeProfiler(bridge) as profiler:
+        assert list(stream) == list(range(count))
+    assert stream.fetched == count
+    # One request per chunk, and one finding out the end when the last chunk was full
+    assert sum(r.command == "eval" for r in profiler.requests) == count // chunk_size + 1
+    assert list(stream) == []
+
+
+def test_close_early(bridge):
+    stream = RemoteStream(bridge, bridge.remote_eval("iter(range(100))"), chunk_size=10)
+    assert list(itertools.islice(stream, 7)) == list(range(7))
+    with BridgeProfiler(bridge) as profiler:
+        stream.close()
+        assert list(stream) == []
+    # The server side iterator is released, nothing more is fetched
+    assert [r.command for r in profiler.requests] == ["del"]
+    assert stream.fetched == 10
+
+
+def test_stream_magic(ip):
+    names = ip.run_line_magic("ghidra_eval", NAMES)
+    stream = ip.run_line_magic("ghidra_eval", f"--stream --chunk 7 {NAMES}")
+    assert isinstance(stream, RemoteStream)
+    assert list(stream) == names and len(names) == 100
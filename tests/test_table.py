@@ -0,0 +1,47 @@
+import pytest
+
+from ipyghidra.server.table import pack_column
+from ipyghidra.table import decode_column
+
+FUNCTIONS = "currentProgram.functionManager.getFunctions(True)"
+
+
+@pytest.mark.parametrize("values, kind", [
+    ([1, -2, 2 ** 63 - 1, -2 ** 63], 'q'),
+    ([1, None, 2 ** 53], 'd'),
+    ([2 ** 63, 1, -2 ** 64], 'i'),
+    ([2 ** 53 + 1, None], 'i'),
+    ([True, False], '?'),
+    (["a", None, "ü"], 's'),
+])
+def test_columns_decode_to_their_values(values, kind):
+    packed = pack_column(values)
+    assert packed[0] == kind
+    decoded = decode_column(packed).tolist()
+    if kind == 'd':
+        assert decoded[0::2] == values[0::2] and decoded[1] != decoded[1]
+    elif kind == 's':
+        assert decoded == ["a", "", "ü"]
+    else:
+        assert decoded == values
+
+
+def test_table_magic(ip):
+    columns = {
+        "name": "x.name",
+        "entry": "x.entryPoint.offset",
+        "thunk": "x.thunk",
+        "parameters": "x.parameterCount or None",
+        "huge": "x.entryPoint.offset << 64",
+    }
+    table = ip.run_cell_magic("ghidra_table", FUNCTIONS, "\n".join(f"{n} = {e}" for n, e in columns.items()))
+    rows = ip.run_line_magic("ghidra_eval", f"[({', '.join(columns.values())}) for x in {FUNCTIONS}]")
+    expected = dict(zip(columns, map(list, zip(*rows))))
+
+    assert table['name'].tolist() == expected['name']
+    assert table['entry'].dtype == 'int64' and table['entry'].tolist() == expected['entry']
+    assert table['thunk'].dtype == 'bool' and table['thunk'].tolist() == expected['thunk']
+    # Integers with None are float64 with NaN
+    assert [None if p != p else p for p in table['parameters'].tolist()] == expected['parameters']
+    assert None in expected['parameters']
+    assert table['huge'].dtype == object and table['huge'].tolist() == expected['huge']
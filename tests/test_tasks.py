@@ -0,0 +1,56 @@
+import concurrent.futures
+import threading
+
+import pytest
+
+from ipyghidra.server import tasks
+
+LOOP = compile("[i for i in iter(int, 1)]", "<ghidra_eval>", "eval")
+
+
+def test_cancel_before_start():
+    assert not tasks.cancel("early")
+    with pytest.raises(tasks.TaskCancelled):
+        tasks.run("early", compile("1", "<ghidra_eval>", "eval"), {}, {})
+    assert "early" not in tasks._pending_cancels
+
+
+def test_cancel_after_end_leaves_nothing_behind():
+    assert tasks.run("ended", compile("1 + 1", "<ghidra_eval>", "eval"), {}, {}) == 2
+    assert not tasks.cancel("ended")
+    assert "ended" not in tasks._pending_cancels and "ended" not in tasks._tasks
+
+
+def test_pending_cancels_expire(monkeypatch):
+    monkeypatch.setattr(tasks, "PENDING_CANCEL_TIMEOUT", -1)
+    tasks.cancel("never started")
+    tasks.cancel("another one")
+    assert "never started" not in tasks._pending_cancels
+
+
+def test_cancel_running():
+    with concurrent.futures.ThreadPoolExecutor(1) as executor:
+        future = executor.submit(tasks.run, "loop", LOOP, {}, {})
+        while "loop" not in tasks.running():
+            threading.Event().wait(0.01)
+        assert tasks.cancel("loop")
+        with pytest.raises(tasks.TaskCancelled):
+            future.result(10)
+    assert tasks.running() == []
+
+
+def test_cancel_through_the_bridge(ip):
+    task = ip.run_line_magic("ghidra_eval", "--async [i for i in iter(int, 1)]")
+    assert task.cancel()
+    with pytest.raises(concurrent.futures.CancelledError):
+        task.result(10)
+    assert ip.run_line_magic("ghidra_eval", "--async 1 + 1").result(10) == 2
+
+
+def test_tasks_magic_lists_and_cancels(ip, capsys):
+    task = ip.run_line_magic("ghidra_eval", "--async [i for i in iter(int, 1)]")
+    ip.run_line_magic("ghidra_tasks", "")
+    assert task.id in capsys.readouterr().out
+    ip.run_line_magic("ghidra_tasks", f"cancel {task.id}")
+    with pytest.raises(concurrent.futures.CancelledError):
+        task.result(10)